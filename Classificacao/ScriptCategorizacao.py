@@ -3,16 +3,12 @@ Script para categorizar exercícios por grupo muscular usando IA.
 Lê o CSV de exercícios e gera um novo CSV com categorias.
 """
 
-import pandas as pd
 import json
 from pathlib import Path
 from typing import Optional
 from pydantic import BaseModel, Field
-from agno.agent import Agent
 from dotenv import load_dotenv
 import os
-from agno.models.openai import OpenAILike
-from agno.models.google import Gemini
 
 load_dotenv(override=True)
 
@@ -23,31 +19,47 @@ class ExerciseCategory(BaseModel):
     categoria: str = Field(description="Grupo muscular principal: Peito, Costas, Ombro, Bíceps, Tríceps, Abdômen, Perna, Antebraço, Mobilidade/Alongamento")
 
 
-# Configurar modelo
-maritaca_api_key = os.getenv("MARITALK_API_KEY")
-if not maritaca_api_key:
-    raise ValueError("A chave de API do Maritaca não está configurada. Por favor, defina a variável de ambiente 'MARITALK_API_KEY'.")
-
-model = OpenAILike(
-    id="sabia-4",
-    name="Maritaca Sabia 4",
-    api_key=maritaca_api_key,
-    base_url="https://chat.maritaca.ai/api",
-    temperature=0,
-)
-
-# Criar agente especializado em categorização de exercícios
-agent = Agent(
-    model=model,
-    markdown=True,
-    structured_outputs=True,
-    instructions=[
-        "Você é um especialista em educação física e categorização de exercícios.",
-        "Categorize exercícios nos seguintes grupos musculares: Peitoral Maior, Peitoral Menor, Latíssimo do Dorso, Trapézio, Romboides, Deltoide Anterior, Deltoide Lateral, Deltoide Posterior, Manguito Rotador, Bíceps Braquial, Braquial, Tríceps Braquial, Flexores do Antebraço, Extensores do Antebraço, Reto Abdominal, Oblíquos, Transverso do Abdômen, Eretores da Espinha, Iliopsoas, Glúteo Maior, Glúteo Médio/Mínimo, Quadríceps, Isquiotibiais, Adutores, Abdutores, Gastrocnêmio, Sóleo, Tibial Anterior",
-        "Para exercícios que envolvem múltiplos grupos, escolha o PRINCIPAL.",
-        "Responda sempre em JSON com a estrutura: {\"exercicio\": \"nome\", \"categoria\": \"grupo_muscular\"}"
-    ],
-)
+_agent = None
+
+
+def _criar_agente():
+    """Cria o modelo e o agente de categorização (agno só é importado aqui)."""
+    from agno.agent import Agent
+    from agno.models.openai import OpenAILike
+
+    # Configurar modelo
+    maritaca_api_key = os.getenv("MARITALK_API_KEY")
+    if not maritaca_api_key:
+        raise ValueError("A chave de API do Maritaca não está configurada. Por favor, defina a variável de ambiente 'MARITALK_API_KEY'.")
+
+    model = OpenAILike(
+        id="sabia-4",
+        name="Maritaca Sabia 4",
+        api_key=maritaca_api_key,
+        base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
+        temperature=0,
+    )
+
+    # Criar agente especializado em categorização de exercícios
+    return Agent(
+        model=model,
+        markdown=True,
+        structured_outputs=True,
+        instructions=[
+            "Você é um especialista em educação física e categorização de exercícios.",
+            "Categorize exercícios nos seguintes grupos musculares: Peitoral Maior, Peitoral Menor, Latíssimo do Dorso, Trapézio, Romboides, Deltoide Anterior, Deltoide Lateral, Deltoide Posterior, Manguito Rotador, Bíceps Braquial, Braquial, Tríceps Braquial, Flexores do Antebraço, Extensores do Antebraço, Reto Abdominal, Oblíquos, Transverso do Abdômen, Eretores da Espinha, Iliopsoas, Glúteo Maior, Glúteo Médio/Mínimo, Quadríceps, Isquiotibiais, Adutores, Abdutores, Gastrocnêmio, Sóleo, Tibial Anterior",
+            "Para exercícios que envolvem múltiplos grupos, escolha o PRINCIPAL.",
+            "Responda sempre em JSON com a estrutura: {\"exercicio\": \"nome\", \"categoria\": \"grupo_muscular\"}"
+        ],
+    )
+
+
+def obter_agente():
+    """Retorna o agente de categorização, criando-o no primeiro uso."""
+    global _agent
+    if _agent is None:
+        _agent = _criar_agente()
+    return _agent
 
 
 def categorizar_exercicios(arquivo_entrada='exercicios_videos.csv', arquivo_saida='exercicios_categorizado.csv'):
@@ -58,6 +70,8 @@ def categorizar_exercicios(arquivo_entrada='exercicios_videos.csv', arquivo_said
         arquivo_entrada (str): Arquivo CSV com exercícios e vídeos
         arquivo_saida (str): Arquivo CSV de saída com categorias
     """
+    import pandas as pd
+
     try:
         # Ler arquivo CSV
         df = pd.read_csv(arquivo_entrada)
@@ -65,6 +79,8 @@ def categorizar_exercicios(arquivo_entrada='exercicios_videos.csv', arquivo_said
         print(f"Lendo arquivo: {arquivo_entrada}")
         print(f"Total de exercícios: {len(df)}")
         
+        agent = obter_agente()
+        
         # Lista para armazenar categorias
         categorias = []
         
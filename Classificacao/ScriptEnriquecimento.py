@@ -3,16 +3,16 @@ Script para enriquecer o CSV de exercícios categorizados com metadados estrutur
 Adiciona as colunas: contraindicacoes, rehab_tags, movement_pattern.
 """
 
-import pandas as pd
 import json
 import time
 from pathlib import Path
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 from pydantic import BaseModel, Field
-from agno.agent import Agent
 from dotenv import load_dotenv
 import os
-from agno.models.openai import OpenAILike
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 load_dotenv(override=True)
 
@@ -57,39 +57,55 @@ class ExerciseMetadata(BaseModel):
 # Configuração do modelo e agente
 # ---------------------------------------------------------------------------
 
-maritaca_api_key = os.getenv("MARITALK_API_KEY")
-if not maritaca_api_key:
-    raise ValueError(
-        "A chave de API do Maritaca não está configurada. "
-        "Por favor, defina a variável de ambiente 'MARITALK_API_KEY'."
+_agent = None
+
+
+def _criar_agente():
+    """Cria o modelo e o agente (agno só é importado aqui)."""
+    from agno.agent import Agent
+    from agno.models.openai import OpenAILike
+
+    maritaca_api_key = os.getenv("MARITALK_API_KEY")
+    if not maritaca_api_key:
+        raise ValueError(
+            "A chave de API do Maritaca não está configurada. "
+            "Por favor, defina a variável de ambiente 'MARITALK_API_KEY'."
+        )
+
+    model = OpenAILike(
+        id="sabiazinho-4",
+        name="Maritaca Sabia 4",
+        api_key=maritaca_api_key,
+        base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
+        temperature=0,
     )
 
-model = OpenAILike(
-    id="sabiazinho-4",
-    name="Maritaca Sabia 4",
-    api_key=maritaca_api_key,
-    base_url="https://chat.maritaca.ai/api",
-    temperature=0,
-)
-
-agent = Agent(
-    model=model,
-    markdown=False,
-    structured_outputs=True,
-    instructions=[
-        "Você é um especialista em educação física, biomecânica e fisioterapia.",
-        "Sua tarefa é enriquecer exercícios com metadados clínicos e biomecânicos.",
-        "",
-        "Regras obrigatórias:",
-        "1. Nunca altere o nome ou categoria do exercício.",
-        "2. Sempre retorne dados estruturados e coerentes do ponto de vista biomecânico.",
-        "3. contraindicacoes: termos curtos em snake_case, separados por ';'. Use 'nenhuma' se não houver.",
-        "4. rehab_tags: tags de uso em contexto de reabilitação, separadas por ';'.",
-        "5. movement_pattern deve ser EXATAMENTE um dos valores: squat, hinge, push, pull, rotation, isometric, unilateral, machine, mobility.",
-        "6. Nunca invente informações médicas complexas ou absurdas.",
-        "7. Mantenha coerência com o grupo muscular informado.",
-    ],
-)
+    return Agent(
+        model=model,
+        markdown=False,
+        structured_outputs=True,
+        instructions=[
+            "Você é um especialista em educação física, biomecânica e fisioterapia.",
+            "Sua tarefa é enriquecer exercícios com metadados clínicos e biomecânicos.",
+            "",
+            "Regras obrigatórias:",
+            "1. Nunca altere o nome ou categoria do exercício.",
+            "2. Sempre retorne dados estruturados e coerentes do ponto de vista biomecânico.",
+            "3. contraindicacoes: termos curtos em snake_case, separados por ';'. Use 'nenhuma' se não houver.",
+            "4. rehab_tags: tags de uso em contexto de reabilitação, separadas por ';'.",
+            "5. movement_pattern deve ser EXATAMENTE um dos valores: squat, hinge, push, pull, rotation, isometric, unilateral, machine, mobility.",
+            "6. Nunca invente informações médicas complexas ou absurdas.",
+            "7. Mantenha coerência com o grupo muscular informado.",
+        ],
+    )
+
+
+def obter_agente():
+    """Retorna o agente de enriquecimento, criando-o no primeiro uso."""
+    global _agent
+    if _agent is None:
+        _agent = _criar_agente()
+    return _agent
 
 
 # ---------------------------------------------------------------------------
@@ -101,7 +117,7 @@ def enriquecer_exercicios(
     arquivo_saida: str = "Classificacao/exercicios_enriquecidos.csv",
     arquivo_progresso: str = "Classificacao/exercicios_enriquecidos_parcial.csv",
     delay_entre_chamadas: float = 0.5,
-) -> pd.DataFrame | None:
+) -> "pd.DataFrame | None":
     """
     Lê o CSV categorizado e enriquece cada exercício com metadados via IA.
 
@@ -114,6 +130,8 @@ def enriquecer_exercicios(
     Returns:
         DataFrame enriquecido ou None em caso de erro fatal.
     """
+    import pandas as pd
+
     # --- Leitura do CSV de entrada ---
     try:
         df = pd.read_csv(arquivo_entrada)
@@ -148,6 +166,8 @@ def enriquecer_exercicios(
     print(f"✓ Total de exercícios: {len(df)}")
     print(f"✓ Colunas detectadas: {list(df.columns)}\n")
 
+    agent = obter_agente()
+
     # --- Retomar progresso anterior, se existir ---
     registros_prontos: dict[str, dict] = {}
     if Path(arquivo_progresso).exists():
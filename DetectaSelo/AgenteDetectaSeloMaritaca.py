@@ -19,7 +19,7 @@ model = OpenAILike(
             id="sabia-3.1",
             name="Maritaca Sabia 3",
             api_key=maritaca_api_key,
-            base_url="https://chat.maritaca.ai/api",
+            base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
             temperature=0,
         )
         
@@ -29,7 +29,7 @@ class ExtractByAgent:
             id="sabia-3",
             name="Maritaca Sabia 3",
             api_key=self.api_key,
-            base_url="https://chat.maritaca.ai/api",
+            base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
             temperature=0,
         )
         
@@ -33,7 +33,7 @@ model = OpenAILike(
     id="sabia-4",
     name="Maritaca Sabia 4",
     api_key=maritaca_api_key,
-    base_url="https://chat.maritaca.ai/api",
+    base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
     temperature=0,
 )
 google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -126,7 +126,7 @@ def _criar_modelo(provider: str):
             id=os.getenv("MARITALK_MODEL", "sabia-3.1"),
             name="MariTalk sabia-3.1",
             api_key=api_key,
-            base_url="https://chat.maritaca.ai/api",
+            base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
             temperature=0,
         )
 
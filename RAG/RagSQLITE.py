@@ -6,15 +6,32 @@ Implementacao do sistema RAG usando SQLite para persistencia
 de sessoes e historico de conversas.
 """
 
-from agno.agent import Agent
-from agno.models.openai import OpenAILike
-from agno.knowledge.pdf import PDFKnowledgeBase
-from agno.vectordb.lancedb import LanceDb
-from agno.storage.sqlite import SqliteStorage
-from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
+import inspect
 import os
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, Optional, Union
 from dotenv import load_dotenv
 
+from perfil_inicializacao import perfil
+
+# Apenas modulos leves aqui: busca hibrida, rerank, cache semantico e
+# quantizacao (numpy) sao importados nos ramos que os ativam
+from coalescencia import CoalescedorRequisicoes
+from indice_vetorial import GerenciadorIndiceVetorial
+from ingestao_incremental import IngestorIncremental
+from metricas_resposta import LogMetricas, MedicaoResposta, MetricasResposta, medir_retriever
+from registro_componentes import (
+    obter_embedder_com_cache,
+    obter_storage,
+    obter_vector_db,
+    tempos_carregamento,
+)
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
+    from agno.models.openai import OpenAILike
+    from lote_perguntas import LimitadorTaxa, RelatorioLote
+
 load_dotenv(override=True)
 
 
@@ -26,7 +43,19 @@ class RagSQLITE:
         db_file: str = "data.db",
         pdf_folder: str = "file",
         table_name: str = "agno_sessions",
-        session_id: str = "default_session"
+        session_id: str = "default_session",
+        nprobes: int = 20,
+        refine_factor: Optional[int] = None,
+        modo_busca: str = "hibrida",
+        k_textual: int = 20,
+        k_vetorial: int = 20,
+        cache_semantico: bool = True,
+        limiar_cache: float = 0.95,
+        log_metricas: Optional[str] = None,
+        rerank: bool = True,
+        orcamento_tokens: int = 2000,
+        precisao_vetores: Optional[str] = None,
+        fator_rescore: int = 4,
     ):
         """
         Inicializa o sistema RAG.
@@ -36,91 +65,362 @@ class RagSQLITE:
             pdf_folder: Pasta com arquivos PDF
             table_name: Nome da tabela de sessoes
             session_id: ID da sessao atual
+            nprobes: Particoes do indice vetorial visitadas por busca
+            refine_factor: Fator de reavaliacao com vetores completos (None desativa)
+            modo_busca: "hibrida" (BM25 + vetorial com RRF) ou "vetorial"
+            k_textual: Candidatos do BM25 na busca hibrida
+            k_vetorial: Candidatos vetoriais na busca hibrida
+            cache_semantico: Se deve responder perguntas parafraseadas pelo cache
+            limiar_cache: Similaridade minima para reaproveitar uma resposta
+            log_metricas: Arquivo JSONL onde anexar as metricas de cada pergunta
+            rerank: Se deve deduplicar e reordenar (MMR) os chunks antes do prompt
+            orcamento_tokens: Maximo de tokens de contexto apos o rerank
+            precisao_vetores: "float16" ou "int8" para buscar numa copia quantizada (None usa o indice ANN)
+            fator_rescore: Multiplicador de candidatos reavaliados em float32 na busca quantizada
         """
+        if modo_busca not in ("hibrida", "vetorial"):
+            raise ValueError("modo_busca deve ser 'hibrida' ou 'vetorial'")
         self.db_file = db_file
         self.pdf_folder = pdf_folder
         self.table_name = table_name
         self.session_id = session_id
+        self.nprobes = nprobes
+        self.refine_factor = refine_factor
+        self.modo_busca = modo_busca
+        self.k_textual = k_textual
+        self.k_vetorial = k_vetorial
+        self.usar_cache_semantico = cache_semantico
+        self.limiar_cache = limiar_cache
+        self.log_metricas = LogMetricas(log_metricas) if log_metricas else None
+        self.ultimas_metricas: Optional[MetricasResposta] = None
+        self.rerank = rerank
+        self.orcamento_tokens = orcamento_tokens
+        self.precisao_vetores = precisao_vetores
+        self.fator_rescore = fator_rescore
+        self.coalescedor = CoalescedorRequisicoes()
         
         # Configurar componentes
-        self._setup_model()
-        self._setup_embedder()
-        self._setup_vector_db()
-        self._setup_knowledge_base()
-        self._setup_storage()
-        self._setup_agent()
+        with perfil.medir("modelo"):
+            self._setup_model()
+        with perfil.medir("embedder"):
+            self._setup_embedder()
+        with perfil.medir("banco vetorial"):
+            self._setup_vector_db()
+        with perfil.medir("base de conhecimento"):
+            self._setup_knowledge_base()
+        with perfil.medir("storage"):
+            self._setup_storage()
+        with perfil.medir("cache semantico"):
+            self._setup_cache_semantico()
+        with perfil.medir("agente"):
+            self._setup_agent()
     
     def _setup_model(self):
         """Configura o modelo de linguagem."""
-        api_key = os.getenv("MARITALK_API_KEY")
-        if not api_key:
+        self.api_key = os.getenv("MARITALK_API_KEY")
+        if not self.api_key:
             raise ValueError("MARITALK_API_KEY e obrigatoria")
         
-        self.model = OpenAILike(
+        self.base_url = os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api")
+        self.model = self._criar_modelo()
+    
+    def _criar_modelo(self) -> "OpenAILike":
+        """Cria uma instancia do modelo de linguagem."""
+        from agno.models.openai import OpenAILike
+
+        return OpenAILike(
             id="sabia-3",
             name="Maritaca Sabia 3",
-            api_key=api_key,
-            base_url="https://chat.maritaca.ai/api",
+            api_key=self.api_key,
+            base_url=self.base_url,
             temperature=0,
         )
     
     def _setup_embedder(self):
-        """Configura o embedder."""
-        self.embedder = SentenceTransformerEmbedder()
+        """Configura o embedder (compartilhado no processo, com cache em disco)."""
+        self.embedder = obter_embedder_com_cache()
     
     def _setup_vector_db(self):
-        """Configura o banco vetorial."""
-        self.vector_db = LanceDb(
-            table_name="recipes",
-            uri="lancedb",
-            embedder=self.embedder,
+        """Configura o banco vetorial (compartilhado no processo)."""
+        self.vector_db = obter_vector_db(table_name="recipes", uri="lancedb")
+        self.indice = GerenciadorIndiceVetorial(
+            self.vector_db,
+            nprobes=self.nprobes,
+            refine_factor=self.refine_factor,
         )
+        self.indice_quantizado = None
+        self.busca_vetorial = self.indice
+        if self.precisao_vetores:
+            from quantizacao_vetorial import IndiceQuantizado
+
+            self.indice_quantizado = IndiceQuantizado(
+                self.vector_db,
+                precisao=self.precisao_vetores,
+                fator_rescore=self.fator_rescore,
+            )
+            self.busca_vetorial = self.indice_quantizado
+        self.recuperador = None
+        buscar = self.busca_vetorial.buscar
+        if self.modo_busca == "hibrida":
+            from busca_hibrida import RecuperadorHibrido
+
+            self.recuperador = RecuperadorHibrido(
+                self.busca_vetorial,
+                k_textual=self.k_textual,
+                k_vetorial=self.k_vetorial,
+            )
+            buscar = self.recuperador.buscar
+        self.recuperador_rerank = None
+        if self.rerank:
+            from rerank_contexto import RecuperadorComRerank, ReordenadorContexto
+
+            self.recuperador_rerank = RecuperadorComRerank(
+                buscar,
+                ReordenadorContexto(self.embedder, orcamento_tokens=self.orcamento_tokens),
+            )
     
     def _setup_knowledge_base(self):
         """Configura a base de conhecimento."""
+        from agno.knowledge.pdf import PDFKnowledgeBase
+
         self.knowledge_base = PDFKnowledgeBase(
             path=self.pdf_folder,
             vector_db=self.vector_db,
         )
     
     def _setup_storage(self):
-        """Configura o armazenamento SQLite."""
-        self.storage = SqliteStorage(
-            table_name=self.table_name,
+        """Configura o armazenamento SQLite (compartilhado no processo, runs em linhas)."""
+        self.storage = obter_storage(
             db_file=self.db_file,
+            table_name=self.table_name,
         )
     
+    def _setup_cache_semantico(self):
+        """Configura o cache semantico de respostas."""
+        self.versao_base = IngestorIncremental(self.knowledge_base).versao()
+        self.cache_semantico = None
+        if self.usar_cache_semantico:
+            from cache_semantico import CacheSemantico
+
+            self.cache_semantico = CacheSemantico(
+                self.embedder,
+                db_file=self.db_file,
+                limiar=self.limiar_cache,
+                versao_base=self.versao_base,
+            )
+    
     def _setup_agent(self):
         """Configura o agente."""
-        self.agent = Agent(
-            model=self.model,
+        self.agent = self.criar_agente(self.session_id, model=self.model)
+    
+    def criar_agente(
+        self, session_id: Optional[str], model: Optional["OpenAILike"] = None, persistir: bool = True
+    ) -> "Agent":
+        """
+        Cria um agente que compartilha embedder, banco vetorial e storage.
+        
+        Cada requisicao concorrente deve usar o proprio agente, pois o
+        Agent do agno guarda estado da execucao em andamento.
+        
+        Args:
+            session_id: ID da sessao do agente
+            model: Modelo a usar (padrao: nova instancia)
+            persistir: Se a sessao e gravada no storage (False para perguntas avulsas)
+        """
+        from agno.agent import Agent
+
+        return Agent(
+            model=model or self._criar_modelo(),
             name="RAG Agent",
             knowledge=self.knowledge_base,
-            storage=self.storage,
-            session_id=self.session_id,
+            storage=self.storage if persistir else None,
+            session_id=session_id,
             search_knowledge=True,
+            retriever=medir_retriever(self._retriever_base()),
             instructions="""Voce e um assistente inteligente.
 Responda perguntas usando o conhecimento disponivel.
 Seja preciso e forneca informacoes uteis.""",
         )
     
-    def load_documents(self):
-        """Carrega os documentos na base de conhecimento."""
-        self.knowledge_base.load()
+    def _retriever_base(self):
+        """Retriever do agente conforme o modo de busca e o rerank."""
+        if self.rerank:
+            return self.recuperador_rerank.retriever
+        if self.modo_busca == "hibrida":
+            return self.recuperador.retriever
+        return self.busca_vetorial.retriever
     
-    def ask(self, question: str, stream: bool = True):
+    def load_documents(self, incremental: bool = True, workers: int = 4):
+        """
+        Carrega os documentos na base de conhecimento.
+        
+        Args:
+            incremental: Se deve vetorizar apenas PDFs novos ou alterados
+            workers: Processos usados na leitura paralela dos PDFs
+            
+        Returns:
+            RelatorioIngestao no modo incremental, None caso contrario
+        """
+        if not incremental:
+            self.knowledge_base.load()
+            self.indice.atualizar()
+            if self.indice_quantizado:
+                self.indice_quantizado.sincronizar()
+            # Sem manifesto nao ha como saber o que mudou: invalida o cache
+            self.versao_base = f"carga-completa-{time.time()}"
+            if self.cache_semantico:
+                self.cache_semantico.definir_versao(self.versao_base)
+            return None
+        
+        ingestor = IngestorIncremental(self.knowledge_base, workers=workers)
+        relatorio = ingestor.sincronizar()
+        print(relatorio)
+        self.indice.atualizar()
+        if self.indice_quantizado:
+            self.indice_quantizado.sincronizar()
+        self.versao_base = ingestor.versao()
+        if self.cache_semantico:
+            self.cache_semantico.definir_versao(self.versao_base)
+        return relatorio
+    
+    def tokens_resposta(self, agente, question: str, limitador: Optional["LimitadorTaxa"] = None):
+        """
+        Executa o agente em streaming produzindo apenas os tokens de texto.
+        
+        Args:
+            limitador: Limite de geracoes no provedor do modelo, aguardado antes da chamada
+        """
+        if limitador:
+            limitador.aguardar()
+        for chunk in agente.run(question, stream=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+    
+    async def tokens_resposta_async(self, agente, question: str) -> AsyncIterator[str]:
+        """Executa o agente pelo caminho assincrono (arun) produzindo os tokens de texto."""
+        resultado = agente.arun(question, stream=True)
+        if inspect.isawaitable(resultado):
+            resultado = await resultado
+        async for chunk in resultado:
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+    
+    def ask(
+        self,
+        question: str,
+        stream: bool = True,
+        return_metrics: bool = False,
+        agente: Optional["Agent"] = None,
+        limitador: Optional["LimitadorTaxa"] = None,
+    ):
         """
         Faz uma pergunta ao agente.
         
         Args:
             question: A pergunta
-            stream: Se deve usar streaming na resposta
+            stream: Se deve imprimir a resposta em streaming
+            return_metrics: Se deve retornar (resposta, MetricasResposta)
+            agente: Agente a usar (padrao: o da sessao atual)
+            limitador: Limite de geracoes no provedor do modelo (padrao: sem limite)
+            
+        Returns:
+            A resposta quando stream=False; (resposta, metricas) se return_metrics
         """
-        if stream:
-            self.agent.print_response(question, stream=True)
-        else:
-            response = self.agent.run(question)
-            return response.content
+        agente = agente or self.agent
+        medicao = MedicaoResposta(question)
+        metricas = medicao.metricas
+        resposta = None
+        
+        # Cache e coalescencia sao restritos a sessao do agente: as respostas reaproveitadas ja
+        # estao no seu historico. Sem storage nao ha historico, entao a pergunta e avulsa e global
+        escopo = agente.session_id if agente.storage is not None else None
+        if self.cache_semantico:
+            acerto = self.cache_semantico.buscar(question, escopo=escopo)
+            if acerto:
+                resposta = acerto["resposta"]
+                metricas.cache = True
+                if stream:
+                    print(f"[cache semantico: similaridade {acerto['similaridade']:.3f}]")
+                    print(resposta)
+        
+        if resposta is None:
+            # Sempre gera em streaming para medir o tempo ate o primeiro token;
+            # perguntas identicas simultaneas compartilham a mesma geracao
+            with medicao.ativa():
+                tokens, metricas.coalescida = self.coalescedor.transmitir(
+                    self.coalescedor.chave(question, self.versao_base, escopo),
+                    lambda: self.tokens_resposta(agente, question, limitador),
+                )
+                for parte in tokens:
+                    medicao.token(parte)
+                    if stream:
+                        print(parte, end="", flush=True)
+                if stream:
+                    print()
+            
+            resposta = medicao.resposta
+            if self.cache_semantico and not metricas.coalescida:
+                segundos = time.perf_counter() - medicao.inicio
+                self.cache_semantico.registrar(question, resposta, segundos, escopo=escopo)
+        
+        medicao.concluir(agente)
+        self.ultimas_metricas = metricas
+        if self.log_metricas:
+            self.log_metricas.anexar(metricas)
+        
+        if return_metrics:
+            return resposta, metricas
+        if not stream:
+            return resposta
+    
+    def ask_many(
+        self,
+        perguntas: Union[str, Iterable[Union[str, Dict]]],
+        saida: str = "respostas_lote.jsonl",
+        concorrencia: int = 4,
+        geracoes_por_minuto: Optional[float] = None,
+        retomar: bool = True,
+    ) -> "RelatorioLote":
+        """
+        Responde muitas perguntas em paralelo, gravando os resultados em JSONL.
+        
+        Cada pergunta usa um agente proprio e sem storage: as perguntas sao
+        independentes e nao geram uma sessao no banco cada uma. As perguntas
+        sao vetorizadas em lote antes de comecar, para que o cache semantico
+        e a recuperacao encontrem os embeddings prontos.
+        
+        Args:
+            perguntas: Arquivo (.txt, .jsonl, .json) ou iteravel de perguntas
+            saida: JSONL de resultados; perguntas ja respondidas sao puladas
+            concorrencia: Perguntas respondidas ao mesmo tempo
+            geracoes_por_minuto: Limite de geracoes no provedor do modelo (None = sem limite)
+            retomar: Se deve pular as perguntas ja presentes em `saida`
+            
+        Returns:
+            RelatorioLote com contadores e perguntas/min
+        """
+        from embedding_lote import gerar_embeddings_em_lote
+        from lote_perguntas import executar_lote, ids_respondidos, ler_perguntas, obter_limitador
+
+        itens = list(ler_perguntas(perguntas))
+        respondidos = ids_respondidos(saida) if retomar else set()
+        textos = [item["pergunta"] for item in itens if item["id"] not in respondidos]
+        if self.cache_semantico:
+            textos += [self.cache_semantico.normalizar(texto) for texto in textos]
+        gerar_embeddings_em_lote(self.embedder, textos)
+        
+        limitador = obter_limitador(self.base_url, geracoes_por_minuto) if geracoes_por_minuto else None
+        
+        def responder(item: Dict) -> Dict:
+            agente = self.criar_agente(f"lote-{item['id']}", persistir=False)
+            resposta, metricas = self.ask(
+                item["pergunta"], stream=False, return_metrics=True, agente=agente, limitador=limitador
+            )
+            return {"resposta": resposta, **{k: v for k, v in metricas.to_dict().items() if k != "pergunta"}}
+        
+        relatorio = executar_lote(responder, itens, saida, concorrencia=concorrencia, retomar=retomar)
+        print(relatorio)
+        return relatorio
     
     def run_interactive(self):
         """Executa modo interativo."""
@@ -131,15 +431,23 @@ Seja preciso e forneca informacoes uteis.""",
             question = input("\nPergunta: ").strip()
             
             if question.lower() in ['sair', 'exit', 'quit']:
+                if self.cache_semantico:
+                    print(f"Cache semantico: {self.cache_semantico.estatisticas()}")
+                print(f"Coalescencia: {self.coalescedor.estatisticas()}")
+                if self.log_metricas:
+                    print(f"Latencia total (p50/p95): {self.log_metricas.percentis('total_ms')}")
                 break
             
             if question:
                 print("\nResposta:")
                 self.ask(question)
+                print(self.ultimas_metricas)
 
 
 # Exemplo de uso
 if __name__ == "__main__":
     rag = RagSQLITE()
-    rag.load_documents()
+    with perfil.medir("carga de documentos"):
+        rag.load_documents()
+    perfil.imprimir(tempos_carregamento())
     rag.run_interactive()
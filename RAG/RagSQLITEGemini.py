@@ -9,12 +9,15 @@ SQLite para armazenamento e agentes para respostas.
 from agno.agent import Agent
 from agno.models.openai import OpenAILike
 from agno.knowledge.pdf import PDFKnowledgeBase
-from agno.vectordb.lancedb import LanceDb
-from agno.storage.sqlite import SqliteStorage
-from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
+from agno.run.response import RunResponse
 import os
+import time
 from dotenv import load_dotenv
 
+from cache_semantico import CacheSemantico
+from ingestao_incremental import IngestorIncremental
+from registro_componentes import obter_embedder_com_cache, obter_storage, obter_vector_db
+
 load_dotenv(override=True)
 
 
@@ -35,19 +38,13 @@ class RagSQLITEGemini:
             id="sabia-3",
             name="Maritaca Sabia 3",
             api_key=self.api_key,
-            base_url="https://chat.maritaca.ai/api",
+            base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
             temperature=0,
         )
         
-        # Configurar embedder
-        self.embedder = SentenceTransformerEmbedder()
-        
-        # Configurar vector database
-        self.vector_db = LanceDb(
-            table_name="recipes",
-            uri="lancedb",
-            embedder=self.embedder,
-        )
+        # Configurar embedder (com cache em disco) e vector database compartilhados
+        self.embedder = obter_embedder_com_cache()
+        self.vector_db = obter_vector_db(table_name="recipes", uri="lancedb")
         
         # Configurar knowledge base
         self.knowledge_base = PDFKnowledgeBase(
@@ -56,9 +53,13 @@ class RagSQLITEGemini:
         )
         
         # Configurar storage
-        self.storage = SqliteStorage(
-            table_name="agno_sessions",
+        self.storage = obter_storage(db_file=self.db_file, table_name="agno_sessions")
+        
+        # Cache semantico de respostas (invalidado quando a base muda)
+        self.cache_semantico = CacheSemantico(
+            self.embedder,
             db_file=self.db_file,
+            versao_base=IngestorIncremental(self.knowledge_base).versao(),
         )
         
         # Criar agente
@@ -74,10 +75,17 @@ Use o conhecimento disponivel para responder as perguntas.
 Seja preciso e cite as fontes quando possivel.""",
         )
     
-    def carregar_documentos(self):
-        """Carrega documentos do PDF."""
+    def carregar_documentos(self, incremental: bool = True, workers: int = 4):
+        """Carrega documentos do PDF (apenas novos ou alterados por padrao)."""
         print("Carregando documentos...")
-        self.knowledge_base.load()
+        if incremental:
+            ingestor = IngestorIncremental(self.knowledge_base, workers=workers)
+            relatorio = ingestor.sincronizar()
+            print(relatorio)
+            self.cache_semantico.definir_versao(ingestor.versao())
+        else:
+            self.knowledge_base.load()
+            self.cache_semantico.definir_versao(f"carga-completa-{time.time()}")
         print("Documentos carregados com sucesso!")
     
     def perguntar(self, pergunta: str, stream: bool = True):
@@ -85,11 +93,29 @@ Seja preciso e cite as fontes quando possivel.""",
         print(f"\nPergunta: {pergunta}\n")
         print("=" * 60)
         
+        acerto = self.cache_semantico.buscar(pergunta, escopo=self.agente.session_id)
+        if acerto:
+            print(f"[cache semantico: similaridade {acerto['similaridade']:.3f}]")
+            print(f"Resposta: {acerto['resposta']}")
+            return None if stream else RunResponse(content=acerto["resposta"])
+        
+        inicio = time.perf_counter()
         if stream:
-            self.agente.print_response(pergunta, stream=True)
+            partes = []
+            for chunk in self.agente.run(pergunta, stream=True):
+                if isinstance(chunk.content, str):
+                    print(chunk.content, end="", flush=True)
+                    partes.append(chunk.content)
+            print()
+            self.cache_semantico.registrar(
+                pergunta, "".join(partes), time.perf_counter() - inicio, escopo=self.agente.session_id
+            )
         else:
             response = self.agente.run(pergunta)
             print(f"Resposta: {response.content}")
+            self.cache_semantico.registrar(
+                pergunta, response.content, time.perf_counter() - inicio, escopo=self.agente.session_id
+            )
             return response
     
     def menu_interativo(self):
@@ -108,6 +134,7 @@ Seja preciso e cite as fontes quando possivel.""",
             opcao = input("\nEscolha: ").strip()
             
             if opcao == "0":
+                print(f"Cache semantico: {self.cache_semantico.estatisticas()}")
                 print("Saindo...")
                 break
             elif opcao == "1":
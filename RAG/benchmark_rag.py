@@ -0,0 +1,176 @@
+"""
+BenchmarkRAG - Benchmark de recuperacao do RAG
+==============================================
+
+Mede a qualidade e o custo da recuperacao sobre o corpus de `file/`:
+recall@k, MRR, latencias p50/p95/p99 por consulta (busca vetorial e
+hibrida), vazao de ingestao e tamanho do indice em disco. O conjunto de
+consultas rotuladas e gerado a partir dos proprios chunks (uma frase de
+cada chunk sorteado, cujo rotulo e o id do chunk) ou carregado de um
+arquivo JSON. Cada execucao e anexada a um arquivo JSONL para comparar
+mudancas de indice, chunking ou embedder ao longo do tempo.
+
+Uso (na raiz do projeto):
+    python RAG/benchmark_rag.py --consultas 200 --saida benchmarks/resultados.jsonl
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from busca_hibrida import RecuperadorHibrido
+from embedding_lote import gerar_embeddings_em_lote
+from indice_vetorial import GerenciadorIndiceVetorial
+from ingestao_paralela import PipelineIngestao
+from registro_componentes import obter_vector_db
+from utilitarios_benchmark import gerar_consultas, percentil, tamanho_diretorio
+
+
+def avaliar(buscar, consultas: List[Dict], ks: Sequence[int] = (1, 5, 10)) -> Dict:
+    """
+    Executa as consultas e calcula recall@k, MRR e latencias.
+
+    Args:
+        buscar: Funcao (consulta, limite) -> lista de documentos com "id"
+        consultas: Consultas rotuladas
+        ks: Valores de k para o recall
+    """
+    limite = max(ks)
+    acertos = {k: 0 for k in ks}
+    reciprocos = 0.0
+    latencias = []
+
+    for item in consultas:
+        inicio = time.perf_counter()
+        documentos = buscar(item["consulta"], limite)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+        relevantes = set(item["ids_relevantes"])
+        posicao = next((i for i, doc in enumerate(documentos, 1) if doc["id"] in relevantes), None)
+        if posicao:
+            reciprocos += 1.0 / posicao
+            for k in ks:
+                if posicao <= k:
+                    acertos[k] += 1
+
+    total = len(consultas) or 1
+    resultado = {f"recall@{k}": acertos[k] / total for k in ks}
+    resultado.update({
+        "mrr": reciprocos / total,
+        "latencia_p50_ms": percentil(latencias, 50),
+        "latencia_p95_ms": percentil(latencias, 95),
+        "latencia_p99_ms": percentil(latencias, 99),
+    })
+    return resultado
+
+
+def medir_ingestao(pasta_pdfs: str, workers: int = 4) -> Dict:
+    """Ingere o corpus em uma tabela temporaria, sem cache de embeddings."""
+    from agno.knowledge.pdf import PDFKnowledgeBase
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        vector_db = obter_vector_db(table_name="benchmark_ingestao", uri=diretorio, cache=False)
+        vector_db.create()
+        knowledge_base = PDFKnowledgeBase(path=pasta_pdfs, vector_db=vector_db)
+        pipeline = PipelineIngestao(knowledge_base.reader, vector_db, workers=workers)
+        pdfs = sorted(Path(pasta_pdfs).glob("**/*.pdf"))
+        for _ in pipeline.executar(pdfs):
+            pass
+        relatorio = pipeline.relatorio
+        return {
+            "arquivos": relatorio.arquivos,
+            "chunks": relatorio.chunks,
+            "segundos": relatorio.segundos,
+            "chunks_por_segundo": relatorio.chunks_por_segundo,
+        }
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def executar_benchmark(
+    uri: str = "lancedb",
+    tabela: str = "recipes",
+    pasta_pdfs: str = "file",
+    arquivo_consultas: Optional[str] = None,
+    quantidade: int = 200,
+    nprobes: int = 20,
+    medir_carga: bool = True,
+) -> Dict:
+    """Executa o benchmark completo e retorna o resultado."""
+    vector_db = obter_vector_db(table_name=tabela, uri=uri)
+
+    if arquivo_consultas and os.path.exists(arquivo_consultas):
+        with open(arquivo_consultas, "r", encoding="utf-8") as f:
+            consultas = json.load(f)
+    else:
+        consultas = gerar_consultas(vector_db, quantidade)
+        if arquivo_consultas:
+            Path(arquivo_consultas).parent.mkdir(parents=True, exist_ok=True)
+            with open(arquivo_consultas, "w", encoding="utf-8") as f:
+                json.dump(consultas, f, indent=2, ensure_ascii=False)
+
+    # Vetoriza todas as consultas em lote; as buscas encontram os vetores no cache
+    inicio = time.perf_counter()
+    gerar_embeddings_em_lote(vector_db.embedder, [item["consulta"] for item in consultas])
+    embedding_consultas_s = time.perf_counter() - inicio
+
+    indice = GerenciadorIndiceVetorial(vector_db, nprobes=nprobes)
+    recuperador = RecuperadorHibrido(indice)
+
+    resultado = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit_atual(),
+        "tabela": tabela,
+        "consultas": len(consultas),
+        "indice": indice.estatisticas(),
+        "tamanho_tabela_bytes": tamanho_diretorio(os.path.join(uri, f"{tabela}.lance")),
+        "embedding_consultas_s": embedding_consultas_s,
+        "vetorial": avaliar(indice.buscar, consultas),
+        "hibrida": avaliar(recuperador.buscar, consultas),
+    }
+    if medir_carga:
+        resultado["ingestao"] = medir_ingestao(pasta_pdfs)
+    return resultado
+
+
+def main():
+    """Executa o benchmark pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmark de recuperacao do RAG")
+    parser.add_argument("--uri", default="lancedb")
+    parser.add_argument("--tabela", default="recipes")
+    parser.add_argument("--pdfs", default="file")
+    parser.add_argument("--consultas", type=int, default=200, help="Consultas geradas se nao houver arquivo")
+    parser.add_argument("--arquivo-consultas", default="benchmarks/consultas.json")
+    parser.add_argument("--nprobes", type=int, default=20)
+    parser.add_argument("--sem-ingestao", action="store_true", help="Nao mede a vazao de ingestao")
+    parser.add_argument("--saida", default="benchmarks/resultados.jsonl")
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(
+        uri=args.uri,
+        tabela=args.tabela,
+        pasta_pdfs=args.pdfs,
+        arquivo_consultas=args.arquivo_consultas,
+        quantidade=args.consultas,
+        nprobes=args.nprobes,
+        medir_carga=not args.sem_ingestao,
+    )
+
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.saida, "a", encoding="utf-8") as f:
+        f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
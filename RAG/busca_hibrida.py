@@ -0,0 +1,148 @@
+"""
+BuscaHibrida - Recuperacao hibrida BM25 + vetorial
+==================================================
+
+Executa em paralelo a busca textual (BM25 sobre o indice FTS ja existente
+na tabela do LanceDB) e a busca vetorial, e combina as duas listas com
+reciprocal rank fusion (RRF). Termos exatos como numeros de contrato e
+nomes passam a ser encontrados mesmo quando a similaridade semantica e
+baixa.
+
+Sem indice FTS (tabela recem-criada ou indice removido) a busca degrada
+para apenas vetorial, com um aviso. A ingestao reconstroi o indice a cada
+carga (ingestao_paralela.atualizar_indice_textual).
+"""
+
+import json
+import re
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from indice_vetorial import GerenciadorIndiceVetorial
+from metricas_resposta import metricas_atuais
+
+
+# Caracteres com significado especial na sintaxe de consulta do tantivy
+_CARACTERES_ESPECIAIS = re.compile(r'[+\-&|!(){}\[\]^"~*?:\\/]')
+
+
+class RecuperadorHibrido:
+    """Combina busca textual e vetorial com reciprocal rank fusion."""
+
+    def __init__(
+        self,
+        indice: GerenciadorIndiceVetorial,
+        k_textual: int = 20,
+        k_vetorial: int = 20,
+        k_rrf: int = 60,
+    ):
+        """
+        Inicializa o recuperador.
+
+        Args:
+            indice: Gerenciador do indice vetorial (define nprobes/refine)
+            k_textual: Candidatos buscados pelo BM25
+            k_vetorial: Candidatos buscados pela similaridade vetorial
+            k_rrf: Constante de suavizacao do RRF
+        """
+        self.indice = indice
+        self.k_textual = k_textual
+        self.k_vetorial = k_vetorial
+        self.k_rrf = k_rrf
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="busca_hibrida")
+
+    def buscar_textual(self, query: str, limite: int, incluir_vetor: bool = False) -> List[Dict]:
+        """Busca BM25 no indice FTS da coluna payload (vazia se o indice nao existir)."""
+        termos = _CARACTERES_ESPECIAIS.sub(" ", query).strip()
+        if not termos or self.indice.tabela is None:
+            return []
+
+        documentos = []
+        try:
+            linhas = self.indice.tabela.search(termos, query_type="fts").limit(limite).to_list()
+        except Exception as exc:
+            # Sem indice FTS o LanceDB levanta ValueError/RuntimeError conforme a versao
+            warnings.warn(f"Busca textual indisponivel, usando apenas a vetorial: {exc}", RuntimeWarning)
+            return []
+        for linha in linhas:
+            payload = json.loads(linha["payload"])
+            documento = {
+                "id": linha["id"],
+                "name": payload.get("name"),
+                "meta_data": payload.get("meta_data", {}),
+                "content": payload.get("content", ""),
+                "score_bm25": linha.get("_score"),
+            }
+            if incluir_vetor:
+                documento["vetor"] = linha[self.indice.coluna]
+            documentos.append(documento)
+        return documentos
+
+    def _cronometrar(self, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        return resultado, (time.perf_counter() - inicio) * 1000
+
+    def buscar(
+        self,
+        query: str,
+        limite: int = 5,
+        incluir_vetor: bool = False,
+        latencia: Optional[Dict[str, float]] = None,
+    ) -> List[Dict]:
+        """
+        Executa as duas buscas em paralelo e funde os rankings.
+
+        Args:
+            latencia: Se informado, recebe os tempos (ms) de cada etapa desta chamada
+
+        Returns:
+            Documentos ordenados pelo score RRF
+        """
+        inicio = time.perf_counter()
+        futuro_textual = self._executor.submit(
+            self._cronometrar, self.buscar_textual, query, self.k_textual, incluir_vetor
+        )
+        futuro_vetorial = self._executor.submit(
+            self._cronometrar, self.indice.buscar, query, self.k_vetorial, incluir_vetor
+        )
+        textuais, ms_textual = futuro_textual.result()
+        vetoriais, ms_vetorial = futuro_vetorial.result()
+
+        inicio_fusao = time.perf_counter()
+        documentos = self.fundir([textuais, vetoriais])[:limite]
+        fim = time.perf_counter()
+
+        if latencia is not None:
+            latencia.update(
+                textual_ms=ms_textual,
+                vetorial_ms=ms_vetorial,
+                fusao_ms=(fim - inicio_fusao) * 1000,
+                total_ms=(fim - inicio) * 1000,
+            )
+        return documentos
+
+    def fundir(self, rankings: List[List[Dict]]) -> List[Dict]:
+        """Reciprocal rank fusion: score = soma de 1 / (k + posicao)."""
+        scores: Dict[str, float] = {}
+        documentos: Dict[str, Dict] = {}
+        for ranking in rankings:
+            for posicao, documento in enumerate(ranking, 1):
+                scores[documento["id"]] = scores.get(documento["id"], 0.0) + 1.0 / (self.k_rrf + posicao)
+                documentos.setdefault(documento["id"], documento)
+
+        ordenados = sorted(scores, key=scores.get, reverse=True)
+        return [dict(documentos[doc_id], score_rrf=scores[doc_id]) for doc_id in ordenados]
+
+    def retriever(self, agent=None, query: str = "", num_documents: Optional[int] = None, **kwargs) -> List[Dict]:
+        """
+        Retriever compativel com o parametro `retriever` do Agent do agno.
+
+        Os tempos de cada etapa vao para as metricas da pergunta em andamento
+        (metricas_atuais), quando houver.
+        """
+        metricas = metricas_atuais.get()
+        latencia = metricas.latencia_busca if metricas is not None else None
+        return self.buscar(query, limite=num_documents or 5, latencia=latencia)
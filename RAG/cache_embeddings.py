@@ -0,0 +1,219 @@
+"""
+CacheEmbeddings - Cache persistente de embeddings
+=================================================
+
+Embedder que envolve outro embedder (ex.: SentenceTransformerEmbedder) e
+guarda os vetores em SQLite como blobs float32, indexados por
+(modelo, sha256 do texto). Textos repetidos custam uma consulta ao banco
+em vez de uma passada pelo modelo.
+
+Os horarios de acesso usados na remocao LRU ficam em memoria e sao
+gravados em lote (a cada `intervalo_acessos` acertos, antes de remover
+entradas e ao fechar), para que um acerto nao custe uma escrita e um
+commit no banco.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from agno.embedder.base import Embedder
+
+from embedding_lote import gerar_embeddings_em_lote
+
+
+@dataclass
+class EmbedderComCache(Embedder):
+    """Embedder com cache em disco e remocao por tamanho (LRU)."""
+
+    embedder: Optional[Embedder] = None
+    db_file: str = "cache_embeddings.db"
+    tamanho_maximo_bytes: int = 512 * 1024 * 1024
+    intervalo_acessos: int = 256
+    acertos: int = field(default=0, init=False)
+    falhas: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("EmbedderComCache precisa de um embedder")
+        self.dimensions = self.embedder.dimensions
+        self.modelo = getattr(self.embedder, "id", type(self.embedder).__name__)
+        self._trava = threading.Lock()
+        # Horarios de acesso ainda nao gravados: sha256 -> acessado_em
+        self._acessos: Dict[str, float] = {}
+        self._conexao = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                modelo TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                vetor BLOB NOT NULL,
+                acessado_em REAL NOT NULL,
+                PRIMARY KEY (modelo, sha256)
+            )
+            """
+        )
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_acessado_em ON embeddings (acessado_em)"
+        )
+        self._conexao.commit()
+        self._bytes_total = self._conexao.execute(
+            "SELECT COALESCE(SUM(LENGTH(vetor)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _hash(texto: str) -> str:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _registrar_acessos(self, hashes: List[str], agora: float):
+        """Anota os acessos em memoria e grava o lote quando acumula o intervalo (com a trava)."""
+        for sha256 in hashes:
+            self._acessos[sha256] = agora
+        if len(self._acessos) >= self.intervalo_acessos:
+            self._gravar_acessos()
+            self._conexao.commit()
+
+    def _gravar_acessos(self):
+        """Grava os horarios de acesso pendentes, sem commit (com a trava)."""
+        if not self._acessos:
+            return
+        self._conexao.executemany(
+            "UPDATE embeddings SET acessado_em = ? WHERE modelo = ? AND sha256 = ?",
+            [(acessado_em, self.modelo, sha256) for sha256, acessado_em in self._acessos.items()],
+        )
+        self._acessos.clear()
+
+    def _buscar(self, sha256: str) -> Optional[List[float]]:
+        """Retorna o vetor em cache, contando o acerto ou a falha."""
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT vetor FROM embeddings WHERE modelo = ? AND sha256 = ?",
+                (self.modelo, sha256),
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+            self._registrar_acessos([sha256], time.time())
+        vetor = array("f")
+        vetor.frombytes(linha[0])
+        return vetor.tolist()
+
+    def _gravar(self, sha256: str, embedding: List[float]):
+        """Grava um vetor no cache."""
+        self._gravar_varios([(sha256, embedding)])
+
+    def _gravar_varios(self, itens: List[Tuple[str, List[float]]]):
+        """Grava vetores no cache e remove os mais antigos se exceder o limite."""
+        agora = time.time()
+        with self._trava:
+            for sha256, embedding in itens:
+                blob = array("f", embedding).tobytes()
+                anterior = self._conexao.execute(
+                    "SELECT LENGTH(vetor) FROM embeddings WHERE modelo = ? AND sha256 = ?",
+                    (self.modelo, sha256),
+                ).fetchone()
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO embeddings (modelo, sha256, vetor, acessado_em) VALUES (?, ?, ?, ?)",
+                    (self.modelo, sha256, blob, agora),
+                )
+                self._bytes_total += len(blob) - (anterior[0] if anterior else 0)
+            if self._bytes_total > self.tamanho_maximo_bytes:
+                self._remover_antigos()
+            self._conexao.commit()
+
+    def _remover_antigos(self):
+        """Remove entradas menos usadas ate ocupar 90% do limite."""
+        alvo = int(self.tamanho_maximo_bytes * 0.9)
+        # A ordem LRU precisa dos acessos ainda em memoria
+        self._gravar_acessos()
+        cursor = self._conexao.execute(
+            "SELECT rowid, LENGTH(vetor) FROM embeddings ORDER BY acessado_em ASC"
+        )
+        removidos = []
+        for rowid, tamanho in cursor:
+            if self._bytes_total <= alvo:
+                break
+            removidos.append((rowid,))
+            self._bytes_total -= tamanho
+        self._conexao.executemany("DELETE FROM embeddings WHERE rowid = ?", removidos)
+
+    def get_embedding(self, text: str) -> List[float]:
+        sha256 = self._hash(text)
+        embedding = self._buscar(sha256)
+        if embedding is not None:
+            return embedding
+
+        embedding = [float(valor) for valor in self.embedder.get_embedding(text)]
+        self._gravar(sha256, embedding)
+        return embedding
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+
+    def get_embeddings(self, textos: List[str], tamanho_lote: int = 32) -> List[List[float]]:
+        """Vetoriza varios textos, enviando ao modelo apenas os ausentes do cache."""
+        hashes = [self._hash(texto) for texto in textos]
+        encontrados = self._buscar_varios(set(hashes))
+        acertos = sum(1 for sha256 in hashes if sha256 in encontrados)
+        with self._trava:
+            self.acertos += acertos
+            self.falhas += len(hashes) - acertos
+
+        # Textos repetidos na propria lista sao vetorizados uma unica vez
+        pendentes: Dict[str, str] = {}
+        for sha256, texto in zip(hashes, textos):
+            if sha256 not in encontrados:
+                pendentes.setdefault(sha256, texto)
+
+        if pendentes:
+            novos = gerar_embeddings_em_lote(self.embedder, list(pendentes.values()), tamanho_lote)
+            self._gravar_varios(list(zip(pendentes, novos)))
+            encontrados.update(zip(pendentes, novos))
+        return [encontrados[sha256] for sha256 in hashes]
+
+    def _buscar_varios(self, hashes: set, tamanho_lote: int = 500) -> Dict[str, List[float]]:
+        """Busca varios vetores no cache de uma vez."""
+        encontrados: Dict[str, List[float]] = {}
+        lista = list(hashes)
+        agora = time.time()
+        with self._trava:
+            for inicio in range(0, len(lista), tamanho_lote):
+                lote = lista[inicio:inicio + tamanho_lote]
+                marcadores = ", ".join("?" for _ in lote)
+                linhas = self._conexao.execute(
+                    f"SELECT sha256, vetor FROM embeddings WHERE modelo = ? AND sha256 IN ({marcadores})",
+                    (self.modelo, *lote),
+                ).fetchall()
+                for sha256, blob in linhas:
+                    vetor = array("f")
+                    vetor.frombytes(blob)
+                    encontrados[sha256] = vetor.tolist()
+                self._registrar_acessos([sha256 for sha256, _ in linhas], agora)
+        return encontrados
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Retorna acertos, falhas, taxa de acerto e ocupacao do cache."""
+        with self._trava:
+            entradas = self._conexao.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            acertos, falhas = self.acertos, self.falhas
+        total = acertos + falhas
+        return {
+            "acertos": acertos,
+            "falhas": falhas,
+            "taxa_acerto": acertos / total if total else 0.0,
+            "entradas": entradas,
+            "bytes": self._bytes_total,
+        }
+
+    def fechar(self):
+        """Grava os acessos pendentes e fecha a conexao com o banco do cache."""
+        with self._trava:
+            self._gravar_acessos()
+            self._conexao.commit()
+            self._conexao.close()
@@ -0,0 +1,201 @@
+"""
+CacheSemantico - Cache de respostas por similaridade de perguntas
+=================================================================
+
+Guarda as respostas ja geradas junto com o embedding da pergunta. Uma
+nova pergunta cuja similaridade de cosseno com alguma pergunta anterior
+supere o limiar recebe a resposta guardada na hora, sem nova chamada ao
+LLM. As entradas sao vinculadas a versao da base de conhecimento e ao
+modelo/dimensao do embedder, e descartadas quando qualquer um deles muda.
+
+Cada entrada tem um escopo: o id da sessao que a gerou, ou nenhum
+(global) para perguntas avulsas, sem historico. Uma sessao so reaproveita
+as proprias respostas, que ja estao no seu historico, e as perguntas
+avulsas so reaproveitam entradas globais; assim um acerto nunca traz uma
+resposta que dependia do contexto de outra conversa. Alem da
+similaridade, numeros e identificadores (ex.: "contrato 123", "NF-e")
+precisam coincidir, pois embeddings mal distinguem "123" de "124".
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+
+# Numeros, siglas e tokens que misturam letras e digitos
+_MARCADOR = re.compile(r"\d+(?:[.,/-]\d+)+|\b\w*\d\w*\b|\b[A-Z]{2,}[\w-]*")
+
+
+def marcadores(pergunta: str) -> FrozenSet[str]:
+    """Numeros e identificadores da pergunta, que precisam coincidir num acerto."""
+    return frozenset(token.lower() for token in _MARCADOR.findall(pergunta))
+
+
+def identificar_embedder(embedder) -> str:
+    """Modelo e dimensao do embedder; vetores de outro embedder nao sao comparaveis."""
+    modelo = getattr(embedder, "modelo", None) or getattr(embedder, "id", None) or type(embedder).__name__
+    return f"{modelo}:{getattr(embedder, 'dimensions', None)}"
+
+
+class CacheSemantico:
+    """Cache de respostas indexado pelo embedding da pergunta."""
+
+    def __init__(
+        self,
+        embedder,
+        db_file: str = "data.db",
+        limiar: float = 0.95,
+        versao_base: str = "",
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            embedder: Embedder usado para vetorizar as perguntas
+            db_file: Arquivo SQLite onde as entradas sao persistidas
+            limiar: Similaridade minima de cosseno para considerar acerto
+            versao_base: Versao atual da base de conhecimento
+        """
+        self.embedder = embedder
+        self.embedder_id = identificar_embedder(embedder)
+        self.db_file = db_file
+        self.limiar = limiar
+        self.acertos = 0
+        self.falhas = 0
+        self.segundos_economizados = 0.0
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(db_file, check_same_thread=False)
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_semantico (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pergunta TEXT NOT NULL,
+                vetor BLOB NOT NULL,
+                resposta TEXT NOT NULL,
+                versao_base TEXT NOT NULL,
+                segundos_geracao REAL NOT NULL,
+                criado_em REAL NOT NULL,
+                escopo TEXT
+            )
+            """
+        )
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(cache_semantico)")}
+        if "escopo" not in colunas:
+            # Entradas antigas nao tem sessao conhecida; descarta-las evita acertos globais indevidos
+            self._conexao.execute("DELETE FROM cache_semantico")
+            self._conexao.execute("ALTER TABLE cache_semantico ADD COLUMN escopo TEXT")
+        self._conexao.commit()
+        self._ids: List[int] = []
+        self._escopos: List[Optional[str]] = []
+        self._marcadores: List[FrozenSet[str]] = []
+        # Capacidade dobra conforme cresce; so as primeiras len(self._ids) linhas sao validas
+        self._matriz = np.zeros((0, 0), dtype=np.float32)
+        self.definir_versao(versao_base)
+
+    @staticmethod
+    def normalizar(pergunta: str) -> str:
+        """Normaliza espacos e caixa da pergunta."""
+        return " ".join(pergunta.lower().split())
+
+    def _vetorizar(self, pergunta: str) -> np.ndarray:
+        vetor = np.asarray(self.embedder.get_embedding(self.normalizar(pergunta)), dtype=np.float32)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+    def definir_versao(self, versao_base: str):
+        """Troca a versao da base, descartando entradas de versoes ou embedders anteriores."""
+        with self._trava:
+            self.versao_base = versao_base
+            self._versao = f"{versao_base}|{self.embedder_id}"
+            self._conexao.execute("DELETE FROM cache_semantico WHERE versao_base != ?", (self._versao,))
+            self._conexao.commit()
+
+            linhas = self._conexao.execute(
+                "SELECT id, vetor, escopo, pergunta FROM cache_semantico ORDER BY id"
+            ).fetchall()
+            self._ids = [linha[0] for linha in linhas]
+            self._escopos = [linha[2] for linha in linhas]
+            self._marcadores = [marcadores(linha[3]) for linha in linhas]
+            vetores = []
+            for _, blob, _, _ in linhas:
+                vetor = array("f")
+                vetor.frombytes(blob)
+                vetores.append(vetor)
+            self._matriz = np.array(vetores, dtype=np.float32) if vetores else np.zeros((0, 0), dtype=np.float32)
+
+    def buscar(self, pergunta: str, escopo: Optional[str] = None) -> Optional[Dict]:
+        """
+        Procura uma pergunta anterior semelhante no mesmo escopo.
+
+        Args:
+            pergunta: Pergunta feita
+            escopo: Id da sessao (None = pergunta avulsa, apenas entradas globais)
+
+        Returns:
+            {pergunta, resposta, similaridade} no acerto, None na falha
+        """
+        inicio = time.perf_counter()
+        vetor = self._vetorizar(pergunta)
+        marcadores_pergunta = marcadores(pergunta)
+
+        with self._trava:
+            melhor = None
+            if self._ids:
+                similaridades = self._matriz[: len(self._ids)] @ vetor
+                for indice in np.flatnonzero(similaridades >= self.limiar):
+                    if self._escopos[indice] != escopo or self._marcadores[indice] != marcadores_pergunta:
+                        continue
+                    if melhor is None or similaridades[indice] > similaridades[melhor]:
+                        melhor = int(indice)
+            if melhor is None:
+                self.falhas += 1
+                return None
+            similaridade = float(similaridades[melhor])
+            linha = self._conexao.execute(
+                "SELECT pergunta, resposta, segundos_geracao FROM cache_semantico WHERE id = ?",
+                (self._ids[melhor],),
+            ).fetchone()
+            self.acertos += 1
+            self.segundos_economizados += max(0.0, linha[2] - (time.perf_counter() - inicio))
+
+        return {"pergunta": linha[0], "resposta": linha[1], "similaridade": similaridade}
+
+    def registrar(self, pergunta: str, resposta: str, segundos_geracao: float, escopo: Optional[str] = None):
+        """Guarda uma resposta gerada pelo LLM no escopo (sessao) em que foi gerada."""
+        if not resposta:
+            return
+        vetor = self._vetorizar(pergunta)
+        with self._trava:
+            cursor = self._conexao.execute(
+                """
+                INSERT INTO cache_semantico (pergunta, vetor, resposta, versao_base, segundos_geracao, criado_em, escopo)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (pergunta, vetor.tobytes(), resposta, self._versao, segundos_geracao, time.time(), escopo),
+            )
+            self._conexao.commit()
+            total = len(self._ids)
+            if total == len(self._matriz):
+                capacidade = np.zeros((max(16, 2 * total), len(vetor)), dtype=np.float32)
+                capacidade[:total] = self._matriz
+                self._matriz = capacidade
+            self._matriz[total] = vetor
+            self._ids.append(cursor.lastrowid)
+            self._escopos.append(escopo)
+            self._marcadores.append(marcadores(pergunta))
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Retorna acertos, falhas, taxa de acerto e tempo economizado."""
+        total = self.acertos + self.falhas
+        return {
+            "entradas": len(self._ids),
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+            "segundos_economizados": self.segundos_economizados,
+        }
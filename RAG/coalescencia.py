@@ -0,0 +1,244 @@
+"""
+Coalescencia - Uma unica geracao para perguntas identicas simultaneas
+=====================================================================
+
+Single-flight: quando varias requisicoes fazem a mesma pergunta
+(normalizada) sobre a mesma versao da base, no mesmo escopo, ao mesmo
+tempo, apenas a primeira executa a recuperacao e a geracao. As demais se inscrevem no
+mesmo voo e recebem os tokens ja produzidos seguidos dos proximos, a
+medida que chegam. A geracao roda em uma thread propria, de modo que
+um consumidor que desista no meio nao trava os outros.
+
+As perguntas coalescidas nao passam pelo agente, entao so a sessao do
+lider registra a rodada. Por isso o escopo faz parte da chave: agentes
+com historico usam o id da propria sessao (so coalescem com pedidos
+repetidos da mesma sessao) e apenas chamadas sem historico (sem storage,
+ou avulsas no servidor) usam o escopo global e coalescem entre si.
+
+CoalescedorAssincrono faz o mesmo dentro de um event loop (servidor
+HTTP): um unico produtor assincrono (agente.arun) roda como tarefa e
+repassa cada token para a fila asyncio de cada consumidor, sem threads.
+"""
+
+import asyncio
+import contextvars
+import threading
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# (versao da base, escopo, pergunta normalizada)
+Chave = Tuple[str, Optional[str], str]
+
+
+class Voo:
+    """Geracao em andamento compartilhada por varios consumidores."""
+
+    def __init__(self):
+        self.partes: List[str] = []
+        self.terminado = False
+        self.erro: Optional[BaseException] = None
+        self._condicao = threading.Condition()
+
+    def publicar(self, parte: str):
+        with self._condicao:
+            self.partes.append(parte)
+            self._condicao.notify_all()
+
+    def concluir(self, erro: Optional[BaseException] = None):
+        with self._condicao:
+            self.terminado = True
+            self.erro = erro
+            self._condicao.notify_all()
+
+    def assinar(self) -> Iterator[str]:
+        """Produz todas as partes desde o inicio e aguarda as seguintes."""
+        posicao = 0
+        while True:
+            with self._condicao:
+                while posicao >= len(self.partes) and not self.terminado:
+                    self._condicao.wait()
+                novas = self.partes[posicao:]
+                terminado, erro = self.terminado, self.erro
+            for parte in novas:
+                yield parte
+            posicao += len(novas)
+            if terminado and posicao >= len(self.partes):
+                if erro is not None:
+                    raise erro
+                return
+
+
+class CoalescedorRequisicoes:
+    """Agrupa geracoes identicas simultaneas em um unico voo."""
+
+    def __init__(self):
+        self._voos: Dict[Chave, Voo] = {}
+        self._trava = threading.Lock()
+        self.lideres = 0
+        self.coalescidas = 0
+
+    @staticmethod
+    def normalizar(pergunta: str) -> str:
+        """Normaliza espacos e caixa da pergunta."""
+        return " ".join(pergunta.lower().split())
+
+    def chave(self, pergunta: str, versao_base: str, escopo: Optional[str] = None) -> Chave:
+        """
+        Chave do voo.
+
+        Args:
+            escopo: Sessao com historico que registra a rodada (None = chamada sem historico)
+        """
+        return versao_base, escopo, self.normalizar(pergunta)
+
+    def transmitir(self, chave: Chave, gerar: Callable[[], Iterable[str]]) -> Tuple[Iterator[str], bool]:
+        """
+        Retorna os tokens da geracao da chave, iniciando-a se necessario.
+
+        Args:
+            chave: (versao da base, escopo, pergunta normalizada)
+            gerar: Funcao que executa recuperacao + geracao produzindo tokens
+
+        Returns:
+            (iterador de tokens, True se a requisicao foi coalescida)
+        """
+        with self._trava:
+            voo = self._voos.get(chave)
+            if voo is not None:
+                self.coalescidas += 1
+                return voo.assinar(), True
+            voo = Voo()
+            self._voos[chave] = voo
+            self.lideres += 1
+
+        # A thread herda o contexto do lider (ex.: metricas da pergunta)
+        contexto = contextvars.copy_context()
+        threading.Thread(
+            target=contexto.run,
+            args=(self._executar, chave, voo, gerar),
+            name="coalescencia",
+            daemon=True,
+        ).start()
+        return voo.assinar(), False
+
+    def _executar(self, chave: Chave, voo: Voo, gerar: Callable[[], Iterable[str]]):
+        erro = None
+        try:
+            for parte in gerar():
+                voo.publicar(parte)
+        except Exception as exc:
+            erro = exc
+        except BaseException:
+            erro = RuntimeError("Geracao compartilhada interrompida")
+            raise
+        finally:
+            # Sai do mapa antes de concluir: quem chegar depois inicia um novo voo
+            with self._trava:
+                self._voos.pop(chave, None)
+            voo.concluir(erro)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Voos em andamento, geracoes executadas e requisicoes coalescidas."""
+        with self._trava:
+            return {
+                "em_andamento": len(self._voos),
+                "geracoes": self.lideres,
+                "coalescidas": self.coalescidas,
+            }
+
+
+_FIM = object()
+
+
+class VooAssincrono:
+    """Geracao assincrona em andamento; cada consumidor tem a propria fila."""
+
+    def __init__(self):
+        self.partes: List[str] = []
+        self.terminado = False
+        self.erro: Optional[BaseException] = None
+        self._filas: List[asyncio.Queue] = []
+
+    def publicar(self, parte: str):
+        self.partes.append(parte)
+        for fila in self._filas:
+            fila.put_nowait(parte)
+
+    def concluir(self, erro: Optional[BaseException] = None):
+        self.terminado = True
+        self.erro = erro
+        for fila in self._filas:
+            fila.put_nowait(_FIM)
+
+    async def assinar(self) -> AsyncIterator[str]:
+        """Produz todas as partes desde o inicio e aguarda as seguintes."""
+        fila: asyncio.Queue = asyncio.Queue()
+        for parte in self.partes:
+            fila.put_nowait(parte)
+        if self.terminado:
+            fila.put_nowait(_FIM)
+        self._filas.append(fila)
+        try:
+            while True:
+                parte = await fila.get()
+                if parte is _FIM:
+                    if self.erro is not None:
+                        raise self.erro
+                    return
+                yield parte
+        finally:
+            self._filas.remove(fila)
+
+
+class CoalescedorAssincrono(CoalescedorRequisicoes):
+    """Coalescedor para um event loop: o produtor e uma tarefa asyncio."""
+
+    def __init__(self):
+        super().__init__()
+        self._tarefas: Set[asyncio.Task] = set()
+
+    def transmitir(
+        self, chave: Chave, gerar: Callable[[], AsyncIterable[str]]
+    ) -> Tuple[AsyncIterator[str], bool]:
+        """
+        Retorna os tokens da geracao da chave, iniciando-a se necessario.
+
+        Deve ser chamado dentro do event loop.
+
+        Args:
+            chave: (versao da base, escopo, pergunta normalizada)
+            gerar: Funcao que retorna o iteravel assincrono de tokens
+
+        Returns:
+            (iterador assincrono de tokens, True se a requisicao foi coalescida)
+        """
+        voo = self._voos.get(chave)
+        if voo is not None:
+            self.coalescidas += 1
+            return voo.assinar(), True
+        voo = VooAssincrono()
+        self._voos[chave] = voo
+        self.lideres += 1
+
+        # A tarefa herda o contexto do lider e segue mesmo se ele desconectar
+        tarefa = asyncio.get_running_loop().create_task(self._executar_assincrono(chave, voo, gerar))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+        return voo.assinar(), False
+
+    async def _executar_assincrono(
+        self, chave: Chave, voo: VooAssincrono, gerar: Callable[[], AsyncIterable[str]]
+    ):
+        erro = None
+        try:
+            async for parte in gerar():
+                voo.publicar(parte)
+        except Exception as exc:
+            erro = exc
+        except BaseException:
+            # CancelledError/KeyboardInterrupt: os consumidores recebem um erro e a excecao segue adiante
+            erro = RuntimeError("Geracao compartilhada interrompida")
+            raise
+        finally:
+            self._voos.pop(chave, None)
+            voo.concluir(erro)
@@ -6,39 +6,125 @@ Script para consultar, visualizar e exportar pares pergunta/resposta
 armazenados no banco SQLite do RagSQLITEGemini.
 
 Características:
-- Menu interativo com 5 opções
+- Menu interativo com 6 opções
 - Busca por palavra-chave
-- Exportação para JSON e TXT
+- Exportação em fluxo para JSON, NDJSON, CSV, Parquet e TXT
 - Análise estatística
+
+Os pares ficam materializados na tabela `qa_pairs` (ver pares_qa.py),
+sincronizada de forma incremental ao conectar e sob demanda
+(sincronizar_pares ou opção 6 do menu): listagem, busca, estatísticas e
+exportação são consultas SQL indexadas, sem decodificar o JSON de todas
+as sessões.
 """
 
 import sqlite3
 import json
-from typing import List, Dict, Optional, Tuple
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 
+# Funciona como pacote (from RAG.consultar_rag_novo import ...) e como script dentro de RAG/
+try:
+    from .exportacao_pares import Data, RelatorioExportacao, escrever_pares, exportar_pares, filtro_pares, iterar_pares
+    from .pares_qa import TabelaPares
+except ImportError:
+    from exportacao_pares import Data, RelatorioExportacao, escrever_pares, exportar_pares, filtro_pares, iterar_pares
+    from pares_qa import TabelaPares
+
+
+class Pagina:
+    """Página de resultados com cursor para a próxima e total calculado sob demanda."""
+    
+    def __init__(self, itens: List[Dict], proximo: Any, contar: Callable[[], int]):
+        """
+        Args:
+            itens: Itens da página
+            proximo: Cursor da próxima página (None na última)
+            contar: Função que conta o total de itens (só chamada se `total` for lido)
+        """
+        self.itens = itens
+        self.proximo = proximo
+        self._contar = contar
+        self._total = None
+    
+    @property
+    def total(self) -> int:
+        """Total de itens em todas as páginas (uma consulta COUNT na primeira leitura)."""
+        if self._total is None:
+            self._total = self._contar()
+        return self._total
+    
+    def __iter__(self):
+        return iter(self.itens)
+    
+    def __len__(self):
+        return len(self.itens)
+
+
 class ConsultadorRAG:
     """Classe para consultar pares pergunta/resposta do RAG."""
     
-    def __init__(self, db_file: str = "data.db"):
+    def __init__(self, db_file: str = "data.db", tamanho_pagina: int = 10):
         """
         Inicializa o consultador.
         
         Args:
             db_file: Caminho do arquivo SQLite
+            tamanho_pagina: Itens por página nas listagens paginadas
         """
         self.db_file = db_file
+        self.tamanho_pagina = tamanho_pagina
         self.conexao = None
+        self.pares = None
     
     def conectar(self):
-        """Conecta ao banco de dados SQLite."""
+        """Conecta ao banco de dados SQLite e sincroniza a tabela de pares."""
         try:
-            self.conexao = sqlite3.connect(self.db_file)
+            self.conexao = sqlite3.connect(self.db_file, timeout=30)
             self.conexao.row_factory = sqlite3.Row
+            self.pares = TabelaPares(self.conexao)
             print(f"✅ Conectado ao banco: {self.db_file}")
         except Exception as e:
             print(f"❌ Erro ao conectar: {e}")
             raise
+        resultado = self.sincronizar_pares()
+        if resultado['pares']:
+            print(f"🔄 {resultado['pares']} pares sincronizados de {resultado['sessoes']} sessões")
+    
+    def sincronizar_pares(self, completo: bool = False) -> Dict[str, int]:
+        """
+        Atualiza a tabela qa_pairs com as sessões alteradas desde a última sincronização.
+        
+        Chamado uma vez em conectar(); as leituras usam o que já foi
+        materializado. Chame de novo para incorporar conversas mais recentes.
+        
+        Args:
+            completo: Reprocessa todas as sessões e remove pares de sessões apagadas
+            
+        Returns:
+            Dicionário {sessoes, pares, removidas}
+        """
+        try:
+            return self.pares.sincronizar(completo=completo)
+        except sqlite3.OperationalError as e:
+            # Banco ocupado por outro processo: consulta o que já foi materializado
+            print(f"⚠️  Sincronização adiada: {e}")
+            return {'sessoes': 0, 'pares': 0, 'removidas': 0}
+    
+    @staticmethod
+    def _par(row: sqlite3.Row) -> Dict:
+        """Converte uma linha de qa_pairs no dicionário de par."""
+        return {
+            'run_id': row['run_id'],
+            'session_id': row['session_id'],
+            'numero': row['numero'],
+            'pergunta': row['pergunta'],
+            'resposta': row['resposta'],
+            'timestamp': row['created_at'],
+            'user_id': row['user_id'],
+            'model': row['model']
+        }
     
     def desconectar(self):
         """Desconecta do banco de dados."""
@@ -51,23 +137,97 @@ class ConsultadorRAG:
         Lista todas as sessões disponíveis.
         
         Returns:
-            Lista de dicionários com informações das sessões
+            Lista de dicionários com informações das sessões (inclui a
+            quantidade de pares)
         """
         try:
             cursor = self.conexao.cursor()
-            cursor.execute("SELECT session_id, user_id, created_at FROM agno_sessions ORDER BY created_at DESC")
+            cursor.execute("""
+                SELECT s.session_id, s.user_id, s.created_at,
+                       (SELECT COUNT(*) FROM qa_pairs p WHERE p.session_id = s.session_id) AS pares
+                FROM agno_sessions s
+                ORDER BY s.created_at DESC
+            """)
             sessoes = []
             for row in cursor.fetchall():
                 sessoes.append({
                     'session_id': row['session_id'],
                     'user_id': row['user_id'],
-                    'created_at': row['created_at']
+                    'created_at': row['created_at'],
+                    'pares': row['pares']
                 })
             return sessoes
         except Exception as e:
             print(f"❌ Erro ao listar sessões: {e}")
             return []
     
+    def paginar_sessoes(self, apos: Optional[Tuple[int, str]] = None,
+                        tamanho_pagina: Optional[int] = None) -> Pagina:
+        """
+        Página de sessões, das mais recentes para as mais antigas.
+        
+        Paginação por chave (created_at, session_id): cada página é uma busca
+        no índice a partir do cursor, com custo independente da posição.
+        
+        Args:
+            apos: Cursor `proximo` da página anterior (None para a primeira)
+            tamanho_pagina: Sessões por página (padrão: self.tamanho_pagina)
+            
+        Returns:
+            Pagina com sessões {session_id, user_id, created_at, pares}
+        """
+        tamanho = tamanho_pagina or self.tamanho_pagina
+        condicao = "WHERE (s.created_at, s.session_id) < (?, ?)" if apos else ""
+        cursor = self.conexao.execute(
+            f"""
+            SELECT s.session_id, s.user_id, s.created_at,
+                   (SELECT COUNT(*) FROM qa_pairs p WHERE p.session_id = s.session_id) AS pares
+            FROM agno_sessions s
+            {condicao}
+            ORDER BY s.created_at DESC, s.session_id DESC
+            LIMIT ?
+            """,
+            (*(apos or ()), tamanho + 1),
+        )
+        sessoes = [dict(row) for row in cursor]
+        proximo = None
+        if len(sessoes) > tamanho:
+            sessoes = sessoes[:tamanho]
+            proximo = (sessoes[-1]['created_at'], sessoes[-1]['session_id'])
+        return Pagina(
+            sessoes, proximo,
+            lambda: self.conexao.execute("SELECT COUNT(*) FROM agno_sessions").fetchone()[0]
+        )
+    
+    def paginar_pares(self, session_id: str, apos: int = 0, tamanho_pagina: Optional[int] = None) -> Pagina:
+        """
+        Página de pares de uma sessão, na ordem dos runs.
+        
+        Args:
+            session_id: ID da sessão
+            apos: Cursor `proximo` da página anterior (número do último par visto)
+            tamanho_pagina: Pares por página (padrão: self.tamanho_pagina)
+            
+        Returns:
+            Pagina de pares
+        """
+        tamanho = tamanho_pagina or self.tamanho_pagina
+        cursor = self.conexao.execute(
+            "SELECT * FROM qa_pairs WHERE session_id = ? AND numero > ? ORDER BY numero LIMIT ?",
+            (session_id, apos, tamanho + 1),
+        )
+        pares = [self._par(row) for row in cursor]
+        proximo = None
+        if len(pares) > tamanho:
+            pares = pares[:tamanho]
+            proximo = pares[-1]['numero']
+        return Pagina(
+            pares, proximo,
+            lambda: self.conexao.execute(
+                "SELECT COUNT(*) FROM qa_pairs WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        )
+    
     def obter_dados_sessao(self, session_id: str) -> Dict:
         """
         Obtém dados completos de uma sessão.
@@ -88,7 +248,8 @@ class ConsultadorRAG:
                     'session_id': row['session_id'],
                     'user_id': row['user_id'],
                     'created_at': row['created_at'],
-                    'runs': row['runs']
+                    # O blob da sessão fica vazio no storage incremental: recompõe com a tabela de runs
+                    'runs': json.dumps(self.pares.runs_completos(session_id), ensure_ascii=False)
                 }
             return {}
         except Exception as e:
@@ -106,109 +267,135 @@ class ConsultadorRAG:
             Lista de pares {pergunta, resposta, ...}
         """
         try:
-            dados = self.obter_dados_sessao(session_id)
-            if not dados:
-                return []
-            
-            # Parsear o JSON dos runs (pode ser string ou já ser dict)
-            runs_data = dados.get('runs')
-            
-            # Se for string, fazer parse
-            if isinstance(runs_data, str):
-                try:
-                    runs = json.loads(runs_data)
-                except:
-                    return []
-            else:
-                runs = runs_data if runs_data else []
-            
-            # Extrair pares
-            pares = []
-            for i, run in enumerate(runs, 1):
-                try:
-                    # A pergunta pode estar em input.input_content
-                    pergunta = ""
-                    if isinstance(run.get('input'), dict):
-                        pergunta = run['input'].get('input_content', '')
-                    elif isinstance(run.get('input'), str):
-                        input_data = json.loads(run['input'])
-                        pergunta = input_data.get('input_content', '')
-                    
-                    # A resposta está em content
-                    resposta = run.get('content', '')
-                    
-                    par = {
-                        'run_id': run.get('run_id', ''),
-                        'session_id': session_id,
-                        'numero': i,
-                        'pergunta': pergunta,
-                        'resposta': resposta,
-                        'timestamp': run.get('created_at', ''),
-                        'user_id': dados.get('user_id', ''),
-                        'model': run.get('model', '')
-                    }
-                    
-                    pares.append(par)
-                except Exception as e:
-                    print(f"⚠️  Erro ao processar run {i}: {e}")
-                    continue
-            
-            return pares
+            cursor = self.conexao.execute(
+                "SELECT * FROM qa_pairs WHERE session_id = ? ORDER BY numero", (session_id,)
+            )
+            return [self._par(row) for row in cursor]
         except Exception as e:
             print(f"❌ Erro ao extrair pares: {e}")
             return []
     
-    def buscar_pares_por_palavra(self, palavra: str) -> List[Dict]:
+    def listar_todos_pares(self) -> List[Dict]:
+        """
+        Lista os pares de todas as sessões, em ordem cronológica.
+        
+        Returns:
+            Lista de pares
+        """
+        try:
+            cursor = self.conexao.execute("SELECT * FROM qa_pairs ORDER BY created_at, session_id, numero")
+            return [self._par(row) for row in cursor]
+        except Exception as e:
+            print(f"❌ Erro ao listar pares: {e}")
+            return []
+    
+    def contar_pares(self) -> int:
+        """Quantidade total de pares pergunta/resposta."""
+        return self.conexao.execute("SELECT COUNT(*) FROM qa_pairs").fetchone()[0]
+    
+    def buscar_pares_por_palavra(self, palavra: str, limite: int = 50) -> List[Dict]:
         """
         Busca pares por palavra-chave (em pergunta e resposta).
         
+        Usa o índice FTS5 (sem distinção de acentos e maiúsculas), com os
+        mais relevantes primeiro. Aceita "frases exatas", prefixos (termo*)
+        e os operadores AND, OR e NOT.
+        
         Args:
-            palavra: Palavra-chave para buscar
+            palavra: Palavra-chave ou consulta para buscar
+            limite: Máximo de pares retornados
             
         Returns:
-            Lista de pares encontrados
+            Lista de pares encontrados, com 'trecho' destacado
         """
         try:
-            sessoes = self.listar_sessoes()
-            resultados = []
-            palavra_lower = palavra.lower()
-            
-            for sessao in sessoes:
-                pares = self.extrair_pares_pergunta_resposta(sessao['session_id'])
-                for par in pares:
-                    if (palavra_lower in par['pergunta'].lower() or 
-                        palavra_lower in par['resposta'].lower()):
-                        resultados.append(par)
+            if self.pares.fts:
+                return [
+                    {**self._par(row), 'trecho': row['trecho'], 'relevancia': row['relevancia']}
+                    for row in self.pares.buscar(palavra, limite=limite)
+                ]
             
-            return resultados
+            # SQLite sem FTS5: busca por substring
+            padrao = "%" + palavra.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            cursor = self.conexao.execute(
+                """
+                SELECT * FROM qa_pairs
+                WHERE pergunta LIKE ? ESCAPE '\\' OR resposta LIKE ? ESCAPE '\\'
+                ORDER BY created_at, session_id, numero
+                LIMIT ?
+                """,
+                (padrao, padrao, limite),
+            )
+            return [{**self._par(row), 'trecho': row['pergunta'][:80]} for row in cursor]
         except Exception as e:
             print(f"❌ Erro ao buscar: {e}")
             return []
     
-    def exportar_json(self, pares: List[Dict], nome_arquivo: str = "pares_pergunta_resposta.json"):
+    def iterar_pares(self, inicio: Data = None, fim: Data = None, model: Optional[str] = None,
+                     user_id: Optional[str] = None, tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """
+        Percorre os pares em ordem cronológica, lendo um lote do banco por vez.
+        
+        Args:
+            inicio: Data inicial (epoch, datetime ou "AAAA-MM-DD")
+            fim: Data final, exclusiva
+            model: Apenas pares deste modelo
+            user_id: Apenas pares deste usuário
+            tamanho_lote: Linhas lidas do cursor por vez
+            
+        Returns:
+            Iterador de pares
+        """
+        return iterar_pares(self.conexao, inicio, fim, model, user_id, tamanho_lote)
+    
+    def exportar_pares(self, nome_arquivo: str, formato: Optional[str] = None, compressao: Optional[str] = None,
+                       inicio: Data = None, fim: Data = None, model: Optional[str] = None,
+                       user_id: Optional[str] = None) -> Optional[RelatorioExportacao]:
+        """
+        Exporta os pares filtrados em fluxo, com memória constante.
+        
+        Args:
+            nome_arquivo: Arquivo de saída; formato e compressão vêm da extensão
+                (.ndjson, .json, .csv, .parquet, com .gz ou .zst)
+            formato: ndjson, json, csv ou parquet
+            compressao: gzip ou zstd
+            inicio, fim, model, user_id: Filtros (ver iterar_pares)
+            
+        Returns:
+            Relatório com pares exportados e pares/s
+        """
+        try:
+            relatorio = exportar_pares(self.conexao, nome_arquivo, formato, compressao, inicio, fim, model, user_id)
+            print(f"✅ {relatorio}")
+            return relatorio
+        except Exception as e:
+            print(f"❌ Erro ao exportar: {e}")
+            return None
+    
+    def exportar_json(self, pares: Iterable[Dict], nome_arquivo: str = "pares_pergunta_resposta.json"):
         """
         Exporta pares para JSON.
         
         Args:
-            pares: Lista de pares
+            pares: Lista ou iterador de pares (gravados à medida que chegam)
             nome_arquivo: Nome do arquivo de saída
         """
         try:
-            with open(nome_arquivo, 'w', encoding='utf-8') as f:
-                json.dump(pares, f, indent=2, ensure_ascii=False)
-            print(f"✅ Exportados {len(pares)} pares para '{nome_arquivo}'")
+            relatorio = escrever_pares(pares, nome_arquivo, formato="json")
+            print(f"✅ Exportados {relatorio.linhas} pares para '{nome_arquivo}'")
         except Exception as e:
             print(f"❌ Erro ao exportar JSON: {e}")
     
-    def exportar_txt(self, pares: List[Dict], nome_arquivo: str = "pares_pergunta_resposta.txt"):
+    def exportar_txt(self, pares: Iterable[Dict], nome_arquivo: str = "pares_pergunta_resposta.txt"):
         """
         Exporta pares para TXT formatado.
         
         Args:
-            pares: Lista de pares
+            pares: Lista ou iterador de pares (gravados à medida que chegam)
             nome_arquivo: Nome do arquivo de saída
         """
         try:
+            total = 0
             with open(nome_arquivo, 'w', encoding='utf-8') as f:
                 f.write("📋 PARES PERGUNTA/RESPOSTA - RAG\n")
                 f.write("=" * 100 + "\n\n")
@@ -224,35 +411,76 @@ class ConsultadorRAG:
                     
                     f.write(f"   📊 Meta: run_id={par['run_id']}, timestamp={par['timestamp']}, model={par['model']}\n")
                     f.write("=" * 100 + "\n\n")
+                    total += 1
             
-            print(f"✅ Exportados {len(pares)} pares para '{nome_arquivo}'")
+            print(f"✅ Exportados {total} pares para '{nome_arquivo}'")
         except Exception as e:
             print(f"❌ Erro ao exportar TXT: {e}")
     
-    def listar_modelos(self) -> Dict[str, int]:
+    def estatisticas(self, inicio: Data = None, fim: Data = None) -> Dict:
+        """
+        Estatísticas agregadas pelo SQLite em uma única passada sobre qa_pairs.
+        
+        Args:
+            inicio: Data inicial da janela (epoch, datetime ou "AAAA-MM-DD")
+            fim: Data final da janela, exclusiva
+            
+        Returns:
+            Dicionário com sessoes, pares, por_modelo, por_usuario, por_dia
+            (datas em UTC) e segundos gastos na consulta. Sem janela, sessoes
+            conta todas as sessões; com janela, as que têm pares no período.
+        """
+        inicio_consulta = time.perf_counter()
+        where, parametros = filtro_pares(inicio, fim)
+        grupos = self.conexao.execute(
+            f"""
+            SELECT model, user_id, date(created_at, 'unixepoch') AS dia, COUNT(*)
+            FROM qa_pairs {where}
+            GROUP BY model, user_id, dia
+            """,
+            parametros,
+        ).fetchall()
+        if inicio is None and fim is None:
+            sessoes = self.conexao.execute("SELECT COUNT(*) FROM agno_sessions").fetchone()[0]
+        else:
+            sessoes = self.conexao.execute(
+                f"SELECT COUNT(DISTINCT session_id) FROM qa_pairs {where}", parametros
+            ).fetchone()[0]
+        
+        por_modelo, por_usuario, por_dia = {}, {}, {}
+        for modelo, usuario, dia, contagem in grupos:
+            por_modelo[modelo] = por_modelo.get(modelo, 0) + contagem
+            por_usuario[usuario] = por_usuario.get(usuario, 0) + contagem
+            por_dia[dia] = por_dia.get(dia, 0) + contagem
+        
+        return {
+            'sessoes': sessoes,
+            'pares': sum(por_modelo.values()),
+            'por_modelo': dict(sorted(por_modelo.items(), key=lambda x: x[1], reverse=True)),
+            'por_usuario': dict(sorted(por_usuario.items(), key=lambda x: x[1], reverse=True)),
+            'por_dia': dict(sorted(por_dia.items())),
+            'segundos': time.perf_counter() - inicio_consulta
+        }
+    
+    def listar_modelos(self, inicio: Data = None, fim: Data = None) -> Dict[str, int]:
         """
         Lista modelos utilizados e contagem de pares.
         
+        Args:
+            inicio: Data inicial da janela (opcional)
+            fim: Data final da janela, exclusiva (opcional)
+            
         Returns:
             Dicionário {modelo: contagem}
         """
         try:
-            sessoes = self.listar_sessoes()
-            modelos = {}
-            
-            for sessao in sessoes:
-                pares = self.extrair_pares_pergunta_resposta(sessao['session_id'])
-                for par in pares:
-                    modelo = par['model']
-                    modelos[modelo] = modelos.get(modelo, 0) + 1
-            
-            return modelos
+            return self.estatisticas(inicio, fim)['por_modelo']
         except Exception as e:
             print(f"❌ Erro ao listar modelos: {e}")
             return {}
     
     def menu_interativo(self):
-        """Menu interativo com 5 opções."""
+        """Menu interativo com 6 opções."""
         while True:
             print("\n" + "=" * 60)
             print("📋 CONSULTADOR DE PARES PERGUNTA/RESPOSTA")
@@ -262,6 +490,7 @@ class ConsultadorRAG:
             print("3. Buscar por palavra-chave")
             print("4. Ver estatísticas")
             print("5. Exportar todos os pares")
+            print("6. Sincronizar com as sessões novas")
             print("0. Sair")
             print("=" * 60)
             
@@ -272,82 +501,139 @@ class ConsultadorRAG:
                 break
             
             elif opcao == "1":
-                sessoes = self.listar_sessoes()
-                if sessoes:
-                    print("\n📋 Todas as Sessões:\n")
-                    for i, sessao in enumerate(sessoes, 1):
-                        pares = self.extrair_pares_pergunta_resposta(sessao['session_id'])
-                        print(f"{i}. {sessao['session_id']}")
-                        print(f"   Usuário: {sessao['user_id']}")
-                        print(f"   Data: {sessao['created_at']}")
-                        print(f"   ✓ {len(pares)} pares pergunta/resposta\n")
+                pagina = self.paginar_sessoes()
+                if pagina.itens:
+                    print(f"\n📋 Todas as Sessões ({pagina.total}):\n")
+                    i = 0
+                    while True:
+                        for sessao in pagina:
+                            i += 1
+                            print(f"{i}. {sessao['session_id']}")
+                            print(f"   Usuário: {sessao['user_id']}")
+                            print(f"   Data: {sessao['created_at']}")
+                            print(f"   ✓ {sessao['pares']} pares pergunta/resposta\n")
+                        if pagina.proximo is None:
+                            break
+                        pagina = self.paginar_sessoes(apos=pagina.proximo)
                 else:
                     print("❌ Nenhuma sessão encontrada")
             
             elif opcao == "2":
-                try:
-                    num = int(input("Digite o número da sessão: "))
-                    sessoes = self.listar_sessoes()
-                    if 1 <= num <= len(sessoes):
-                        session_id = sessoes[num - 1]['session_id']
-                        pares = self.extrair_pares_pergunta_resposta(session_id)
-                        
-                        print(f"\n💬 Pares da Sessão '{session_id}':")
-                        print("=" * 100)
-                        
-                        for par in pares:
-                            print(f"\n{par['numero']}. ❓ PERGUNTA:")
-                            print("-" * 100)
-                            print(par['pergunta'])
-                            print(f"\n   🤖 RESPOSTA:")
-                            print("-" * 100)
-                            print(par['resposta'])
-                            print(f"\n   📊 Meta: {par['model']} | {par['timestamp']}")
-                            print("=" * 100)
-                    else:
-                        print("❌ Número inválido")
-                except ValueError:
-                    print("❌ Digite um número válido")
+                session_id = self._escolher_sessao()
+                if session_id:
+                    self._mostrar_pares(session_id)
             
             elif opcao == "3":
-                palavra = input("Digite a palavra-chave: ").strip()
+                palavra = input('Digite a palavra-chave ("frase", prefixo*): ').strip()
+                inicio = time.perf_counter()
                 pares = self.buscar_pares_por_palavra(palavra)
+                duracao_ms = (time.perf_counter() - inicio) * 1000
                 if pares:
-                    print(f"\n🔍 Encontrados {len(pares)} pares com '{palavra}':\n")
+                    print(f"\n🔍 {len(pares)} pares mais relevantes com '{palavra}' ({duracao_ms:.1f} ms):\n")
                     for par in pares:
-                        print(f"Session: {par['session_id']}")
+                        print(f"Session: {par['session_id']} | #{par['numero']}")
                         print(f"P: {par['pergunta'][:80]}...")
-                        print(f"R: {par['resposta'][:80]}...\n")
+                        print(f"   … {par['trecho']}\n")
                 else:
                     print(f"❌ Nenhum par encontrado com '{palavra}'")
             
             elif opcao == "4":
-                sessoes = self.listar_sessoes()
-                modelos = self.listar_modelos()
-                total_pares = sum(len(self.extrair_pares_pergunta_resposta(s['session_id'])) for s in sessoes)
+                print("Período (Enter para todo o histórico):")
+                inicio = input("  Data inicial (AAAA-MM-DD): ").strip() or None
+                fim = input("  Data final, exclusiva (AAAA-MM-DD): ").strip() or None
+                try:
+                    stats = self.estatisticas(inicio, fim)
+                except ValueError:
+                    print("❌ Data inválida")
+                    continue
+                modelos = stats['por_modelo']
                 
-                print(f"\n📊 ESTATÍSTICAS:")
-                print(f"  📋 Sessões: {len(sessoes)}")
-                print(f"  💬 Total de Pares: {total_pares}")
+                print(f"\n📊 ESTATÍSTICAS ({stats['segundos'] * 1000:.1f} ms):")
+                print(f"  📋 Sessões: {stats['sessoes']}")
+                print(f"  💬 Total de Pares: {stats['pares']}")
                 print(f"  🤖 Modelos utilizados: {len(modelos)}")
                 print(f"\n  Detalhes por modelo:")
-                for modelo, count in sorted(modelos.items(), key=lambda x: x[1], reverse=True):
+                for modelo, count in modelos.items():
                     print(f"    - {modelo}: {count} pares")
+                print(f"\n  Detalhes por usuário:")
+                for usuario, count in stats['por_usuario'].items():
+                    print(f"    - {usuario}: {count} pares")
+                print(f"\n  Últimos dias:")
+                for dia, count in list(stats['por_dia'].items())[-10:]:
+                    print(f"    - {dia}: {count} pares")
             
             elif opcao == "5":
-                sessoes = self.listar_sessoes()
-                todos_pares = []
-                for sessao in sessoes:
-                    pares = self.extrair_pares_pergunta_resposta(sessao['session_id'])
-                    todos_pares.extend(pares)
+                nome_arquivo = input("Arquivo (.json, .ndjson, .csv, .parquet, .txt; .gz/.zst) "
+                                     "[pares_pergunta_resposta.json]: ").strip() or "pares_pergunta_resposta.json"
+                print("Filtros (Enter para todos):")
+                inicio = input("  Data inicial (AAAA-MM-DD): ").strip() or None
+                fim = input("  Data final, exclusiva (AAAA-MM-DD): ").strip() or None
+                model = input("  Modelo: ").strip() or None
+                user_id = input("  Usuário: ").strip() or None
                 
-                self.exportar_json(todos_pares)
-                self.exportar_txt(todos_pares)
+                if nome_arquivo.endswith(".txt"):
+                    self.exportar_txt(self.iterar_pares(inicio, fim, model, user_id), nome_arquivo)
+                else:
+                    self.exportar_pares(nome_arquivo, inicio=inicio, fim=fim, model=model, user_id=user_id)
+            
+            elif opcao == "6":
+                resultado = self.sincronizar_pares()
+                print(f"🔄 {resultado['pares']} pares sincronizados de {resultado['sessoes']} sessões")
             
             else:
                 print("❌ Opção inválida")
 
 
+    def _escolher_sessao(self) -> Optional[str]:
+        """Navega pelas sessões página a página até o usuário escolher uma."""
+        pagina = self.paginar_sessoes()
+        inicio = 1
+        while pagina.itens:
+            print(f"\n📋 Sessões {inicio}-{inicio + len(pagina) - 1} de {pagina.total}:\n")
+            for i, sessao in enumerate(pagina, inicio):
+                print(f"{i}. {sessao['session_id']} ({sessao['pares']} pares, {sessao['created_at']})")
+            
+            escolha = input("\nNúmero da sessão" + (", 'n' para próxima página" if pagina.proximo else "")
+                            + " ou Enter para voltar: ").strip().lower()
+            if not escolha:
+                return None
+            if escolha == "n" and pagina.proximo:
+                inicio += len(pagina)
+                pagina = self.paginar_sessoes(apos=pagina.proximo)
+                continue
+            try:
+                num = int(escolha)
+            except ValueError:
+                print("❌ Digite um número válido")
+                continue
+            if inicio <= num < inicio + len(pagina):
+                return pagina.itens[num - inicio]['session_id']
+            print("❌ Número inválido (escolha um da página atual)")
+        print("❌ Nenhuma sessão encontrada")
+        return None
+    
+    def _mostrar_pares(self, session_id: str):
+        """Mostra os pares de uma sessão página a página."""
+        pagina = self.paginar_pares(session_id)
+        print(f"\n💬 Pares da Sessão '{session_id}' ({pagina.total}):")
+        print("=" * 100)
+        while True:
+            for par in pagina:
+                print(f"\n{par['numero']}. ❓ PERGUNTA:")
+                print("-" * 100)
+                print(par['pergunta'])
+                print(f"\n   🤖 RESPOSTA:")
+                print("-" * 100)
+                print(par['resposta'])
+                print(f"\n   📊 Meta: {par['model']} | {par['timestamp']}")
+                print("=" * 100)
+            if pagina.proximo is None:
+                break
+            if input("\nEnter para mais pares, 'q' para voltar: ").strip().lower() == "q":
+                break
+            pagina = self.paginar_pares(session_id, apos=pagina.proximo)
+
+
 def main():
     """Função principal."""
     consultador = ConsultadorRAG(db_file="data.db")
@@ -0,0 +1,52 @@
+"""
+EmbeddingLote - Geracao de embeddings em lote
+=============================================
+
+Gera embeddings de listas de textos em micro-lotes configuraveis. Os
+textos sao ordenados por tamanho antes de formar os lotes, o que reduz
+o padding dentro de cada lote, e o resultado volta na ordem original.
+"""
+
+from typing import List, Sequence
+
+
+def gerar_embeddings_em_lote(
+    embedder,
+    textos: Sequence[str],
+    tamanho_lote: int = 32,
+) -> List[List[float]]:
+    """
+    Gera embeddings para uma lista de textos.
+
+    Args:
+        embedder: Embedder do agno (SentenceTransformerEmbedder ou EmbedderComCache)
+        textos: Textos a vetorizar
+        tamanho_lote: Quantidade de textos por passada no modelo
+
+    Returns:
+        Lista de embeddings na mesma ordem de `textos`
+    """
+    if not textos:
+        return []
+
+    # O cache resolve os acertos e repassa apenas as falhas para o modelo
+    if hasattr(embedder, "get_embeddings"):
+        return embedder.get_embeddings(list(textos), tamanho_lote=tamanho_lote)
+
+    cliente = getattr(embedder, "sentence_transformer_client", None)
+    if cliente is None:
+        return [list(embedder.get_embedding(texto)) for texto in textos]
+
+    ordem = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+    resultado: List[List[float]] = [[] for _ in textos]
+    for inicio in range(0, len(ordem), tamanho_lote):
+        indices = ordem[inicio:inicio + tamanho_lote]
+        vetores = cliente.encode(
+            [textos[i] for i in indices],
+            batch_size=tamanho_lote,
+            prompt=getattr(embedder, "prompt", None),
+            normalize_embeddings=getattr(embedder, "normalize_embeddings", False),
+        )
+        for i, vetor in zip(indices, vetores):
+            resultado[i] = [float(valor) for valor in vetor]
+    return resultado
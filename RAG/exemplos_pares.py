@@ -7,7 +7,11 @@ para extrair, buscar, filtrar e analisar pares pergunta/resposta.
 """
 
 import json
-from consultar_rag_novo import ConsultadorRAG
+from itertools import islice
+try:
+    from .consultar_rag_novo import ConsultadorRAG
+except ImportError:
+    from consultar_rag_novo import ConsultadorRAG
 
 def exemplo_1_extrair_pares():
     """Exemplo 1: Extrair todos os pares de uma sessão"""
@@ -55,7 +59,7 @@ def exemplo_2_buscar_palavra_chave():
 
 
 def exemplo_3_exportar_json():
-    """Exemplo 3: Exportar pares para JSON customizado"""
+    """Exemplo 3: Exportar pares para JSON customizado (em fluxo)"""
     print("\n" + "="*80)
     print("💾 EXEMPLO 3: Exportar Pares para JSON")
     print("="*80)
@@ -63,16 +67,11 @@ def exemplo_3_exportar_json():
     consultador = ConsultadorRAG(db_file="../data.db")
     consultador.conectar()
     
-    # Extrair todos os pares
-    sessoes = consultador.listar_sessoes()
-    todos_pares = []
-    for sessao in sessoes:
-        pares = consultador.extrair_pares_pergunta_resposta(sessao['session_id'])
-        todos_pares.extend(pares)
+    # Exportar sem montar a lista de pares na memória (o relatório já é impresso)
+    consultador.exportar_pares("pares_customizado.json")
     
-    # Exportar
-    consultador.exportar_json(todos_pares, "pares_customizado.json")
-    print(f"✅ Total de pares exportados: {len(todos_pares)}")
+    # Mesmo fluxo, compactado e filtrado por modelo
+    consultador.exportar_pares("pares_sabia.ndjson.gz", model="sabia-3")
     
     consultador.desconectar()
 
@@ -86,25 +85,20 @@ def exemplo_4_filtrar_por_modelo():
     consultador = ConsultadorRAG(db_file="../data.db")
     consultador.conectar()
     
-    # Extrair todos os pares
-    sessoes = consultador.listar_sessoes()
-    todos_pares = []
-    for sessao in sessoes:
-        pares = consultador.extrair_pares_pergunta_resposta(sessao['session_id'])
-        todos_pares.extend(pares)
-    
-    # Agrupar por modelo
-    modelos = {}
-    for par in todos_pares:
-        modelo = par['model']
-        if modelo not in modelos:
-            modelos[modelo] = []
-        modelos[modelo].append(par)
+    # Contagem por modelo agregada no SQLite
+    modelos = consultador.estatisticas()['por_modelo']
     
     # Mostrar estatísticas
     print(f"\n✅ Modelos encontrados:\n")
-    for modelo, pares in sorted(modelos.items(), key=lambda x: len(x[1]), reverse=True):
-        print(f"  🤖 {modelo}: {len(pares)} pares")
+    for modelo, total in modelos.items():
+        print(f"  🤖 {modelo}: {total} pares")
+    
+    # Pares de um único modelo, lidos sob demanda
+    if modelos:
+        modelo = next(iter(modelos))
+        print(f"\n📌 Primeiros pares de '{modelo}':\n")
+        for par in islice(consultador.iterar_pares(model=modelo), 3):
+            print(f"P: {par['pergunta'][:60]}...")
     
     consultador.desconectar()
 
@@ -118,12 +112,8 @@ def exemplo_5_analise_frequencia():
     consultador = ConsultadorRAG(db_file="../data.db")
     consultador.conectar()
     
-    # Extrair todos os pares
-    sessoes = consultador.listar_sessoes()
-    todos_pares = []
-    for sessao in sessoes:
-        pares = consultador.extrair_pares_pergunta_resposta(sessao['session_id'])
-        todos_pares.extend(pares)
+    # Extrair todos os pares (uma consulta na tabela qa_pairs)
+    todos_pares = consultador.listar_todos_pares()
     
     # Contar frequência de palavras
     palavras = {}
@@ -0,0 +1,324 @@
+"""
+ExportacaoPares - Exportacao em fluxo dos pares pergunta/resposta
+=================================================================
+
+Le a tabela `qa_pairs` em lotes (fetchmany) e grava cada lote assim que
+chega, entao a memoria usada nao depende do tamanho do historico.
+Formatos: NDJSON, JSON (lista), CSV e Parquet (requer pyarrow), com
+compressao gzip ou zstd (requer zstandard) opcional. Aceita filtros por
+periodo, modelo e usuario e mostra o progresso em pares por segundo.
+
+O formato e a compressao sao inferidos da extensao do arquivo:
+
+    python RAG/exportacao_pares.py --db data.db --saida pares.ndjson.gz \\
+        --inicio 2025-01-01 --modelo sabia-3
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+FORMATOS = ("ndjson", "json", "csv", "parquet")
+COMPRESSOES = ("gzip", "zstd")
+COLUNAS_EXPORTACAO = ("session_id", "numero", "run_id", "user_id", "model", "timestamp", "pergunta", "resposta")
+
+_EXTENSOES_FORMATO = {".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json", ".csv": "csv", ".parquet": "parquet"}
+_EXTENSOES_COMPRESSAO = {".gz": "gzip", ".zst": "zstd"}
+
+Data = Union[int, float, str, datetime, None]
+
+
+def epoch(valor: Data) -> Optional[int]:
+    """Converte epoch, datetime ou data ISO ("2025-01-31") em epoch inteiro."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return int(valor.timestamp())
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    try:
+        return int(float(valor))
+    except ValueError:
+        return int(datetime.fromisoformat(valor).timestamp())
+
+
+def filtro_pares(
+    inicio: Data = None,
+    fim: Data = None,
+    model: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Tuple[str, List]:
+    """
+    Clausula WHERE (com parametros) para filtrar a tabela qa_pairs.
+
+    Args:
+        inicio: Inclui pares criados a partir deste instante
+        fim: Inclui pares criados antes deste instante
+        model: Apenas pares deste modelo
+        user_id: Apenas pares deste usuario
+    """
+    condicoes, parametros = [], []
+    for condicao, valor in (
+        ("created_at >= ?", epoch(inicio)),
+        ("created_at < ?", epoch(fim)),
+        ("model = ?", model),
+        ("user_id = ?", user_id),
+    ):
+        if valor is not None:
+            condicoes.append(condicao)
+            parametros.append(valor)
+    return ("WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+
+def iterar_pares(
+    conexao: sqlite3.Connection,
+    inicio: Data = None,
+    fim: Data = None,
+    model: Optional[str] = None,
+    user_id: Optional[str] = None,
+    tamanho_lote: int = 1000,
+) -> Iterator[Dict]:
+    """
+    Produz os pares em ordem cronologica, lendo `tamanho_lote` linhas por vez.
+
+    Returns:
+        Iterador de dicts com as chaves de COLUNAS_EXPORTACAO
+    """
+    where, parametros = filtro_pares(inicio, fim, model, user_id)
+    cursor = conexao.execute(
+        f"""
+        SELECT session_id, numero, run_id, user_id, model, created_at AS timestamp, pergunta, resposta
+        FROM qa_pairs {where}
+        ORDER BY created_at, session_id, numero
+        """,
+        parametros,
+    )
+    try:
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                return
+            for linha in linhas:
+                yield dict(zip(COLUNAS_EXPORTACAO, linha))
+    finally:
+        cursor.close()
+
+
+def inferir_formato(destino: str) -> Tuple[str, Optional[str]]:
+    """(formato, compressao) a partir da extensao, ex.: pares.csv.gz -> ("csv", "gzip")."""
+    nome = destino.lower()
+    compressao = None
+    for extensao, valor in _EXTENSOES_COMPRESSAO.items():
+        if nome.endswith(extensao):
+            compressao = valor
+            nome = nome[: -len(extensao)]
+    for extensao, formato in _EXTENSOES_FORMATO.items():
+        if nome.endswith(extensao):
+            return formato, compressao
+    return "ndjson", compressao
+
+
+def abrir_saida(destino: str, compressao: Optional[str] = None) -> IO[str]:
+    """Abre o arquivo de saida em modo texto, comprimindo com gzip ou zstd se pedido."""
+    if compressao is None:
+        return open(destino, "w", encoding="utf-8", newline="")
+    if compressao == "gzip":
+        return gzip.open(destino, "wt", encoding="utf-8", newline="")
+    if compressao == "zstd":
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise ImportError("Compressao zstd requer o pacote zstandard (pip install zstandard)") from exc
+        binario = zstandard.ZstdCompressor().stream_writer(open(destino, "wb"), closefd=True)
+        return io.TextIOWrapper(binario, encoding="utf-8", newline="")
+    raise ValueError(f"Compressao desconhecida: {compressao} (use {', '.join(COMPRESSOES)})")
+
+
+@dataclass
+class RelatorioExportacao:
+    """Contadores de uma exportacao."""
+
+    destino: str
+    formato: str
+    linhas: int = 0
+    segundos: float = 0.0
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.linhas / self.segundos if self.segundos else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Exportacao {self.formato}: {self.linhas} pares em {self.segundos:.1f}s "
+            f"({self.linhas_por_segundo:.0f} pares/s) -> {self.destino}"
+        )
+
+
+def _com_progresso(pares: Iterable[Dict], relatorio: RelatorioExportacao, intervalo: float) -> Iterator[Dict]:
+    inicio = ultimo = time.perf_counter()
+    for par in pares:
+        relatorio.linhas += 1
+        yield par
+        agora = time.perf_counter()
+        if intervalo and agora - ultimo >= intervalo:
+            ultimo = agora
+            relatorio.segundos = agora - inicio
+            print(f"  [exportacao] {relatorio.linhas} pares | {relatorio.linhas_por_segundo:.0f} pares/s")
+    relatorio.segundos = time.perf_counter() - inicio
+
+
+def _lotes(pares: Iterable[Dict], tamanho: int) -> Iterator[List[Dict]]:
+    lote = []
+    for par in pares:
+        lote.append(par)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _escrever_ndjson(pares: Iterable[Dict], arquivo: IO[str]):
+    for par in pares:
+        arquivo.write(json.dumps(par, ensure_ascii=False) + "\n")
+
+
+def _escrever_json(pares: Iterable[Dict], arquivo: IO[str]):
+    arquivo.write("[")
+    for i, par in enumerate(pares):
+        arquivo.write(("," if i else "") + "\n  " + json.dumps(par, ensure_ascii=False))
+    arquivo.write("\n]\n")
+
+
+def _escrever_csv(pares: Iterable[Dict], arquivo: IO[str]):
+    escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_EXPORTACAO, extrasaction="ignore")
+    escritor.writeheader()
+    for par in pares:
+        escritor.writerow(par)
+
+
+def _escrever_parquet(pares: Iterable[Dict], destino: str, compressao: Optional[str], tamanho_lote: int):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Exportacao Parquet requer o pacote pyarrow (pip install pyarrow)") from exc
+
+    esquema = pa.schema(
+        [
+            ("session_id", pa.string()),
+            ("numero", pa.int64()),
+            ("run_id", pa.string()),
+            ("user_id", pa.string()),
+            ("model", pa.string()),
+            ("timestamp", pa.int64()),
+            ("pergunta", pa.string()),
+            ("resposta", pa.string()),
+        ]
+    )
+    # Parquet comprime por coluna internamente; o arquivo em si nao e envolto em gzip/zstd
+    with pq.ParquetWriter(destino, esquema, compression=compressao or "snappy") as escritor:
+        for lote in _lotes(pares, tamanho_lote):
+            escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+
+
+def escrever_pares(
+    pares: Iterable[Dict],
+    destino: str,
+    formato: Optional[str] = None,
+    compressao: Optional[str] = None,
+    tamanho_lote: int = 1000,
+    intervalo_progresso: float = 2.0,
+) -> RelatorioExportacao:
+    """
+    Grava os pares no destino a medida que sao produzidos.
+
+    Args:
+        pares: Iteravel de pares (ex.: iterar_pares)
+        destino: Arquivo de saida
+        formato: ndjson, json, csv ou parquet (padrao: pela extensao)
+        compressao: gzip ou zstd (padrao: pela extensao)
+        tamanho_lote: Pares por row group no Parquet
+        intervalo_progresso: Segundos entre mensagens de progresso (0 desliga)
+    """
+    formato_extensao, compressao_extensao = inferir_formato(destino)
+    formato = formato or formato_extensao
+    compressao = compressao or compressao_extensao
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+
+    relatorio = RelatorioExportacao(destino=destino, formato=formato)
+    pares = _com_progresso(pares, relatorio, intervalo_progresso)
+    if formato == "parquet":
+        _escrever_parquet(pares, destino, compressao, tamanho_lote)
+        return relatorio
+
+    escrever = {"ndjson": _escrever_ndjson, "json": _escrever_json, "csv": _escrever_csv}[formato]
+    with abrir_saida(destino, compressao) as arquivo:
+        escrever(pares, arquivo)
+    return relatorio
+
+
+def exportar_pares(
+    conexao: sqlite3.Connection,
+    destino: str,
+    formato: Optional[str] = None,
+    compressao: Optional[str] = None,
+    inicio: Data = None,
+    fim: Data = None,
+    model: Optional[str] = None,
+    user_id: Optional[str] = None,
+    tamanho_lote: int = 1000,
+    intervalo_progresso: float = 2.0,
+) -> RelatorioExportacao:
+    """Exporta os pares filtrados de qa_pairs sem carrega-los todos na memoria."""
+    pares = iterar_pares(conexao, inicio, fim, model, user_id, tamanho_lote)
+    return escrever_pares(pares, destino, formato, compressao, tamanho_lote, intervalo_progresso)
+
+
+def main():
+    """Exporta os pares pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Exporta pares pergunta/resposta em fluxo")
+    parser.add_argument("--db", default="data.db")
+    parser.add_argument("--saida", default="pares_pergunta_resposta.ndjson")
+    parser.add_argument("--formato", choices=FORMATOS)
+    parser.add_argument("--compressao", choices=COMPRESSOES)
+    parser.add_argument("--inicio", help="Data inicial (ISO ou epoch)")
+    parser.add_argument("--fim", help="Data final, exclusiva (ISO ou epoch)")
+    parser.add_argument("--modelo")
+    parser.add_argument("--usuario")
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        from .pares_qa import TabelaPares
+    except ImportError:
+        from pares_qa import TabelaPares
+
+    conexao = sqlite3.connect(args.db, timeout=30)
+    TabelaPares(conexao).sincronizar()
+    relatorio = exportar_pares(
+        conexao,
+        args.saida,
+        formato=args.formato,
+        compressao=args.compressao,
+        inicio=args.inicio,
+        fim=args.fim,
+        model=args.modelo,
+        user_id=args.usuario,
+        tamanho_lote=args.lote,
+    )
+    conexao.close()
+    print(relatorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+IndiceVetorial - Indice ANN da tabela de embeddings
+===================================================
+
+Cria e mantem um indice vetorial aproximado (IVF-PQ ou IVF-HNSW-SQ) na
+coluna de embeddings da tabela do LanceDB, reconstruindo-o quando linhas
+nao indexadas se acumulam, e expoe nprobes/refine_factor para equilibrar
+recall e latencia nas buscas feitas pelo proprio retriever. Antes da
+primeira ingestao a tabela nao existe: as estatisticas saem zeradas e as
+buscas nao retornam documentos.
+
+Uso:
+    python RAG/indice_vetorial.py --tipo IVF_PQ --nprobes 20
+"""
+
+import argparse
+import json
+import math
+import time
+from typing import Dict, List, Optional
+
+from registro_componentes import obter_vector_db
+
+
+TIPOS_INDICE = ("IVF_PQ", "IVF_HNSW_SQ")
+
+
+class GerenciadorIndiceVetorial:
+    """Gerencia o indice ANN da coluna vetorial de um LanceDb do agno."""
+
+    def __init__(
+        self,
+        vector_db,
+        tipo: str = "IVF_PQ",
+        metrica: str = "cosine",
+        nprobes: int = 20,
+        refine_factor: Optional[int] = None,
+        limite_nao_indexadas: int = 10_000,
+        min_linhas: int = 5_000,
+    ):
+        """
+        Inicializa o gerenciador.
+
+        Args:
+            vector_db: LanceDb do agno com a tabela de embeddings
+            tipo: Tipo de indice (IVF_PQ ou IVF_HNSW_SQ)
+            metrica: Metrica de distancia (cosine, l2 ou dot)
+            nprobes: Particoes visitadas por busca (mais = maior recall)
+            refine_factor: Multiplicador de candidatos reavaliados com vetor completo
+            limite_nao_indexadas: Linhas novas que disparam a reconstrucao do indice
+            min_linhas: Tamanho minimo da tabela para valer a pena indexar
+        """
+        if tipo not in TIPOS_INDICE:
+            raise ValueError(f"Tipo de indice invalido: {tipo}. Use um de {TIPOS_INDICE}")
+        self.vector_db = vector_db
+        self.tipo = tipo
+        self.metrica = metrica
+        self.nprobes = nprobes
+        self.refine_factor = refine_factor
+        self.limite_nao_indexadas = limite_nao_indexadas
+        self.min_linhas = min_linhas
+        self.coluna = getattr(vector_db, "_vector_col", "vector")
+
+    @property
+    def tabela(self):
+        """Tabela do LanceDB (None antes da primeira ingestao)."""
+        return self.vector_db.table
+
+    def _nome_indice(self) -> Optional[str]:
+        """Nome do indice existente na coluna vetorial, se houver."""
+        for indice in self.tabela.list_indices():
+            if self.coluna in indice.columns and indice.index_type != "FTS":
+                return indice.name
+        return None
+
+    def estatisticas(self) -> Dict:
+        """Retorna total de linhas, linhas indexadas/nao indexadas e tipo do indice."""
+        if self.tabela is None:
+            return {"indice": None, "total": 0, "indexadas": 0, "nao_indexadas": 0}
+        total = self.tabela.count_rows()
+        nome = self._nome_indice()
+        if nome is None:
+            return {"indice": None, "total": total, "indexadas": 0, "nao_indexadas": total}
+
+        stats = self.tabela.index_stats(nome)
+        return {
+            "indice": nome,
+            "tipo": stats.index_type,
+            "total": total,
+            "indexadas": stats.num_indexed_rows,
+            "nao_indexadas": stats.num_unindexed_rows,
+        }
+
+    def _num_sub_vetores(self, dimensoes: int) -> int:
+        """Escolhe sub-vetores do PQ (divisor de dimensoes, ~8 dimensoes cada)."""
+        for candidato in range(max(1, dimensoes // 8), 0, -1):
+            if dimensoes % candidato == 0:
+                return candidato
+        return 1
+
+    def criar_indice(self, forcar: bool = False) -> bool:
+        """
+        Cria (ou recria) o indice ANN.
+
+        Args:
+            forcar: Cria mesmo abaixo do minimo de linhas
+
+        Returns:
+            True se o indice foi criado
+        """
+        if self.tabela is None:
+            print("Tabela ainda nao criada: carregue os documentos antes de indexar")
+            return False
+        total = self.tabela.count_rows()
+        if total < self.min_linhas and not forcar:
+            print(f"Tabela com {total} linhas (< {self.min_linhas}): busca exata e suficiente")
+            return False
+
+        dimensoes = self.vector_db.embedder.dimensions
+        parametros = {
+            "metric": self.metrica,
+            "num_partitions": max(1, int(math.sqrt(total))),
+            "vector_column_name": self.coluna,
+            "replace": True,
+            "index_type": self.tipo,
+        }
+        if self.tipo == "IVF_PQ":
+            parametros["num_sub_vectors"] = self._num_sub_vetores(dimensoes)
+
+        inicio = time.perf_counter()
+        self.tabela.create_index(**parametros)
+        print(f"Indice {self.tipo} criado em {time.perf_counter() - inicio:.1f}s ({total} linhas)")
+        return True
+
+    def atualizar(self) -> bool:
+        """
+        Cria o indice se ainda nao existir ou o reconstroi quando ha linhas
+        demais fora dele.
+
+        Returns:
+            True se o indice foi criado ou reconstruido
+        """
+        estatisticas = self.estatisticas()
+        if estatisticas["indice"] is None:
+            return self.criar_indice()
+        if estatisticas["nao_indexadas"] >= self.limite_nao_indexadas:
+            print(f"{estatisticas['nao_indexadas']} linhas fora do indice: reconstruindo...")
+            return self.criar_indice()
+        return False
+
+    def buscar(self, query: str, limite: int = 5, incluir_vetor: bool = False) -> List[Dict]:
+        """
+        Busca vetorial com os parametros de recall/latencia configurados.
+
+        Args:
+            query: Texto da consulta
+            limite: Quantidade de documentos
+            incluir_vetor: Inclui o embedding de cada documento em "vetor"
+
+        Returns:
+            Lista de documentos {id, name, meta_data, content, distancia}
+        """
+        if self.tabela is None:
+            return []
+        vetor = self.vector_db.embedder.get_embedding(query)
+        consulta = (
+            self.tabela.search(vetor, vector_column_name=self.coluna)
+            .metric(self.metrica)
+            .nprobes(self.nprobes)
+            .limit(limite)
+        )
+        if self.refine_factor:
+            consulta = consulta.refine_factor(self.refine_factor)
+
+        documentos = []
+        for linha in consulta.to_list():
+            payload = json.loads(linha["payload"])
+            documento = {
+                "id": linha["id"],
+                "name": payload.get("name"),
+                "meta_data": payload.get("meta_data", {}),
+                "content": payload.get("content", ""),
+                "distancia": linha.get("_distance"),
+            }
+            if incluir_vetor:
+                documento["vetor"] = linha[self.coluna]
+            documentos.append(documento)
+        return documentos
+
+    def retriever(self, agent=None, query: str = "", num_documents: Optional[int] = None, **kwargs) -> List[Dict]:
+        """Retriever compativel com o parametro `retriever` do Agent do agno."""
+        return self.buscar(query, limite=num_documents or 5)
+
+
+def main():
+    """Cria ou atualiza o indice vetorial pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Gerencia o indice ANN do LanceDB")
+    parser.add_argument("--tabela", default="recipes")
+    parser.add_argument("--uri", default="lancedb")
+    parser.add_argument("--tipo", default="IVF_PQ", choices=TIPOS_INDICE)
+    parser.add_argument("--nprobes", type=int, default=20)
+    parser.add_argument("--refine-factor", type=int, default=None)
+    parser.add_argument("--forcar", action="store_true", help="Recria o indice mesmo sem necessidade")
+    args = parser.parse_args()
+
+    gerenciador = GerenciadorIndiceVetorial(
+        obter_vector_db(table_name=args.tabela, uri=args.uri),
+        tipo=args.tipo,
+        nprobes=args.nprobes,
+        refine_factor=args.refine_factor,
+    )
+    if args.forcar:
+        gerenciador.criar_indice(forcar=True)
+    else:
+        gerenciador.atualizar()
+    print(gerenciador.estatisticas())
+
+
+if __name__ == "__main__":
+    main()
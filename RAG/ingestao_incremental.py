@@ -0,0 +1,238 @@
+"""
+IngestaoIncremental - Carga incremental da base de conhecimento
+===============================================================
+
+Mantem um manifesto dos PDFs ja vetorizados (caminho, tamanho, mtime,
+hash do conteudo e ids dos chunks) para que apenas arquivos novos ou
+alterados sejam processados, e os vetores de arquivos removidos sejam
+apagados da tabela do LanceDB.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ingestao_paralela import PipelineIngestao, apagar_ids, atualizar_indice_textual
+
+
+@dataclass
+class RelatorioIngestao:
+    """Contadores de uma execucao da ingestao incremental."""
+
+    arquivos_ignorados: int = 0
+    arquivos_adicionados: int = 0
+    arquivos_atualizados: int = 0
+    arquivos_removidos: int = 0
+    chunks_ignorados: int = 0
+    chunks_adicionados: int = 0
+    chunks_removidos: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"Arquivos: {self.arquivos_ignorados} ignorados, "
+            f"{self.arquivos_adicionados} adicionados, "
+            f"{self.arquivos_atualizados} atualizados, "
+            f"{self.arquivos_removidos} removidos | "
+            f"Chunks: {self.chunks_ignorados} ignorados, "
+            f"{self.chunks_adicionados} adicionados, "
+            f"{self.chunks_removidos} removidos"
+        )
+
+
+def calcular_hash_arquivo(caminho: Path, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o sha256 do conteudo de um arquivo lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class IngestorIncremental:
+    """Sincroniza a pasta de PDFs com o LanceDB usando um manifesto."""
+
+    def __init__(
+        self,
+        knowledge_base,
+        manifesto: Optional[str] = None,
+        tamanho_lote: int = 32,
+        workers: int = 4,
+    ):
+        """
+        Inicializa o ingestor.
+
+        Args:
+            knowledge_base: PDFKnowledgeBase com reader e vector_db configurados
+            manifesto: Arquivo JSON do manifesto (padrao: dentro do uri do LanceDB)
+            tamanho_lote: Quantidade de chunks por lote de embeddings
+            workers: Processos usados na leitura paralela dos PDFs
+        """
+        self.knowledge_base = knowledge_base
+        self.tamanho_lote = tamanho_lote
+        self.workers = workers
+        self.vector_db = knowledge_base.vector_db
+        self.pasta = Path(knowledge_base.path)
+        self.manifesto = Path(
+            manifesto or os.path.join(self.vector_db.uri, f"{self.vector_db.table_name}_manifesto.json")
+        )
+
+    def carregar_manifesto(self) -> Dict[str, Dict]:
+        """Le o manifesto do disco (vazio se ainda nao existir)."""
+        if not self.manifesto.exists():
+            return {}
+        with open(self.manifesto, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def salvar_manifesto(self, entradas: Dict[str, Dict]):
+        """Grava o manifesto de forma atomica."""
+        self.manifesto.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.manifesto.with_suffix(".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(entradas, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, self.manifesto)
+
+    def versao(self) -> str:
+        """
+        Identificador da versao da base de conhecimento.
+
+        Muda sempre que um PDF e adicionado, alterado ou removido, e serve
+        para invalidar caches que dependem do conteudo indexado.
+        """
+        manifesto = self.carregar_manifesto()
+        assinatura = sorted((chave, entrada["sha256"]) for chave, entrada in manifesto.items())
+        return hashlib.sha256(json.dumps(assinatura).encode("utf-8")).hexdigest()[:16]
+
+    def listar_pdfs(self) -> List[Path]:
+        """Lista os PDFs da pasta da base de conhecimento."""
+        if self.pasta.is_file():
+            return [self.pasta] if self.pasta.suffix == ".pdf" else []
+        if not self.pasta.exists():
+            return []
+        return sorted(self.pasta.glob("**/*.pdf"))
+
+    def sincronizar(self) -> RelatorioIngestao:
+        """
+        Vetoriza apenas PDFs novos ou alterados e remove os apagados.
+
+        Returns:
+            Relatorio com arquivos e chunks ignorados, adicionados e removidos
+        """
+        relatorio = RelatorioIngestao()
+        manifesto = self.carregar_manifesto()
+        atual: Dict[str, Dict] = {}
+
+        if not self.vector_db.exists():
+            self.vector_db.create()
+
+        # PDFs novos ou alterados: (chave, caminho, tamanho, mtime, sha256)
+        pendentes: List[Tuple[str, Path, int, float, str]] = []
+        # Arquivos apagados cujos chunks ja sairam do LanceDB
+        removidos: Set[str] = set()
+
+        try:
+            for pdf in self.listar_pdfs():
+                chave = str(pdf.relative_to(self.pasta)) if self.pasta.is_dir() else pdf.name
+                stat = pdf.stat()
+                anterior = manifesto.get(chave)
+
+                # Caminho rapido: tamanho e mtime iguais dispensam o hash
+                if anterior and anterior["tamanho"] == stat.st_size and anterior["mtime"] == stat.st_mtime:
+                    atual[chave] = anterior
+                    relatorio.arquivos_ignorados += 1
+                    relatorio.chunks_ignorados += len(anterior["chunk_ids"])
+                    continue
+
+                sha256 = calcular_hash_arquivo(pdf)
+                if anterior and anterior["sha256"] == sha256:
+                    atual[chave] = dict(anterior, tamanho=stat.st_size, mtime=stat.st_mtime)
+                    relatorio.arquivos_ignorados += 1
+                    relatorio.chunks_ignorados += len(anterior["chunk_ids"])
+                    continue
+
+                if anterior:
+                    relatorio.chunks_removidos += self._remover_chunks(
+                        anterior["chunk_ids"], manifesto, atual, ignorar=chave
+                    )
+                    relatorio.arquivos_atualizados += 1
+                else:
+                    relatorio.arquivos_adicionados += 1
+                pendentes.append((chave, pdf, stat.st_size, stat.st_mtime, sha256))
+
+            chaves_pendentes = {pendente[0] for pendente in pendentes}
+            for chave, anterior in manifesto.items():
+                if chave in atual or chave in chaves_pendentes:
+                    continue
+                relatorio.chunks_removidos += self._remover_chunks(
+                    anterior["chunk_ids"], manifesto, atual, ignorar=chave
+                )
+                removidos.add(chave)
+                relatorio.arquivos_removidos += 1
+
+            relatorio.chunks_adicionados += self._ingerir_pendentes(pendentes, atual)
+            # O pipeline ja reconstroi o indice textual quando grava chunks
+            if relatorio.chunks_removidos and not relatorio.chunks_adicionados:
+                atualizar_indice_textual(self.vector_db)
+        finally:
+            # Uma entrada so sai do manifesto depois que seus chunks foram apagados;
+            # as demais (nao visitadas, nao reprocessadas ou com falha) ficam para a proxima execucao
+            for chave, anterior in manifesto.items():
+                if chave not in atual and chave not in removidos:
+                    atual[chave] = anterior
+            self.salvar_manifesto(atual)
+
+        return relatorio
+
+    def _ingerir_pendentes(
+        self,
+        pendentes: List[Tuple[str, Path, int, float, str]],
+        atual: Dict[str, Dict],
+    ) -> int:
+        """Le, vetoriza e grava os PDFs pendentes pelo pipeline paralelo."""
+        if not pendentes:
+            return 0
+
+        por_caminho = {pdf: (chave, tamanho, mtime, sha256) for chave, pdf, tamanho, mtime, sha256 in pendentes}
+        pipeline = PipelineIngestao(
+            self.knowledge_base.reader,
+            self.vector_db,
+            workers=self.workers,
+            tamanho_lote=self.tamanho_lote,
+        )
+        chunks = 0
+        for pdf, chunk_ids in pipeline.executar(list(por_caminho)):
+            chave, tamanho, mtime, sha256 = por_caminho[pdf]
+            # O manifesto so registra o arquivo depois que seus chunks foram gravados
+            atual[chave] = {
+                "tamanho": tamanho,
+                "mtime": mtime,
+                "sha256": sha256,
+                "chunk_ids": chunk_ids,
+            }
+            chunks += len(chunk_ids)
+        print(f"Pipeline de ingestao: {pipeline.relatorio}")
+        return chunks
+
+    def _remover_chunks(
+        self,
+        chunk_ids: List[str],
+        manifesto: Dict[str, Dict],
+        atual: Dict[str, Dict],
+        ignorar: str,
+    ) -> int:
+        """Apaga chunks de um arquivo preservando os compartilhados com outros."""
+        # Entradas ja processadas nesta execucao substituem as do manifesto
+        em_uso: Set[str] = set()
+        for chave, entrada in {**manifesto, **atual}.items():
+            if chave != ignorar:
+                em_uso.update(entrada["chunk_ids"])
+
+        removiveis = [cid for cid in chunk_ids if cid not in em_uso]
+        self._apagar_ids(removiveis)
+        return len(removiveis)
+
+    def _apagar_ids(self, ids: List[str]):
+        """Remove linhas da tabela do LanceDB pelo id."""
+        apagar_ids(self.vector_db, ids)
@@ -0,0 +1,265 @@
+"""
+IngestaoParalela - Pipeline paralelo de ingestao de PDFs
+========================================================
+
+Extrai o texto e divide os PDFs em chunks em um pool de processos,
+entrega os chunks ao embedder por uma fila limitada (para nao acumular
+documentos em memoria quando o embedder e mais lento que a leitura) e
+grava no LanceDB em lotes grandes.
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from hashlib import md5
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from embedding_lote import gerar_embeddings_em_lote
+
+
+_FIM = object()
+_reader_worker = None
+
+
+def id_chunk(conteudo: str) -> str:
+    """Reproduz o id que o LanceDb do agno atribui a cada documento."""
+    return md5(conteudo.replace("\x00", "\ufffd").encode()).hexdigest()
+
+
+def gravar_documentos(vector_db, documentos: List, embeddings: List[List[float]]):
+    """
+    Grava documentos ja vetorizados na tabela do LanceDb em uma unica escrita.
+
+    Usa o mesmo formato de linha do LanceDb.insert do agno (id, vector,
+    payload), mas sem vetorizar cada documento novamente.
+    """
+    registros = []
+    for documento, embedding in zip(documentos, embeddings):
+        conteudo = documento.content.replace("\x00", "\ufffd")
+        documento.embedding = embedding
+        payload = {
+            "name": documento.name,
+            "meta_data": documento.meta_data,
+            "content": conteudo,
+            "usage": documento.usage,
+        }
+        registros.append({
+            "id": id_chunk(documento.content),
+            "vector": embedding,
+            "payload": json.dumps(payload),
+        })
+    if registros:
+        vector_db.table.add(registros)
+
+
+def apagar_ids(vector_db, ids: List[str], tamanho_lote: int = 500):
+    """Remove linhas da tabela do LanceDB pelo id."""
+    tabela = vector_db.table
+    if tabela is None or not ids:
+        return
+    for inicio in range(0, len(ids), tamanho_lote):
+        lote = ids[inicio:inicio + tamanho_lote]
+        lista = ", ".join(f"'{cid}'" for cid in lote)
+        tabela.delete(f"id IN ({lista})")
+
+
+def atualizar_indice_textual(vector_db, coluna: str = "payload"):
+    """
+    Reconstroi o indice FTS (BM25) da tabela.
+
+    O indice do LanceDB nao acompanha as escritas; sem reconstruir, a busca
+    textual ignora os chunks novos e ainda devolve os apagados.
+    """
+    tabela = vector_db.table
+    if tabela is None:
+        return
+    tabela.create_fts_index(coluna, replace=True)
+
+
+def _inicializar_worker(reader):
+    """Guarda o reader no processo filho para nao reenvia-lo a cada arquivo."""
+    global _reader_worker
+    _reader_worker = reader
+
+
+def _ler_pdf(caminho: Path) -> Tuple[Path, List]:
+    """Extrai e divide em chunks um PDF (executado no processo filho)."""
+    documentos = _reader_worker.read(pdf=caminho)
+    return caminho, [doc for doc in documentos if doc.content]
+
+
+@dataclass
+class RelatorioPipeline:
+    """Progresso e vazao de uma execucao do pipeline."""
+
+    arquivos: int = 0
+    chunks: int = 0
+    segundos: float = 0.0
+
+    @property
+    def chunks_por_segundo(self) -> float:
+        return self.chunks / self.segundos if self.segundos else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.arquivos} PDFs | {self.chunks} chunks | "
+            f"{self.segundos:.1f}s | {self.chunks_por_segundo:.1f} chunks/s"
+        )
+
+
+class PipelineIngestao:
+    """Leitura paralela, vetorizacao em lote e gravacao em massa de PDFs."""
+
+    def __init__(
+        self,
+        reader,
+        vector_db,
+        workers: int = 4,
+        tamanho_lote: int = 32,
+        tamanho_gravacao: int = 512,
+        tamanho_fila: int = 8,
+        intervalo_progresso: float = 5.0,
+    ):
+        """
+        Inicializa o pipeline.
+
+        Args:
+            reader: Reader do agno usado para extrair e dividir os PDFs
+            vector_db: LanceDb de destino (com embedder configurado)
+            workers: Processos dedicados a leitura dos PDFs
+            tamanho_lote: Chunks por lote de embeddings
+            tamanho_gravacao: Chunks acumulados antes de cada escrita no LanceDB
+            tamanho_fila: Maximo de PDFs lidos aguardando o embedder
+            intervalo_progresso: Segundos entre mensagens de progresso
+        """
+        self.reader = reader
+        self.vector_db = vector_db
+        self.workers = workers
+        self.tamanho_lote = tamanho_lote
+        self.tamanho_gravacao = tamanho_gravacao
+        self.tamanho_fila = tamanho_fila
+        self.intervalo_progresso = intervalo_progresso
+        self.relatorio = RelatorioPipeline()
+
+    def executar(self, pdfs: List[Path]) -> Iterator[Tuple[Path, List[str]]]:
+        """
+        Processa os PDFs e devolve cada arquivo assim que todos os seus chunks forem gravados.
+
+        Yields:
+            Tuplas (caminho do PDF, ids dos chunks gravados)
+        """
+        self.relatorio = RelatorioPipeline()
+        if not pdfs:
+            return
+
+        fila: "queue.Queue" = queue.Queue(maxsize=self.tamanho_fila)
+        erro: List[BaseException] = []
+        parar = threading.Event()
+        produtor = threading.Thread(target=self._produzir, args=(pdfs, fila, erro, parar), daemon=True)
+        inicio = time.perf_counter()
+        ultimo_progresso = inicio
+        produtor.start()
+
+        pendentes: List = []
+        arquivos_pendentes: Dict[Path, List[str]] = {}
+        # Chunks repetidos (no mesmo PDF ou entre PDFs) sao gravados uma unica vez
+        vistos: Set[str] = set()
+        try:
+            while True:
+                item = fila.get()
+                if item is _FIM:
+                    break
+                caminho, documentos = item
+                chunk_ids = [id_chunk(doc.content) for doc in documentos]
+                novos = {}
+                for chunk_id, documento in zip(chunk_ids, documentos):
+                    if chunk_id not in vistos:
+                        novos.setdefault(chunk_id, documento)
+                vistos.update(novos)
+
+                # Remove restos de cargas anteriores sem manifesto para nao duplicar
+                apagar_ids(self.vector_db, list(novos))
+                arquivos_pendentes[caminho] = chunk_ids
+                pendentes.extend(novos.values())
+
+                if len(pendentes) >= self.tamanho_gravacao:
+                    self._gravar(pendentes)
+                    pendentes = []
+                    yield from self._concluir(arquivos_pendentes)
+
+                agora = time.perf_counter()
+                if agora - ultimo_progresso >= self.intervalo_progresso:
+                    self.relatorio.segundos = agora - inicio
+                    print(f"  Ingestao: {self.relatorio.arquivos}/{len(pdfs)} {self.relatorio}")
+                    ultimo_progresso = agora
+
+            if erro:
+                raise erro[0]
+
+            self._gravar(pendentes)
+            if self.relatorio.chunks:
+                atualizar_indice_textual(self.vector_db)
+            yield from self._concluir(arquivos_pendentes)
+            self.relatorio.segundos = time.perf_counter() - inicio
+        finally:
+            # Em erro ou abandono do gerador: interrompe a leitura e libera o produtor
+            parar.set()
+            while produtor.is_alive():
+                try:
+                    fila.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            produtor.join()
+
+    def _produzir(self, pdfs: List[Path], fila: "queue.Queue", erro: List[BaseException], parar: threading.Event):
+        """Le os PDFs no pool de processos e os coloca na fila limitada ate `parar` ser sinalizado."""
+        try:
+            if self.workers <= 1:
+                _inicializar_worker(self.reader)
+                for pdf in pdfs:
+                    if parar.is_set():
+                        return
+                    fila.put(_ler_pdf(pdf))
+                return
+
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_inicializar_worker,
+                initargs=(self.reader,),
+            )
+            try:
+                futuros = [pool.submit(_ler_pdf, pdf) for pdf in pdfs]
+                for futuro in as_completed(futuros):
+                    if parar.is_set():
+                        return
+                    fila.put(futuro.result())
+            finally:
+                # Cancela os PDFs ainda nao iniciados em vez de esperar por todos
+                pool.shutdown(wait=True, cancel_futures=True)
+        except BaseException as e:
+            erro.append(e)
+        finally:
+            fila.put(_FIM)
+
+    def _gravar(self, documentos: List):
+        """Vetoriza os chunks acumulados em lote e grava de uma vez."""
+        if not documentos:
+            return
+        embeddings = gerar_embeddings_em_lote(
+            self.vector_db.embedder,
+            [doc.content for doc in documentos],
+            self.tamanho_lote,
+        )
+        gravar_documentos(self.vector_db, documentos, embeddings)
+        self.relatorio.chunks += len(documentos)
+
+    def _concluir(self, arquivos_pendentes: Dict[Path, List[str]]) -> Iterator[Tuple[Path, List[str]]]:
+        """Libera os arquivos cujos chunks ja foram todos gravados."""
+        for caminho, chunk_ids in list(arquivos_pendentes.items()):
+            self.relatorio.arquivos += 1
+            yield caminho, chunk_ids
+        arquivos_pendentes.clear()
@@ -0,0 +1,213 @@
+"""
+LotePerguntas - Execucao de milhares de perguntas em lote
+=========================================================
+
+Le perguntas de um arquivo (.txt com uma por linha, .jsonl ou .json com
+{"id", "pergunta"}) ou de um iteravel, responde com concorrencia limitada
+e limite de taxa por provedor, e grava cada resultado em JSONL assim que
+termina. Perguntas ja respondidas no arquivo de saida sao puladas, o que
+permite retomar a execucao apos uma queda.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, Union
+
+
+class LimitadorTaxa:
+    """Balde de fichas: no maximo `por_minuto` liberacoes por minuto."""
+
+    def __init__(self, por_minuto: float, rajada: Optional[int] = None):
+        self.por_minuto = por_minuto
+        self.capacidade = rajada or max(1, int(por_minuto // 60))
+        self._fichas = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia ate haver uma ficha disponivel."""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.por_minuto / 60)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) * 60 / self.por_minuto
+            time.sleep(espera)
+
+
+_limitadores: Dict[str, LimitadorTaxa] = {}
+_trava_limitadores = threading.Lock()
+
+
+def obter_limitador(provedor: str, por_minuto: float) -> LimitadorTaxa:
+    """Limitador compartilhado no processo para o provedor (ex.: base_url do modelo)."""
+    with _trava_limitadores:
+        limitador = _limitadores.get(provedor)
+        if limitador is None or limitador.por_minuto != por_minuto:
+            limitador = _limitadores[provedor] = LimitadorTaxa(por_minuto)
+        return limitador
+
+
+def id_pergunta(pergunta: str) -> str:
+    """Id estavel da pergunta (hash do texto normalizado)."""
+    return hashlib.sha256(" ".join(pergunta.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+
+def _item(valor: Union[str, Dict]) -> Dict:
+    if isinstance(valor, str):
+        return {"id": id_pergunta(valor), "pergunta": valor}
+    pergunta = valor.get("pergunta") or valor.get("question") or ""
+    return {**valor, "id": str(valor.get("id") or id_pergunta(pergunta)), "pergunta": pergunta}
+
+
+def ler_perguntas(origem: Union[str, Iterable[Union[str, Dict]]]) -> Iterator[Dict]:
+    """
+    Le perguntas de um arquivo ou iteravel.
+
+    Args:
+        origem: Caminho .txt/.jsonl/.json ou iteravel de textos/dicts
+
+    Returns:
+        Iterador de {id, pergunta, ...}
+    """
+    if not isinstance(origem, str):
+        for valor in origem:
+            item = _item(valor)
+            if item["pergunta"].strip():
+                yield item
+        return
+
+    with open(origem, "r", encoding="utf-8") as f:
+        if origem.endswith(".json"):
+            linhas = json.load(f)
+        elif origem.endswith(".jsonl"):
+            linhas = (json.loads(linha) for linha in f if linha.strip())
+        else:
+            linhas = (linha.strip() for linha in f)
+        for valor in linhas:
+            item = _item(valor)
+            if item["pergunta"].strip():
+                yield item
+
+
+def ids_respondidos(saida: str) -> Set[str]:
+    """Ids ja respondidos com sucesso no JSONL de saida."""
+    if not os.path.exists(saida):
+        return set()
+    respondidos = set()
+    with open(saida, "r", encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                # Ultima linha truncada por uma queda
+                continue
+            if not registro.get("erro"):
+                respondidos.add(registro["id"])
+    return respondidos
+
+
+@dataclass
+class RelatorioLote:
+    """Contadores de uma execucao em lote."""
+
+    total: int = 0
+    puladas: int = 0
+    respondidas: int = 0
+    erros: int = 0
+    segundos: float = 0.0
+
+    @property
+    def perguntas_por_minuto(self) -> float:
+        return self.respondidas / (self.segundos / 60) if self.segundos else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Lote: {self.respondidas}/{self.total - self.puladas} respondidas, "
+            f"{self.puladas} ja respondidas, {self.erros} erros | "
+            f"{self.segundos:.1f}s | {self.perguntas_por_minuto:.1f} perguntas/min"
+        )
+
+
+def executar_lote(
+    responder: Callable[[Dict], Dict],
+    perguntas: Union[str, Iterable[Union[str, Dict]]],
+    saida: str,
+    concorrencia: int = 4,
+    retomar: bool = True,
+    tentativas: int = 3,
+    intervalo_progresso: float = 10.0,
+) -> RelatorioLote:
+    """
+    Responde as perguntas em paralelo gravando cada resultado no JSONL.
+
+    Args:
+        responder: Funcao que recebe {id, pergunta} e retorna os campos do resultado
+        perguntas: Arquivo ou iteravel de perguntas
+        saida: Arquivo JSONL de resultados (anexado)
+        concorrencia: Perguntas respondidas ao mesmo tempo
+        retomar: Pula perguntas ja respondidas com sucesso em `saida`
+        tentativas: Tentativas por pergunta antes de registrar o erro
+        intervalo_progresso: Segundos entre mensagens de progresso
+    """
+    relatorio = RelatorioLote()
+    respondidos = ids_respondidos(saida) if retomar else set()
+    trava = threading.Lock()
+    inicio = time.perf_counter()
+    ultimo_progresso = [inicio]
+
+    def processar(item: Dict) -> Dict:
+        for tentativa in range(1, tentativas + 1):
+            try:
+                return {"id": item["id"], "pergunta": item["pergunta"], **responder(item), "erro": None}
+            except Exception as exc:
+                if tentativa == tentativas:
+                    return {"id": item["id"], "pergunta": item["pergunta"], "erro": f"{type(exc).__name__}: {exc}"}
+                time.sleep(2 ** tentativa)
+
+    def gravar(resultado: Dict):
+        with trava:
+            arquivo.write(json.dumps({**resultado, "timestamp": time.time()}, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            if resultado["erro"]:
+                relatorio.erros += 1
+            else:
+                relatorio.respondidas += 1
+            agora = time.perf_counter()
+            if agora - ultimo_progresso[0] >= intervalo_progresso:
+                ultimo_progresso[0] = agora
+                relatorio.segundos = agora - inicio
+                print(f"  [lote] {relatorio}")
+
+    diretorio = os.path.dirname(saida)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+    with open(saida, "a", encoding="utf-8") as arquivo, ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        pendentes = set()
+        for item in ler_perguntas(perguntas):
+            relatorio.total += 1
+            if item["id"] in respondidos:
+                relatorio.puladas += 1
+                continue
+            # Mantem a fila curta para nao carregar milhares de perguntas de uma vez
+            while len(pendentes) >= concorrencia * 2:
+                concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    gravar(futuro.result())
+            pendentes.add(executor.submit(processar, item))
+            respondidos.add(item["id"])
+
+        for futuro in wait(pendentes).done:
+            gravar(futuro.result())
+
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
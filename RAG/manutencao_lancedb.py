@@ -0,0 +1,130 @@
+"""
+ManutencaoLanceDB - Compactacao e limpeza da tabela vetorial
+============================================================
+
+Cada ingestao deixa um novo manifesto em `_versions`, arquivos em
+`_transactions` e pequenos fragmentos de dados, o que aumenta o uso de
+disco e a latencia das varreduras. Este modulo compacta os fragmentos,
+remove versoes mais antigas que a janela de retencao, otimiza os
+indices e informa fragmentos, bytes e latencia antes e depois.
+
+A operacao pode rodar com o RAG atendendo leituras: o LanceDB e
+versionado (MVCC), leitores continuam na versao que abriram, e so sao
+apagadas versoes mais antigas que a retencao (minimo de 1 hora), nunca
+arquivos ainda nao verificados.
+
+Uso (na raiz do projeto):
+    python RAG/manutencao_lancedb.py --retencao-dias 7
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import timedelta
+from typing import Dict
+
+from indice_vetorial import GerenciadorIndiceVetorial
+from registro_componentes import obter_vector_db
+from utilitarios_benchmark import percentil, tamanho_diretorio
+
+
+RETENCAO_MINIMA = timedelta(hours=1)
+
+
+def estatisticas_tabela(vector_db, consultas: int = 20) -> Dict:
+    """Fragmentos, versoes, bytes em disco e latencia de busca da tabela."""
+    caminho = os.path.join(vector_db.uri, f"{vector_db.table_name}.lance")
+
+    def contar(subdiretorio: str) -> int:
+        pasta = os.path.join(caminho, subdiretorio)
+        return len(os.listdir(pasta)) if os.path.isdir(pasta) else 0
+
+    tabela = vector_db.table
+    dimensoes = vector_db.embedder.dimensions
+    sorteio = random.Random(0)
+    latencias = []
+    for _ in range(consultas):
+        vetor = [sorteio.uniform(-1, 1) for _ in range(dimensoes)]
+        inicio = time.perf_counter()
+        tabela.search(vetor).limit(10).to_list()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        "linhas": tabela.count_rows(),
+        "fragmentos": contar("data"),
+        "versoes": contar("_versions"),
+        "transacoes": contar("_transactions"),
+        "bytes": tamanho_diretorio(caminho),
+        "latencia_p50_ms": percentil(latencias, 50),
+        "latencia_p95_ms": percentil(latencias, 95),
+    }
+
+
+def executar_manutencao(
+    vector_db,
+    retencao: timedelta = timedelta(days=7),
+    reconstruir_fts: bool = False,
+) -> Dict:
+    """
+    Compacta fragmentos, remove versoes antigas e otimiza os indices.
+
+    Args:
+        vector_db: LanceDb do agno
+        retencao: Versoes mais novas que isso sao preservadas
+        reconstruir_fts: Recria o indice full-text da coluna payload
+
+    Returns:
+        {antes, depois, segundos}
+    """
+    if retencao < RETENCAO_MINIMA:
+        raise ValueError(f"Retencao minima e {RETENCAO_MINIMA} para nao afetar leitores ativos")
+
+    tabela = vector_db.table
+    antes = estatisticas_tabela(vector_db)
+    inicio = time.perf_counter()
+
+    if hasattr(tabela, "optimize"):
+        # Compacta, remove versoes antigas e incorpora linhas novas aos indices
+        tabela.optimize(cleanup_older_than=retencao, delete_unverified=False)
+    else:
+        tabela.compact_files()
+        tabela.cleanup_old_versions(older_than=retencao, delete_unverified=False)
+
+    GerenciadorIndiceVetorial(vector_db).atualizar()
+    if reconstruir_fts:
+        tabela.create_fts_index("payload", replace=True)
+
+    segundos = time.perf_counter() - inicio
+    depois = estatisticas_tabela(vector_db)
+    return {"antes": antes, "depois": depois, "segundos": segundos}
+
+
+def main():
+    """Executa a manutencao pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Manutencao da tabela do LanceDB")
+    parser.add_argument("--uri", default="lancedb")
+    parser.add_argument("--tabela", default="recipes")
+    parser.add_argument("--retencao-dias", type=float, default=7)
+    parser.add_argument("--reconstruir-fts", action="store_true")
+    args = parser.parse_args()
+
+    vector_db = obter_vector_db(table_name=args.tabela, uri=args.uri)
+    resultado = executar_manutencao(
+        vector_db,
+        retencao=timedelta(days=args.retencao_dias),
+        reconstruir_fts=args.reconstruir_fts,
+    )
+
+    print(f"Manutencao concluida em {resultado['segundos']:.1f}s\n")
+    print(f"{'':20}{'antes':>15}{'depois':>15}")
+    for chave in resultado["antes"]:
+        antes, depois = resultado["antes"][chave], resultado["depois"][chave]
+        if isinstance(antes, float):
+            print(f"{chave:20}{antes:>15.2f}{depois:>15.2f}")
+        else:
+            print(f"{chave:20}{antes:>15}{depois:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+MetricasResposta - Instrumentacao de tempo das respostas do RAG
+===============================================================
+
+Registro por pergunta com tempo de recuperacao, quantidade e tamanho dos
+chunks recuperados, tokens do prompt, tempo ate o primeiro token, tempo
+total de geracao e tokens por segundo. Os registros podem ser anexados a
+um arquivo JSONL local para acompanhar p50/p95 ao longo do tempo.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class MetricasResposta:
+    """Tempos e tamanhos de uma pergunta respondida."""
+
+    pergunta: str
+    timestamp: float = field(default_factory=time.time)
+    cache: bool = False
+    coalescida: bool = False
+    recuperacao_ms: float = 0.0
+    latencia_busca: Dict[str, float] = field(default_factory=dict)
+    chunks_recuperados: int = 0
+    caracteres_recuperados: int = 0
+    tokens_contexto_economizados: int = 0
+    tokens_prompt: Optional[int] = None
+    tempo_primeiro_token_ms: Optional[float] = None
+    geracao_ms: float = 0.0
+    total_ms: float = 0.0
+    tokens_resposta: int = 0
+    tokens_por_segundo: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        if self.cache:
+            return f"[metricas] cache semantico | total={self.total_ms:.0f}ms"
+        primeiro = f"{self.tempo_primeiro_token_ms:.0f}ms" if self.tempo_primeiro_token_ms is not None else "-"
+        if self.coalescida:
+            return f"[metricas] coalescida | primeiro token={primeiro} | total={self.total_ms:.0f}ms"
+        busca = ""
+        if self.latencia_busca:
+            busca = (
+                f" [bm25={self.latencia_busca['textual_ms']:.0f}ms "
+                f"vetorial={self.latencia_busca['vetorial_ms']:.0f}ms]"
+            )
+        return (
+            f"[metricas] recuperacao={self.recuperacao_ms:.0f}ms{busca} "
+            f"({self.chunks_recuperados} chunks, {self.caracteres_recuperados} chars, "
+            f"{self.tokens_contexto_economizados} tokens economizados) | "
+            f"prompt={self.tokens_prompt or '-'} tokens | primeiro token={primeiro} | "
+            f"geracao={self.geracao_ms:.0f}ms | {self.tokens_por_segundo:.1f} tokens/s"
+        )
+
+
+# Metricas da pergunta em andamento no contexto atual (thread ou task)
+metricas_atuais: contextvars.ContextVar[Optional[MetricasResposta]] = contextvars.ContextVar(
+    "metricas_atuais", default=None
+)
+
+
+def medir_retriever(retriever: Callable) -> Callable:
+    """Envolve um retriever do agno registrando tempo e volume recuperado."""
+    def retriever_medido(agent=None, query: str = "", num_documents: Optional[int] = None, **kwargs):
+        inicio = time.perf_counter()
+        documentos = retriever(agent=agent, query=query, num_documents=num_documents, **kwargs)
+        metricas = metricas_atuais.get()
+        if metricas is not None:
+            metricas.recuperacao_ms += (time.perf_counter() - inicio) * 1000
+            metricas.chunks_recuperados += len(documentos or [])
+            metricas.caracteres_recuperados += sum(len(doc.get("content", "")) for doc in documentos or [])
+        return documentos
+
+    return retriever_medido
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token)."""
+    return max(1, len(texto) // 4) if texto else 0
+
+
+def extrair_tokens(agente) -> Dict[str, Optional[int]]:
+    """Le os tokens de entrada/saida das metricas da ultima execucao do agente."""
+    run_response = getattr(agente, "run_response", None)
+    metricas = getattr(run_response, "metrics", None) or {}
+
+    def somar(chave: str) -> Optional[int]:
+        valor = metricas.get(chave)
+        if isinstance(valor, list):
+            return sum(valor) if valor else None
+        return valor
+
+    return {"entrada": somar("input_tokens"), "saida": somar("output_tokens")}
+
+
+class MedicaoResposta:
+    """
+    Preenche as MetricasResposta de uma resposta gerada em streaming.
+
+    Usada por todos os pontos de entrada (RagSQLITE.ask, main.py e o
+    servidor HTTP) para que as metricas sejam calculadas do mesmo jeito.
+    """
+
+    def __init__(self, pergunta: str):
+        self.metricas = MetricasResposta(pergunta=pergunta)
+        self.inicio = time.perf_counter()
+        self.inicio_geracao: Optional[float] = None
+        self.partes: List[str] = []
+
+    @contextmanager
+    def ativa(self):
+        """Expoe as metricas em metricas_atuais para o retriever medido (e tarefas criadas aqui)."""
+        token = metricas_atuais.set(self.metricas)
+        try:
+            yield self.metricas
+        finally:
+            metricas_atuais.reset(token)
+
+    def token(self, parte: str):
+        """Registra uma parte da resposta, marcando o tempo ate o primeiro token."""
+        if self.inicio_geracao is None:
+            self.inicio_geracao = time.perf_counter()
+            self.metricas.tempo_primeiro_token_ms = (self.inicio_geracao - self.inicio) * 1000
+        self.partes.append(parte)
+
+    @property
+    def resposta(self) -> str:
+        return "".join(self.partes)
+
+    def concluir(self, agente=None) -> MetricasResposta:
+        """
+        Fecha as metricas da resposta.
+
+        Args:
+            agente: Agente que gerou a resposta, de onde vem a contagem real de
+                tokens (None em acertos de cache e requisicoes coalescidas)
+        """
+        fim = time.perf_counter()
+        metricas = self.metricas
+        if not metricas.cache:
+            tokens = {"entrada": None, "saida": None}
+            if agente is not None and not metricas.coalescida:
+                tokens = extrair_tokens(agente)
+            metricas.tokens_prompt = tokens["entrada"]
+            metricas.tokens_resposta = tokens["saida"] or estimar_tokens(self.resposta)
+            metricas.geracao_ms = (fim - (self.inicio_geracao or fim)) * 1000
+            if metricas.geracao_ms > 0:
+                metricas.tokens_por_segundo = metricas.tokens_resposta / (metricas.geracao_ms / 1000)
+        metricas.total_ms = (fim - self.inicio) * 1000
+        return metricas
+
+
+class LogMetricas:
+    """Arquivo JSONL com um registro de metricas por pergunta."""
+
+    def __init__(self, caminho: str = "metricas_respostas.jsonl"):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+
+    def anexar(self, metricas: MetricasResposta):
+        """Acrescenta um registro ao arquivo."""
+        linha = json.dumps(metricas.to_dict(), ensure_ascii=False)
+        with self._trava:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+
+    def ler(self) -> List[Dict]:
+        """Le todos os registros do arquivo."""
+        if not os.path.exists(self.caminho):
+            return []
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            return [json.loads(linha) for linha in f if linha.strip()]
+
+    def percentis(self, campo: str = "total_ms", percentis=(50, 95)) -> Dict[str, float]:
+        """Calcula percentis de um campo sobre as respostas geradas (sem cache)."""
+        valores = sorted(
+            registro[campo] for registro in self.ler()
+            if not registro.get("cache") and registro.get(campo) is not None
+        )
+        if not valores:
+            return {}
+        return {
+            f"p{p}": valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+            for p in percentis
+        }
@@ -0,0 +1,591 @@
+"""
+ParesQA - Tabela materializada de pares pergunta/resposta
+=========================================================
+
+Mantem no proprio banco de sessoes a tabela `qa_pairs`, com uma linha por
+run (pergunta, resposta, modelo, usuario e data) e indices para listagem,
+busca, estatisticas e exportacao em SQL. A atualizacao e incremental: so
+as sessoes com `updated_at` a partir da ultima sincronizacao tem os runs
+decodificados de novo, e a marca de sincronizacao fica em `qa_pairs_sync`.
+A marca nunca avanca ate o segundo corrente, pois uma sessao ainda pode
+ser gravada nele depois da leitura.
+
+Runs gravados em linhas separadas pelo SqliteStorageIncremental (tabela
+`<tabela>_runs`) tambem sao considerados.
+
+Os runs guardam mensagens, chamadas de ferramentas e metricas, mas so
+alguns campos interessam aqui: eles sao extraidos pelo proprio SQLite
+(json_each/json_extract), sem montar cada run como objeto Python. Blobs que
+o SQLite nao consegue ler caem na decodificacao completa em Python. Para
+comparar as duas abordagens:
+
+    python RAG/pares_qa.py --db data.db --benchmark
+
+Perguntas e respostas sao indexadas em `qa_pairs_fts` (FTS5, tokenizador
+unicode61 sem acentos), mantida por triggers, para busca por palavras
+com ranking bm25, frases ("..."), prefixos (termo*) e trechos destacados.
+"""
+
+import argparse
+import ast
+import json
+import re
+import sqlite3
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+COLUNAS_PAR = ("session_id", "numero", "run_id", "user_id", "model", "pergunta", "resposta", "created_at")
+
+
+def decodificar_json(valor: Any) -> Any:
+    """Decodifica JSON, inclusive valores codificados mais de uma vez."""
+    while isinstance(valor, (str, bytes)):
+        try:
+            valor = json.loads(valor)
+        except ValueError:
+            break
+    return valor
+
+
+def criado_em(run: Any, padrao: Any = 0) -> int:
+    """Epoch do run (inteiro, texto numerico ou ISO 8601) ou o padrao."""
+    valor = run.get("created_at") if isinstance(run, dict) else None
+    for candidato in (valor, padrao):
+        if candidato is None or candidato == "":
+            continue
+        try:
+            return int(float(candidato))
+        except (TypeError, ValueError):
+            pass
+        try:
+            return int(datetime.fromisoformat(str(candidato)).timestamp())
+        except ValueError:
+            pass
+    return 0
+
+
+def _texto(valor: Any) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, str):
+        return valor
+    return json.dumps(valor, ensure_ascii=False, default=str)
+
+
+def consulta_fts(texto: str) -> str:
+    """
+    Converte a busca digitada em uma consulta FTS5 valida.
+
+    Frases entre aspas e termos terminados em * (prefixo) sao mantidos;
+    AND, OR e NOT em maiusculas sao operadores; os demais termos sao
+    citados, para que pontuacao nao gere erro de sintaxe.
+    """
+    partes = []
+    for frase, termo in re.findall(r'"([^"]*)"|(\S+)', texto):
+        if frase.strip():
+            partes.append('"' + frase.replace('"', "") + '"')
+        elif termo in ("AND", "OR", "NOT"):
+            partes.append(termo)
+        elif termo:
+            prefixo = termo.endswith("*")
+            palavra = termo.rstrip("*").replace('"', "")
+            if palavra:
+                partes.append('"' + palavra + '"' + ("*" if prefixo else ""))
+    while partes and partes[-1] in ("AND", "OR", "NOT"):
+        partes.pop()
+    while partes and partes[0] in ("AND", "OR"):
+        partes.pop(0)
+    return " ".join(partes)
+
+
+def extrair_pergunta(run: Dict) -> str:
+    """
+    Texto da pergunta de um run.
+
+    O campo `input` pode ser um dict, um JSON ou o repr Python de um dict,
+    conforme a versao do agno que gravou o run. Sem `input`, usa a ultima
+    mensagem do usuario.
+    """
+    entrada = run.get("input")
+    if isinstance(entrada, str):
+        texto = entrada
+        entrada = decodificar_json(texto)
+        if isinstance(entrada, str):
+            try:
+                entrada = ast.literal_eval(texto)
+            except (ValueError, SyntaxError):
+                return texto
+    if isinstance(entrada, dict):
+        return _texto(entrada.get("input_content"))
+    if entrada is not None:
+        return _texto(entrada)
+
+    for mensagem in reversed(run.get("messages") or []):
+        if isinstance(mensagem, dict) and mensagem.get("role") == "user":
+            return _texto(mensagem.get("content"))
+    return _texto(run.get("message"))
+
+
+# (run_id, user_id, model, created_at, content, pergunta)
+CamposRun = Tuple[Any, Any, Any, Any, Any, str]
+
+# Campos do run usados em qa_pairs. Mensagens, ferramentas e metricas sao
+# percorridas pelo SQLite, mas nao viram objetos Python.
+_CHAVES_RUN = ("run_id", "user_id", "model", "created_at", "content", "input")
+_CHAVES_SQL = ", ".join(f"'{chave}'" for chave in _CHAVES_RUN)
+
+
+def _campos_extraidos(campos: Dict[str, Tuple[str, Any]]) -> Optional[CamposRun]:
+    """Monta os campos a partir de {chave: (tipo json, valor)}; None se faltar `input`."""
+    if "input_content" in campos:
+        pergunta = _texto(campos["input_content"][1])
+    elif "input" in campos:
+        tipo, valor = campos["input"]
+        # input gravado como texto (JSON ou repr de dict) ainda precisa ser interpretado
+        if tipo == "text":
+            pergunta = extrair_pergunta({"input": valor})
+        else:
+            pergunta = "" if tipo == "object" else _texto(valor)
+    else:
+        # Layout antigo: a pergunta esta nas mensagens, que exigem o run inteiro
+        return None
+    valores = {chave: valor for chave, (_, valor) in campos.items()}
+    return (
+        valores.get("run_id"),
+        valores.get("user_id"),
+        valores.get("model"),
+        valores.get("created_at"),
+        valores.get("content"),
+        pergunta,
+    )
+
+
+def _campos_dict(run: Dict) -> CamposRun:
+    return (
+        run.get("run_id"),
+        run.get("user_id"),
+        run.get("model"),
+        run.get("created_at"),
+        run.get("content"),
+        extrair_pergunta(run),
+    )
+
+
+class TabelaPares:
+    """Tabela `qa_pairs` derivada das sessoes do agno."""
+
+    def __init__(self, conexao: sqlite3.Connection, tabela_sessoes: str = "agno_sessions", tabela: str = "qa_pairs"):
+        """
+        Inicializa a tabela, criando-a se necessario.
+
+        Args:
+            conexao: Conexao com o banco de sessoes
+            tabela_sessoes: Tabela de sessoes do agno
+            tabela: Nome da tabela materializada
+        """
+        self.conexao = conexao
+        self.tabela_sessoes = tabela_sessoes
+        self.tabela = tabela
+        self.tabela_runs = f"{tabela_sessoes}_runs"
+
+        colunas = {linha[1] for linha in conexao.execute(f"PRAGMA table_info({tabela_sessoes})")}
+        if not colunas:
+            raise ValueError(f"Tabela {tabela_sessoes} nao encontrada")
+        self.coluna_runs = "runs" if "runs" in colunas else "memory"
+        self.fts = False
+        self.criar()
+
+    def criar(self):
+        """Cria a tabela, os indices, o indice FTS e a tabela de controle da sincronizacao."""
+        colunas = {linha[1] for linha in self.conexao.execute(f"PRAGMA table_info({self.tabela})")}
+        with self.conexao:
+            if colunas and "id" not in colunas:
+                # Layout anterior, sem rowid estavel para o FTS: a tabela e derivada, recria
+                self.conexao.execute(f"DROP TABLE {self.tabela}")
+                self.conexao.execute(f"DROP TABLE IF EXISTS {self.tabela}_sync")
+            self.conexao.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.tabela} (
+                    id INTEGER PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    numero INTEGER NOT NULL,
+                    run_id TEXT,
+                    user_id TEXT,
+                    model TEXT,
+                    pergunta TEXT NOT NULL DEFAULT '',
+                    resposta TEXT NOT NULL DEFAULT '',
+                    created_at INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (session_id, numero)
+                )
+                """
+            )
+            for coluna in ("created_at", "model", "user_id", "run_id"):
+                self.conexao.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{self.tabela}_{coluna} ON {self.tabela} ({coluna})"
+                )
+            self.conexao.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.tabela}_sync (
+                    tabela TEXT PRIMARY KEY,
+                    sincronizado_ate INTEGER NOT NULL,
+                    sessoes INTEGER NOT NULL,
+                    sincronizado_em REAL NOT NULL
+                )
+                """
+            )
+            # Sem este indice, achar as sessoes alteradas varreria os blobs de runs
+            self.conexao.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.tabela_sessoes}_updated_at "
+                f"ON {self.tabela_sessoes} (updated_at)"
+            )
+            # Paginacao por chave (created_at, session_id) das sessoes
+            self.conexao.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.tabela_sessoes}_created_at_session_id "
+                f"ON {self.tabela_sessoes} (created_at, session_id)"
+            )
+        self._criar_fts()
+
+    def _criar_fts(self):
+        """Cria o indice FTS5 de conteudo externo e os triggers que o mantem."""
+        fts = f"{self.tabela}_fts"
+        existia = self.conexao.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)
+        ).fetchone() is not None
+        try:
+            with self.conexao:
+                self.conexao.execute(
+                    f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                        pergunta, resposta,
+                        content='{self.tabela}', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2',
+                        prefix='2 3'
+                    )
+                    """
+                )
+                novo = f"INSERT INTO {fts} (rowid, pergunta, resposta) VALUES (new.id, new.pergunta, new.resposta);"
+                antigo = (
+                    f"INSERT INTO {fts} ({fts}, rowid, pergunta, resposta) "
+                    "VALUES ('delete', old.id, old.pergunta, old.resposta);"
+                )
+                gatilhos = (("ai", "INSERT", novo), ("ad", "DELETE", antigo), ("au", "UPDATE", antigo + novo))
+                for sufixo, evento, corpo in gatilhos:
+                    self.conexao.execute(
+                        f"CREATE TRIGGER IF NOT EXISTS {self.tabela}_{sufixo} "
+                        f"AFTER {evento} ON {self.tabela} BEGIN {corpo} END"
+                    )
+                if not existia:
+                    # Pares materializados antes do indice existir
+                    self.conexao.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            # SQLite compilado sem FTS5: a busca usa LIKE
+            return
+        self.fts = True
+
+    def buscar(self, consulta: str, limite: int = 20, tamanho_trecho: int = 16) -> List[Dict]:
+        """
+        Busca textual ranqueada (bm25) em perguntas e respostas.
+
+        Args:
+            consulta: Termos, "frases exatas" e prefixos (termo*)
+            limite: Maximo de pares retornados
+            tamanho_trecho: Palavras no trecho destacado
+
+        Returns:
+            Pares com as colunas de qa_pairs, `trecho` e `relevancia`
+            (menor e melhor)
+        """
+        consulta = consulta_fts(consulta)
+        if not consulta:
+            return []
+        fts = f"{self.tabela}_fts"
+        # Ranqueia so com o indice e gera trechos apenas para os pares retornados
+        cursor = self.conexao.execute(
+            f"""
+            WITH melhores AS (
+                SELECT rowid, bm25({fts}, 2.0, 1.0) AS relevancia
+                FROM {fts} WHERE {fts} MATCH :consulta
+                ORDER BY relevancia LIMIT :limite
+            )
+            SELECT p.*, snippet({fts}, -1, '[', ']', '...', :trecho) AS trecho, m.relevancia
+            FROM melhores m
+            JOIN {fts} ON {fts}.rowid = m.rowid AND {fts} MATCH :consulta
+            JOIN {self.tabela} p ON p.id = m.rowid
+            ORDER BY m.relevancia
+            """,
+            {"consulta": consulta, "limite": limite, "trecho": tamanho_trecho},
+        )
+        nomes = [coluna[0] for coluna in cursor.description]
+        return [dict(zip(nomes, linha)) for linha in cursor]
+
+    def _marca(self) -> Tuple[int, int]:
+        linha = self.conexao.execute(
+            f"SELECT sincronizado_ate, sessoes FROM {self.tabela}_sync WHERE tabela = ?",
+            (self.tabela_sessoes,),
+        ).fetchone()
+        return (linha[0], linha[1]) if linha else (-1, 0)
+
+    def _tem_tabela_runs(self) -> bool:
+        return self.conexao.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.tabela_runs,)
+        ).fetchone() is not None
+
+    def _expr_runs(self) -> str:
+        """Expressao SQL com a lista JSON de runs da linha da sessao."""
+        coluna = self.coluna_runs
+        # Blob codificado duas vezes: a string JSON externa e desembrulhada uma vez
+        desembrulhada = f"CASE WHEN substr({coluna}, 1, 1) = '\"' THEN json_extract({coluna}, '$') ELSE {coluna} END"
+        if coluna == "memory":
+            return f"json_extract({desembrulhada}, '$.runs')"
+        return desembrulhada
+
+    def _ler_runs_sql(self, session_id: str) -> Optional[Dict[int, CamposRun]]:
+        """
+        Campos dos runs do blob extraidos pelo SQLite em uma unica leitura (json_tree).
+
+        Returns:
+            {indice: campos}, ou None se o blob precisar da decodificacao
+            completa (JSON invalido, codificado mais de duas vezes ou runs
+            sem `input`)
+        """
+        try:
+            linhas = self.conexao.execute(
+                f"""
+                SELECT t.path, t.key, t.type, CASE WHEN t.path = '$' THEN NULL ELSE t.value END
+                FROM {self.tabela_sessoes} s, json_tree({self._expr_runs()}) t
+                WHERE s.session_id = ?
+                  AND (t.parent IS NULL
+                       OR (t.path = '$' AND t.type = 'object')
+                       OR (t.key IN ({_CHAVES_SQL}) AND t.path LIKE '$[%]' AND t.path NOT LIKE '%.%')
+                       OR (t.key = 'input_content' AND t.path LIKE '$[%].input' AND t.path NOT LIKE '%.%.%'))
+                """,
+                (session_id,),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return None
+
+        campos: Dict[int, Dict[str, Tuple[str, Any]]] = {}
+        for caminho, chave, tipo, valor in linhas:
+            if caminho == "$" and chave is None:
+                if tipo not in ("array", "null"):
+                    return None
+            elif caminho == "$":
+                campos.setdefault(chave, {})
+            else:
+                indice = int(caminho[2 : caminho.index("]")])
+                campos.setdefault(indice, {})[chave] = (tipo, valor)
+
+        runs = {}
+        for indice, valores in campos.items():
+            extraidos = _campos_extraidos(valores)
+            if extraidos is None:
+                return None
+            runs[indice] = extraidos
+        return runs
+
+    def _ler_runs_python(self, session_id: str) -> Dict[int, CamposRun]:
+        """Campos dos runs do blob decodificando o JSON inteiro no Python."""
+        linha = self.conexao.execute(
+            f"SELECT {self.coluna_runs} FROM {self.tabela_sessoes} WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        dados = decodificar_json(linha[0]) if linha else None
+        runs = dados.get("runs") if isinstance(dados, dict) else dados
+        if not isinstance(runs, list):
+            return {}
+        return {indice: _campos_dict(run) for indice, run in enumerate(runs) if isinstance(run, dict)}
+
+    def _ler_tabela_runs(self, session_id: str) -> Dict[int, CamposRun]:
+        """Campos dos runs gravados em linhas separadas (SqliteStorageIncremental)."""
+        campos: Dict[int, Dict[str, Tuple[str, Any]]] = {}
+        for indice, caminho, chave, tipo, valor in self.conexao.execute(
+            f"""
+            SELECT r.indice, t.path, t.key, t.type, CASE WHEN t.key IS NULL THEN NULL ELSE t.value END
+            FROM {self.tabela_runs} r, json_tree(r.run) t
+            WHERE r.session_id = ? AND json_valid(r.run) AND json_type(r.run) = 'object'
+              AND ((t.path = '$' AND (t.key IS NULL OR t.key IN ({_CHAVES_SQL})))
+                   OR (t.path = '$.input' AND t.key = 'input_content'))
+            """,
+            (session_id,),
+        ):
+            run = campos.setdefault(indice, {})
+            if chave is not None:
+                run[chave] = (tipo, valor)
+
+        runs = {}
+        for indice, valores in campos.items():
+            extraidos = _campos_extraidos(valores)
+            if extraidos is None:
+                linha = self.conexao.execute(
+                    f"SELECT run FROM {self.tabela_runs} WHERE session_id = ? AND indice = ?", (session_id, indice)
+                ).fetchone()
+                extraidos = _campos_dict(decodificar_json(linha[0]))
+            runs[indice] = extraidos
+        return runs
+
+    def _runs_da_sessao(self, session_id: str, com_tabela_runs: bool) -> Dict[int, CamposRun]:
+        runs = self._ler_runs_sql(session_id)
+        if runs is None:
+            runs = self._ler_runs_python(session_id)
+        if com_tabela_runs:
+            runs.update(self._ler_tabela_runs(session_id))
+        return runs
+
+    def runs_completos(self, session_id: str) -> List[Any]:
+        """
+        Runs completos da sessao, como o SqliteStorageIncremental.read os recompoe.
+
+        Primeiro os da tabela de runs, em ordem; depois os que estao so no
+        blob da sessao (gravados por um SqliteStorage comum), pelo run_id.
+        """
+        linha = self.conexao.execute(
+            f"SELECT {self.coluna_runs} FROM {self.tabela_sessoes} WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        dados = decodificar_json(linha[0]) if linha else None
+        blob = dados.get("runs") if isinstance(dados, dict) else dados
+        if not isinstance(blob, list):
+            blob = []
+        if not self._tem_tabela_runs():
+            return blob
+
+        runs = [
+            decodificar_json(linha[0])
+            for linha in self.conexao.execute(
+                f"SELECT run FROM {self.tabela_runs} WHERE session_id = ? ORDER BY indice", (session_id,)
+            )
+        ]
+        gravados = {run.get("run_id") for run in runs if isinstance(run, dict)}
+        return runs + [run for run in blob if not isinstance(run, dict) or run.get("run_id") not in gravados]
+
+    def _linhas(
+        self, session_id: str, user_id: Optional[str], runs: Dict[int, CamposRun], padrao: Any
+    ) -> Iterator[Tuple]:
+        for indice in sorted(runs):
+            run_id, usuario, modelo, criado, conteudo, pergunta = runs[indice]
+            yield (
+                session_id,
+                indice + 1,
+                run_id or "",
+                usuario or user_id or "",
+                modelo or "",
+                pergunta,
+                _texto(conteudo),
+                criado_em({"created_at": criado}, padrao),
+            )
+
+    def sincronizar(self, completo: bool = False) -> Dict[str, int]:
+        """
+        Atualiza a tabela com as sessoes alteradas desde a ultima sincronizacao.
+
+        Sessoes removidas so sao detectadas quando o numero de sessoes cai
+        ou com `completo=True`, que tambem reprocessa todas as sessoes.
+
+        Returns:
+            {sessoes, pares, removidas}
+        """
+        marca, sessoes_antes = (-1, 0) if completo else self._marca()
+        agora = int(time.time())
+        com_tabela_runs = self._tem_tabela_runs()
+        alteradas = self.conexao.execute(
+            f"""
+            SELECT session_id, user_id, created_at, updated_at
+            FROM {self.tabela_sessoes}
+            WHERE updated_at > ? OR (updated_at IS NULL AND created_at > ?)
+            """,
+            (marca, marca),
+        ).fetchall()
+        total_sessoes = self.conexao.execute(f"SELECT COUNT(*) FROM {self.tabela_sessoes}").fetchone()[0]
+
+        resultado = {"sessoes": 0, "pares": 0, "removidas": 0}
+        if not alteradas and total_sessoes == sessoes_antes:
+            # Nada mudou: a consulta nao vira uma escrita
+            return resultado
+        nova_marca = marca
+        with self.conexao:
+            for session_id, user_id, criado, atualizado in alteradas:
+                runs = self._runs_da_sessao(session_id, com_tabela_runs)
+                self.conexao.execute(f"DELETE FROM {self.tabela} WHERE session_id = ?", (session_id,))
+                cursor = self.conexao.executemany(
+                    f"INSERT INTO {self.tabela} ({', '.join(COLUNAS_PAR)}) VALUES ({', '.join('?' * len(COLUNAS_PAR))})",
+                    self._linhas(session_id, user_id, runs, criado),
+                )
+                resultado["sessoes"] += 1
+                resultado["pares"] += max(cursor.rowcount, 0)
+                nova_marca = max(nova_marca, atualizado if atualizado is not None else criado or 0)
+
+            if completo or total_sessoes < sessoes_antes:
+                resultado["removidas"] = self.conexao.execute(
+                    f"DELETE FROM {self.tabela} WHERE session_id NOT IN "
+                    f"(SELECT session_id FROM {self.tabela_sessoes})"
+                ).rowcount
+
+            self.conexao.execute(
+                f"INSERT OR REPLACE INTO {self.tabela}_sync (tabela, sincronizado_ate, sessoes, sincronizado_em) "
+                "VALUES (?, ?, ?, ?)",
+                (self.tabela_sessoes, max(marca, min(nova_marca, agora - 1)), total_sessoes, time.time()),
+            )
+        return resultado
+
+
+def comparar_decodificacao(conexao: sqlite3.Connection, repeticoes: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Compara a extracao seletiva pelo SQLite com o json.loads do blob inteiro.
+
+    O tempo e o melhor de `repeticoes` passadas por todas as sessoes; o pico
+    de memoria vem do tracemalloc em uma passada separada e so enxerga
+    alocacoes do Python (a memoria interna do SQLite nao entra na conta).
+
+    Returns:
+        {abordagem: {segundos, pico_kb, pares}}
+    """
+    tabela = TabelaPares(conexao)
+    sessoes = [linha[0] for linha in conexao.execute(f"SELECT session_id FROM {tabela.tabela_sessoes}")]
+
+    def seletiva(session_id: str) -> Dict[int, CamposRun]:
+        runs = tabela._ler_runs_sql(session_id)
+        return tabela._ler_runs_python(session_id) if runs is None else runs
+
+    abordagens = {"json completo (python)": tabela._ler_runs_python, "seletiva (sqlite json)": seletiva}
+    resultado = {}
+    for nome, ler in abordagens.items():
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            pares = sum(len(ler(session_id)) for session_id in sessoes)
+            melhor = min(melhor, time.perf_counter() - inicio)
+
+        tracemalloc.start()
+        for session_id in sessoes:
+            ler(session_id)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        resultado[nome] = {"segundos": melhor, "pico_kb": pico / 1024, "pares": pares}
+    return resultado
+
+
+def main():
+    """Sincroniza a tabela de pares ou compara as formas de decodificacao."""
+    parser = argparse.ArgumentParser(description="Tabela materializada de pares pergunta/resposta")
+    parser.add_argument("--db", default="data.db")
+    parser.add_argument("--completo", action="store_true", help="Reprocessa todas as sessoes")
+    parser.add_argument("--benchmark", action="store_true", help="Compara decodificacao seletiva e completa")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    conexao = sqlite3.connect(args.db, timeout=30)
+    if args.benchmark:
+        for nome, medidas in comparar_decodificacao(conexao, args.repeticoes).items():
+            print(
+                f"{nome:24} {medidas['segundos'] * 1000:9.2f} ms | "
+                f"pico {medidas['pico_kb']:9.1f} KB | {medidas['pares']} pares"
+            )
+    else:
+        resultado = TabelaPares(conexao).sincronizar(completo=args.completo)
+        print(f"{resultado['pares']} pares de {resultado['sessoes']} sessoes, {resultado['removidas']} removidos")
+    conexao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+PerfilInicializacao - Tempo de import e de inicializacao dos componentes
+========================================================================
+
+Com `--profile-startup` na linha de comando, mede quanto cada import de
+nivel superior (agno, sentence-transformers, pandas, SDKs) e cada etapa
+de inicializacao (modelo, embedder, banco vetorial, storage) custam ate
+o programa ficar pronto, e imprime o detalhamento. Sem a opcao, o
+medidor nao e instalado e as etapas apenas passam adiante.
+
+Deve ser importado antes dos demais modulos do projeto:
+
+    from perfil_inicializacao import perfil
+    ...
+    with perfil.medir("embedder"):
+        ...
+    perfil.imprimir(tempos_carregamento())
+"""
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+OPCAO = "--profile-startup"
+
+
+class PerfilInicializacao:
+    """Acumula tempos de import e de inicializacao por componente."""
+
+    def __init__(self, ativo: bool = False):
+        self.ativo = ativo
+        self.inicio = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.etapas: List[Tuple[str, float]] = []
+        self._local = threading.local()
+        if ativo:
+            self._instalar_medidor_imports()
+
+    def _instalar_medidor_imports(self):
+        """Envolve __import__ para cronometrar os imports mais externos ainda nao carregados."""
+        original = builtins.__import__
+
+        def importar(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules or getattr(self._local, "profundidade", 0):
+                return original(name, globals, locals, fromlist, level)
+            self._local.profundidade = 1
+            inicio = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._local.profundidade = 0
+                self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - inicio
+
+        builtins.__import__ = importar
+
+    @contextmanager
+    def medir(self, etapa: str):
+        """Cronometra uma etapa de inicializacao (sem custo quando inativo)."""
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((etapa, time.perf_counter() - inicio))
+
+    def imprimir(self, componentes: Optional[Dict[str, float]] = None, limite: int = 15):
+        """
+        Imprime o detalhamento de imports e etapas, se o perfil estiver ativo.
+
+        Args:
+            componentes: Tempos de construcao do registro de componentes
+            limite: Quantidade maxima de imports listados
+        """
+        if not self.ativo:
+            return
+        print(f"\nPerfil de inicializacao ({time.perf_counter() - self.inicio:.2f}s ate aqui)")
+        print("  Imports:")
+        for nome, segundos in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:limite]:
+            print(f"    {nome:40} {segundos:8.3f}s")
+        print("  Inicializacao:")
+        for etapa, segundos in self.etapas:
+            print(f"    {etapa:40} {segundos:8.3f}s")
+        for componente, segundos in (componentes or {}).items():
+            print(f"    {'registro ' + componente:40} {segundos:8.3f}s")
+
+
+perfil = PerfilInicializacao(ativo=OPCAO in sys.argv)
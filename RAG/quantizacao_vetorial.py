@@ -0,0 +1,372 @@
+"""
+QuantizacaoVetorial - Copia quantizada dos embeddings para a busca
+==================================================================
+
+Mantem, ao lado da tabela do LanceDB, uma copia dos embeddings em float16
+ou int8 (quantizacao escalar por dimensao) em um arquivo .npy mapeado em
+memoria; os ids das linhas ficam em outro .npy de largura fixa, tambem
+mapeado, em vez de uma lista carregada inteira na memoria. A busca varre a copia quantizada (2x ou 4x menor que float32) e
+apenas os melhores candidatos sao reavaliados com os vetores completos
+lidos da tabela. O modo de comparacao mede memoria, disco, latencia e
+recall@k de cada precisao frente a busca exata em float32.
+
+Os vetores float32 da tabela do LanceDB nao sao alterados (o rescore e o
+indice ANN dependem deles): a copia quantizada ocupa disco a mais, cerca
+de 50% (float16) ou 25% (int8) do tamanho dos vetores originais. O ganho
+e na memoria e na varredura da busca, nao no armazenamento.
+
+Uso (na raiz do projeto):
+    python RAG/quantizacao_vetorial.py --consultas 200 --k 10
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_lote import gerar_embeddings_em_lote
+from registro_componentes import obter_vector_db
+from utilitarios_benchmark import gerar_consultas, percentil, tamanho_diretorio
+
+
+PRECISOES = ("float32", "float16", "int8")
+TAMANHO_BLOCO = 65_536
+
+
+def _normalizar(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+class IndiceQuantizado:
+    """Busca vetorial sobre embeddings quantizados com reavaliacao em float32."""
+
+    def __init__(
+        self,
+        vector_db,
+        precisao: str = "int8",
+        fator_rescore: int = 4,
+        diretorio: Optional[str] = None,
+    ):
+        """
+        Inicializa o indice quantizado.
+
+        Args:
+            vector_db: LanceDb do agno com a tabela de embeddings completos
+            precisao: float16, int8 ou float32 (referencia sem quantizacao)
+            fator_rescore: Multiplicador de candidatos reavaliados em float32
+            diretorio: Onde gravar a copia quantizada (padrao: uri do LanceDB)
+        """
+        if precisao not in PRECISOES:
+            raise ValueError(f"Precisao invalida: {precisao}. Use uma de {PRECISOES}")
+        self.vector_db = vector_db
+        self.precisao = precisao
+        self.fator_rescore = fator_rescore
+        self.coluna = getattr(vector_db, "_vector_col", "vector")
+
+        base = os.path.join(diretorio or vector_db.uri, f"{vector_db.table_name}_{precisao}")
+        self.caminho_matriz = f"{base}.npy"
+        self.caminho_ids = f"{base}_ids.npy"
+        self.caminho_metadados = f"{base}.json"
+
+        self.matriz: Optional[np.ndarray] = None
+        # Ids em bytes UTF-8 de largura fixa (mapeados em memoria); ver _id()
+        self.ids: Optional[np.ndarray] = None
+        self.escala: Optional[np.ndarray] = None
+        self.versao_tabela: Optional[int] = None
+        self._carregar()
+
+    @property
+    def tabela(self):
+        return self.vector_db.table
+
+    def _carregar(self):
+        """Abre a copia quantizada gravada, se existir."""
+        caminhos = (self.caminho_matriz, self.caminho_ids, self.caminho_metadados)
+        if not all(os.path.exists(caminho) for caminho in caminhos):
+            return
+        with open(self.caminho_metadados, "r", encoding="utf-8") as f:
+            metadados = json.load(f)
+        self.ids = np.load(self.caminho_ids, mmap_mode="r")
+        self.versao_tabela = metadados.get("versao_tabela")
+        self.escala = np.asarray(metadados["escala"], dtype=np.float32) if metadados.get("escala") else None
+        self.matriz = np.load(self.caminho_matriz, mmap_mode="r")
+
+    def _id(self, posicao: int) -> str:
+        """Id da linha na posicao da matriz."""
+        return self.ids[posicao].decode("utf-8")
+
+    def _lotes(self, conjunto, tamanho: int = TAMANHO_BLOCO):
+        """Percorre (ids, vetores normalizados) de uma versao fixa da tabela em lotes."""
+        for lote in conjunto.to_batches(columns=["id", self.coluna], batch_size=tamanho):
+            vetores = np.asarray(lote.column(self.coluna).to_pylist(), dtype=np.float32)
+            yield lote.column("id").to_pylist(), _normalizar(vetores)
+
+    def sincronizar(self, forcar: bool = False) -> bool:
+        """
+        Reconstroi a copia quantizada quando a tabela mudou de versao.
+
+        A contagem e as duas passadas leem o mesmo snapshot da tabela, entao
+        escritas concorrentes nao desalinham o tamanho da matriz e os ids.
+        A copia e gravada em adicao aos vetores float32 da tabela.
+
+        Returns:
+            True se a copia foi reconstruida
+        """
+        versao = self.tabela.version
+        if not forcar and self.matriz is not None and versao == self.versao_tabela:
+            return False
+
+        inicio = time.perf_counter()
+        # Dataset lance fixo na versao atual; escritas posteriores criam novas versoes
+        conjunto = self.tabela.to_lance()
+        versao = conjunto.version
+        total = conjunto.count_rows()
+        dimensoes = self.vector_db.embedder.dimensions
+
+        # int8: escala por dimensao a partir do maior valor absoluto (primeira passada)
+        escala = None
+        if self.precisao == "int8":
+            maximos = np.zeros(dimensoes, dtype=np.float32)
+            for _, vetores in self._lotes(conjunto):
+                np.maximum(maximos, np.abs(vetores).max(axis=0), out=maximos)
+            maximos[maximos == 0] = 1.0
+            escala = maximos / 127.0
+
+        temporario = f"{self.caminho_matriz}.tmp.npy"
+        matriz = np.lib.format.open_memmap(temporario, mode="w+", dtype=self.precisao, shape=(total, dimensoes))
+        ids: List[str] = []
+        for lote_ids, vetores in self._lotes(conjunto):
+            if escala is not None:
+                vetores = np.clip(np.rint(vetores / escala), -127, 127)
+            matriz[len(ids):len(ids) + len(lote_ids)] = vetores.astype(self.precisao)
+            ids.extend(lote_ids)
+        matriz.flush()
+        del matriz
+        if len(ids) != total:
+            os.remove(temporario)
+            raise RuntimeError(f"Versao {versao} da tabela mudou durante a leitura: {len(ids)} de {total} vetores")
+
+        # Largura fixa = maior id; a busca le so as posicoes dos candidatos
+        temporario_ids = f"{self.caminho_ids}.tmp.npy"
+        np.save(temporario_ids, np.array([str(id_).encode("utf-8") for id_ in ids], dtype=bytes))
+        del ids
+
+        metadados = {
+            "versao_tabela": versao,
+            "escala": escala.tolist() if escala is not None else None,
+        }
+        with open(f"{self.caminho_metadados}.tmp", "w", encoding="utf-8") as f:
+            json.dump(metadados, f)
+        os.replace(temporario, self.caminho_matriz)
+        os.replace(temporario_ids, self.caminho_ids)
+        os.replace(f"{self.caminho_metadados}.tmp", self.caminho_metadados)
+        self._carregar()
+
+        print(f"Copia {self.precisao} reconstruida em {time.perf_counter() - inicio:.1f}s ({total} vetores)")
+        return True
+
+    def atualizar(self) -> bool:
+        """Alias de sincronizar() com a mesma interface do GerenciadorIndiceVetorial."""
+        return self.sincronizar()
+
+    def estatisticas(self) -> Dict:
+        """Vetores, bytes em memoria e em disco da copia quantizada."""
+        vetores = 0 if self.matriz is None else self.matriz.shape[0]
+        disco = sum(
+            os.path.getsize(caminho)
+            for caminho in (self.caminho_matriz, self.caminho_ids, self.caminho_metadados)
+            if os.path.exists(caminho)
+        )
+        return {
+            "precisao": self.precisao,
+            "vetores": vetores,
+            "bytes_memoria": 0 if self.matriz is None else int(self.matriz.nbytes + self.ids.nbytes),
+            "bytes_disco": disco,
+        }
+
+    def candidatos(self, vetor: Sequence[float], quantidade: int) -> Tuple[List[int], np.ndarray]:
+        """
+        Varre a copia quantizada em blocos e retorna os melhores candidatos.
+
+        Returns:
+            (posicoes na matriz, similaridades aproximadas) em ordem decrescente
+        """
+        if self.matriz is None:
+            self.sincronizar()
+        consulta = _normalizar(np.asarray(vetor, dtype=np.float32))
+        if self.escala is not None:
+            # (q * escala) . v_int8 == q . v_reconstruido, sem desquantizar a matriz
+            consulta = consulta * self.escala
+
+        posicoes = np.empty(0, dtype=np.int64)
+        scores = np.empty(0, dtype=np.float32)
+        for inicio in range(0, self.matriz.shape[0], TAMANHO_BLOCO):
+            bloco = np.asarray(self.matriz[inicio:inicio + TAMANHO_BLOCO], dtype=np.float32) @ consulta
+            posicoes = np.concatenate([posicoes, np.arange(inicio, inicio + len(bloco))])
+            scores = np.concatenate([scores, bloco])
+            if len(scores) > quantidade:
+                melhores = np.argpartition(-scores, quantidade)[:quantidade]
+                posicoes, scores = posicoes[melhores], scores[melhores]
+
+        ordem = np.argsort(-scores)
+        return posicoes[ordem].tolist(), scores[ordem]
+
+    def _ler_linhas(self, ids: List[str]) -> Dict[str, Dict]:
+        """Le vetores completos e payload dos ids informados."""
+        if not ids:
+            return {}
+        lista = ", ".join(f"'{id_}'" for id_ in ids)
+        linhas = (
+            self.tabela.search()
+            .where(f"id IN ({lista})")
+            .select(["id", self.coluna, "payload"])
+            .limit(len(ids))
+            .to_list()
+        )
+        return {linha["id"]: linha for linha in linhas}
+
+    def buscar_vetor(self, vetor: Sequence[float], limite: int = 5, incluir_vetor: bool = False) -> List[Dict]:
+        """Busca pelo embedding ja calculado da consulta."""
+        quantidade = limite if self.precisao == "float32" else limite * self.fator_rescore
+        posicoes, aproximados = self.candidatos(vetor, quantidade)
+        ids = [self._id(posicao) for posicao in posicoes]
+        linhas = self._ler_linhas(ids)
+
+        consulta = _normalizar(np.asarray(vetor, dtype=np.float32))
+        pontuados = []
+        for id_, aproximado in zip(ids, aproximados):
+            linha = linhas.get(id_)
+            if linha is None:
+                continue
+            if self.precisao == "float32":
+                score = float(aproximado)
+            else:
+                score = float(_normalizar(np.asarray(linha[self.coluna], dtype=np.float32)) @ consulta)
+            pontuados.append((score, linha))
+        pontuados.sort(key=lambda item: item[0], reverse=True)
+
+        documentos = []
+        for score, linha in pontuados[:limite]:
+            payload = json.loads(linha["payload"])
+            documento = {
+                "id": linha["id"],
+                "name": payload.get("name"),
+                "meta_data": payload.get("meta_data", {}),
+                "content": payload.get("content", ""),
+                "distancia": 1.0 - score,
+            }
+            if incluir_vetor:
+                documento["vetor"] = linha[self.coluna]
+            documentos.append(documento)
+        return documentos
+
+    def buscar(self, query: str, limite: int = 5, incluir_vetor: bool = False) -> List[Dict]:
+        """
+        Busca vetorial na copia quantizada com reavaliacao em float32.
+
+        Args:
+            query: Texto da consulta
+            limite: Quantidade de documentos
+            incluir_vetor: Inclui o embedding completo de cada documento em "vetor"
+
+        Returns:
+            Lista de documentos {id, name, meta_data, content, distancia}
+        """
+        return self.buscar_vetor(self.vector_db.embedder.get_embedding(query), limite, incluir_vetor)
+
+    def retriever(self, agent=None, query: str = "", num_documents: Optional[int] = None, **kwargs) -> List[Dict]:
+        """Retriever compativel com o parametro `retriever` do Agent do agno."""
+        return self.buscar(query, limite=num_documents or 5)
+
+
+def comparar_precisoes(
+    vector_db,
+    consultas: List[Dict],
+    k: int = 10,
+    fator_rescore: int = 4,
+    diretorio: Optional[str] = None,
+) -> Dict:
+    """
+    Compara memoria, disco, latencia e recall@k de cada precisao.
+
+    O recall e medido contra o top-k da busca exata em float32, com e sem
+    a reavaliacao dos candidatos.
+    """
+    vetores = gerar_embeddings_em_lote(vector_db.embedder, [item["consulta"] for item in consultas])
+    indices = {}
+    for precisao in PRECISOES:
+        indices[precisao] = IndiceQuantizado(vector_db, precisao, fator_rescore, diretorio)
+        indices[precisao].sincronizar()
+
+    referencia = indices["float32"]
+    exatos = [
+        {referencia._id(posicao) for posicao in referencia.candidatos(vetor, k)[0]}
+        for vetor in vetores
+    ]
+
+    resultado = {
+        "vetores": referencia.matriz.shape[0],
+        "k": k,
+        "fator_rescore": fator_rescore,
+        "tabela_lancedb_bytes": tamanho_diretorio(os.path.join(vector_db.uri, f"{vector_db.table_name}.lance")),
+    }
+    for precisao, indice in indices.items():
+        latencias = []
+        acertos_rescore = 0
+        acertos_aproximados = 0
+        for vetor, esperado in zip(vetores, exatos):
+            inicio = time.perf_counter()
+            documentos = indice.buscar_vetor(vetor, k)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            acertos_rescore += len(esperado & {doc["id"] for doc in documentos})
+            aproximados = {indice._id(posicao) for posicao in indice.candidatos(vetor, k)[0]}
+            acertos_aproximados += len(esperado & aproximados)
+
+        total = max(1, sum(len(esperado) for esperado in exatos))
+        resultado[precisao] = {
+            **indice.estatisticas(),
+            f"recall@{k}": acertos_rescore / total,
+            f"recall@{k}_sem_rescore": acertos_aproximados / total,
+            "latencia_p50_ms": percentil(latencias, 50),
+            "latencia_p95_ms": percentil(latencias, 95),
+        }
+    return resultado
+
+
+def main():
+    """Compara as precisoes pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Compara embeddings float32, float16 e int8")
+    parser.add_argument("--uri", default="lancedb")
+    parser.add_argument("--tabela", default="recipes")
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fator-rescore", type=int, default=4)
+    args = parser.parse_args()
+
+    vector_db = obter_vector_db(table_name=args.tabela, uri=args.uri)
+    resultado = comparar_precisoes(
+        vector_db,
+        gerar_consultas(vector_db, args.consultas),
+        k=args.k,
+        fator_rescore=args.fator_rescore,
+    )
+
+    print(f"{resultado['vetores']} vetores | tabela LanceDB: {resultado['tabela_lancedb_bytes']} bytes\n")
+    campos = ["bytes_memoria", "bytes_disco", f"recall@{args.k}", f"recall@{args.k}_sem_rescore",
+              "latencia_p50_ms", "latencia_p95_ms"]
+    print(f"{'':24}" + "".join(f"{precisao:>15}" for precisao in PRECISOES))
+    for campo in campos:
+        valores = [resultado[precisao][campo] for precisao in PRECISOES]
+        if isinstance(valores[0], float):
+            print(f"{campo:24}" + "".join(f"{valor:>15.3f}" for valor in valores))
+        else:
+            print(f"{campo:24}" + "".join(f"{valor:>15}" for valor in valores))
+
+
+if __name__ == "__main__":
+    main()
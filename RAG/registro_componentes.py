@@ -0,0 +1,151 @@
+"""
+RegistroComponentes - Componentes compartilhados do RAG
+=======================================================
+
+Registro por processo que constroi sob demanda, uma unica vez por
+configuracao, o embedder, o banco vetorial LanceDb e o storage SQLite.
+Todos os modulos recebem as mesmas instancias, evitando recarregar os
+pesos do modelo de embeddings a cada uso. As dependencias pesadas (agno,
+sentence-transformers, lancedb) so sao importadas quando o componente e
+construido pela primeira vez.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
+    from agno.vectordb.lancedb import LanceDb
+
+    from cache_embeddings import EmbedderComCache
+    from storage_sessoes import SqliteStorageIncremental
+
+
+_componentes: Dict[Tuple[Hashable, ...], Any] = {}
+_tempos: Dict[Tuple[Hashable, ...], float] = {}
+_trava = threading.RLock()
+
+
+def _obter(chave: Tuple[Hashable, ...], fabrica: Callable[[], Any]) -> Any:
+    """Retorna o componente da chave, construindo-o na primeira chamada."""
+    componente = _componentes.get(chave)
+    if componente is not None:
+        return componente
+
+    with _trava:
+        # Outra thread pode ter construido enquanto esperavamos a trava
+        componente = _componentes.get(chave)
+        if componente is None:
+            inicio = time.perf_counter()
+            componente = fabrica()
+            _tempos[chave] = time.perf_counter() - inicio
+            _componentes[chave] = componente
+    return componente
+
+
+def obter_embedder(modelo: Optional[str] = None) -> "SentenceTransformerEmbedder":
+    """
+    Retorna o embedder compartilhado do modelo informado.
+
+    Args:
+        modelo: Id do modelo sentence-transformers (padrao: o do agno)
+    """
+    def fabrica():
+        from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
+        from sentence_transformers import SentenceTransformer
+
+        embedder = SentenceTransformerEmbedder(id=modelo) if modelo else SentenceTransformerEmbedder()
+        # Carrega os pesos uma unica vez e os reaproveita em todas as chamadas
+        embedder.sentence_transformer_client = SentenceTransformer(model_name_or_path=embedder.id)
+        return embedder
+
+    return _obter(("embedder", modelo), fabrica)
+
+
+def obter_embedder_com_cache(
+    modelo: Optional[str] = None,
+    db_file: str = "cache_embeddings.db",
+) -> "EmbedderComCache":
+    """
+    Retorna o embedder compartilhado envolvido pelo cache persistente.
+
+    Args:
+        modelo: Id do modelo sentence-transformers (padrao: o do agno)
+        db_file: Arquivo SQLite do cache de embeddings
+    """
+    embedder = obter_embedder(modelo)
+
+    def fabrica():
+        from cache_embeddings import EmbedderComCache
+
+        return EmbedderComCache(embedder=embedder, db_file=db_file)
+
+    return _obter(("embedder_cache", modelo, db_file), fabrica)
+
+
+def obter_vector_db(
+    table_name: str = "recipes",
+    uri: str = "lancedb",
+    modelo: Optional[str] = None,
+    cache: bool = True,
+) -> "LanceDb":
+    """
+    Retorna o LanceDb compartilhado para a tabela informada.
+
+    Args:
+        table_name: Nome da tabela no LanceDB
+        uri: Diretorio do LanceDB
+        modelo: Id do modelo do embedder associado
+        cache: Se o embedder deve usar o cache persistente de embeddings
+    """
+    embedder = obter_embedder_com_cache(modelo) if cache else obter_embedder(modelo)
+
+    def fabrica():
+        from agno.vectordb.lancedb import LanceDb
+
+        return LanceDb(
+            table_name=table_name,
+            uri=uri,
+            embedder=embedder,
+        )
+
+    return _obter(("vector_db", uri, table_name, modelo, cache), fabrica)
+
+
+def obter_storage(
+    db_file: str = "data.db",
+    table_name: str = "agno_sessions",
+) -> "SqliteStorageIncremental":
+    """
+    Retorna o storage de sessoes compartilhado para o banco e tabela informados.
+
+    Sempre o SqliteStorageIncremental (WAL, runs em linhas separadas e
+    escritor unico): todos os pontos de entrada leem e gravam o historico
+    no mesmo layout, e cada processo tem uma unica thread escritora por tabela.
+
+    Args:
+        db_file: Arquivo do banco SQLite
+        table_name: Nome da tabela de sessoes
+    """
+    def fabrica():
+        from storage_sessoes import SqliteStorageIncremental
+
+        return SqliteStorageIncremental(table_name=table_name, db_file=db_file)
+
+    return _obter(("storage", db_file, table_name), fabrica)
+
+
+def tempos_carregamento() -> Dict[str, float]:
+    """Retorna o tempo de construcao (segundos) de cada componente ja criado."""
+    return {
+        ":".join(str(parte) for parte in chave if parte is not None): segundos
+        for chave, segundos in _tempos.items()
+    }
+
+
+def limpar_registro():
+    """Descarta todos os componentes registrados (util em testes)."""
+    with _trava:
+        _componentes.clear()
+        _tempos.clear()
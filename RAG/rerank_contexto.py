@@ -0,0 +1,163 @@
+"""
+RerankContexto - Deduplicacao e MMR dos chunks antes do prompt
+==============================================================
+
+Etapa pos-recuperacao: remove chunks quase duplicados (paginas que se
+sobrepoem), reordena os restantes por maximal marginal relevance (MMR)
+usando os embeddings ja gravados no LanceDB e empacota o contexto ate um
+orcamento de tokens. Os tokens de contexto que cada consulta economizou
+em relacao aos chunks que seriam enviados sem esta etapa entram nas
+metricas da pergunta em andamento.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metricas_resposta import estimar_tokens, metricas_atuais
+
+
+@dataclass
+class RelatorioRerank:
+    """Resultado da etapa de reordenacao de uma consulta."""
+
+    candidatos: int = 0
+    duplicados: int = 0
+    selecionados: int = 0
+    tokens_antes: int = 0
+    tokens_depois: int = 0
+    ms: float = 0.0
+
+    @property
+    def tokens_economizados(self) -> int:
+        return max(0, self.tokens_antes - self.tokens_depois)
+
+    def __str__(self) -> str:
+        return (
+            f"[rerank] {self.candidatos} candidatos, {self.duplicados} duplicados, "
+            f"{self.selecionados} selecionados | tokens {self.tokens_antes} -> {self.tokens_depois} "
+            f"({self.tokens_economizados} economizados) | {self.ms:.1f}ms"
+        )
+
+
+def _normalizar(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+class ReordenadorContexto:
+    """Remove quase duplicados, aplica MMR e respeita um orcamento de tokens."""
+
+    def __init__(
+        self,
+        embedder,
+        limiar_duplicata: float = 0.95,
+        lambda_mmr: float = 0.7,
+        orcamento_tokens: int = 2000,
+    ):
+        """
+        Inicializa o reordenador.
+
+        Args:
+            embedder: Embedder usado para vetorizar a consulta
+            limiar_duplicata: Similaridade de cosseno a partir da qual um chunk e duplicado
+            lambda_mmr: Peso da relevancia frente a diversidade (1 = so relevancia)
+            orcamento_tokens: Maximo de tokens de contexto enviados ao modelo
+        """
+        self.embedder = embedder
+        self.limiar_duplicata = limiar_duplicata
+        self.lambda_mmr = lambda_mmr
+        self.orcamento_tokens = orcamento_tokens
+
+    def processar(self, query: str, documentos: List[Dict], limite: int) -> Tuple[List[Dict], RelatorioRerank]:
+        """
+        Deduplica, reordena por MMR e empacota os documentos.
+
+        Args:
+            query: Consulta do usuario
+            documentos: Candidatos na ordem da recuperacao, com "vetor"
+            limite: Quantidade de documentos que seriam enviados sem o rerank
+
+        Returns:
+            (documentos selecionados sem o campo "vetor", relatorio)
+        """
+        inicio = time.perf_counter()
+        relatorio = RelatorioRerank(candidatos=len(documentos))
+        relatorio.tokens_antes = sum(estimar_tokens(doc["content"]) for doc in documentos[:limite])
+        if not documentos:
+            return [], relatorio
+
+        vetores = _normalizar(np.asarray([doc["vetor"] for doc in documentos], dtype=np.float32))
+        consulta = _normalizar(np.asarray(self.embedder.get_embedding(query), dtype=np.float32))
+        relevancia = vetores @ consulta
+        similaridade = vetores @ vetores.T
+
+        # Mantem o primeiro de cada grupo de quase duplicados (melhor ranqueado)
+        unicos: List[int] = []
+        for i in range(len(documentos)):
+            if all(similaridade[i, j] < self.limiar_duplicata for j in unicos):
+                unicos.append(i)
+        relatorio.duplicados = len(documentos) - len(unicos)
+
+        selecionados: List[int] = []
+        restantes = list(unicos)
+        tokens = 0
+        while restantes and len(selecionados) < limite:
+            if selecionados:
+                redundancia = similaridade[np.ix_(restantes, selecionados)].max(axis=1)
+            else:
+                redundancia = np.zeros(len(restantes), dtype=np.float32)
+            scores = self.lambda_mmr * relevancia[restantes] - (1 - self.lambda_mmr) * redundancia
+            escolhido = restantes.pop(int(np.argmax(scores)))
+
+            custo = estimar_tokens(documentos[escolhido]["content"])
+            if selecionados and tokens + custo > self.orcamento_tokens:
+                continue
+            selecionados.append(escolhido)
+            tokens += custo
+
+        resultado = []
+        for i in selecionados:
+            documento = {chave: valor for chave, valor in documentos[i].items() if chave != "vetor"}
+            documento["score_mmr"] = float(relevancia[i])
+            resultado.append(documento)
+
+        relatorio.selecionados = len(resultado)
+        relatorio.tokens_depois = tokens
+        relatorio.ms = (time.perf_counter() - inicio) * 1000
+        return resultado, relatorio
+
+
+class RecuperadorComRerank:
+    """Retriever do agno que aplica o ReordenadorContexto sobre outra busca."""
+
+    def __init__(
+        self,
+        buscar: Callable[..., List[Dict]],
+        reordenador: ReordenadorContexto,
+        candidatos: int = 20,
+    ):
+        """
+        Args:
+            buscar: Funcao de busca (query, limite, incluir_vetor) -> documentos
+            reordenador: Etapa de deduplicacao/MMR
+            candidatos: Documentos recuperados antes do rerank
+        """
+        self.buscar = buscar
+        self.reordenador = reordenador
+        self.candidatos = candidatos
+
+    def retriever(self, agent=None, query: str = "", num_documents: Optional[int] = None, **kwargs) -> List[Dict]:
+        """Retriever compativel com o parametro `retriever` do Agent do agno."""
+        limite = num_documents or 5
+        documentos = self.buscar(query, max(limite, self.candidatos), incluir_vetor=True)
+        selecionados, relatorio = self.reordenador.processar(query, documentos, limite)
+
+        # Compartilhado entre requisicoes: o relatorio vai so para as metricas da pergunta
+        metricas = metricas_atuais.get()
+        if metricas is not None:
+            metricas.tokens_contexto_economizados += relatorio.tokens_economizados
+        return selecionados
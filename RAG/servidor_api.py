@@ -0,0 +1,300 @@
+"""
+ServidorAPI - Servico HTTP de perguntas e respostas do RAG
+==========================================================
+
+Mantem um unico processo com embedder, banco vetorial e storage aquecidos
+e atende perguntas concorrentes de toda a equipe. As respostas podem ser
+transmitidas token a token via SSE, o numero de geracoes simultaneas e a
+fila de espera sao limitados, e /saude e /metricas expoem o estado.
+
+Uso (na raiz do projeto):
+    python RAG/servidor_api.py --porta 8000 --max-concorrentes 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from coalescencia import CoalescedorAssincrono
+from metricas_resposta import MedicaoResposta, MetricasResposta
+from RagSQLITE import RagSQLITE
+from registro_componentes import tempos_carregamento
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
+
+
+class Pergunta(BaseModel):
+    """Corpo das requisicoes de pergunta."""
+    pergunta: str
+    session_id: Optional[str] = None
+
+
+class ControleCarga:
+    """Limita geracoes simultaneas e o tamanho da fila de espera."""
+
+    def __init__(self, max_concorrentes: int = 8, max_fila: int = 32):
+        self.max_concorrentes = max_concorrentes
+        self.max_fila = max_fila
+        self.semaforo = asyncio.Semaphore(max_concorrentes)
+        self.aguardando = 0
+        self.em_andamento = 0
+        self.atendidas = 0
+        self.rejeitadas = 0
+        self.erros = 0
+        self.latencias: List[float] = []
+
+    def reservar(self):
+        """Reserva um lugar na fila ou rejeita com 429 se ela estiver cheia (sem await, atomico no event loop)."""
+        if self.aguardando >= self.max_fila:
+            self.rejeitadas += 1
+            raise HTTPException(status_code=429, detail="Servidor ocupado, tente novamente", headers={"Retry-After": "2"})
+        self.aguardando += 1
+
+    @asynccontextmanager
+    async def vaga(self, reservada: bool = False):
+        """Ocupa uma vaga de geracao, reservando antes o lugar na fila se ainda nao foi reservado."""
+        if not reservada:
+            self.reservar()
+        try:
+            await self.semaforo.acquire()
+        finally:
+            self.aguardando -= 1
+
+        self.em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+            self.atendidas += 1
+        except Exception:
+            self.erros += 1
+            raise
+        finally:
+            self.em_andamento -= 1
+            self.semaforo.release()
+            self.latencias.append(time.perf_counter() - inicio)
+            del self.latencias[:-1000]
+
+    def percentil(self, p: float) -> float:
+        """Percentil p (0-100) das ultimas latencias, em segundos."""
+        if not self.latencias:
+            return 0.0
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+estado: Dict = {}
+
+
+@asynccontextmanager
+async def ciclo_vida(app: FastAPI):
+    """Aquece os componentes uma unica vez na subida do servidor."""
+    configuracao = app.state.configuracao
+    # Muitas sessoes concorrentes: runs em linhas e um unico escritor no SQLite
+    rag = await asyncio.to_thread(
+        RagSQLITE, session_id="api", log_metricas=configuracao.get("log_metricas", "metricas_respostas.jsonl")
+    )
+    if configuracao.get("carregar_documentos", True):
+        await asyncio.to_thread(rag.load_documents)
+    estado["rag"] = rag
+    estado["coalescedor"] = CoalescedorAssincrono()
+    estado["carga"] = ControleCarga(configuracao.get("max_concorrentes", 8), configuracao.get("max_fila", 32))
+    estado["inicio"] = time.time()
+    yield
+    estado.clear()
+
+
+app = FastAPI(title="RAG SQLite", lifespan=ciclo_vida)
+app.state.configuracao = {}
+
+
+async def _buscar_cache(pergunta: str, session_id: Optional[str]) -> Optional[Dict]:
+    """Sessoes do cliente so reaproveitam as proprias respostas; perguntas sem sessao, as globais."""
+    cache = estado["rag"].cache_semantico
+    if cache is None:
+        return None
+    return await asyncio.to_thread(cache.buscar, pergunta, session_id)
+
+
+def _iniciar_geracao(
+    pergunta: str, session_id: str, escopo: Optional[str], medicao: MedicaoResposta
+) -> Tuple[AsyncIterator[str], List["Agent"]]:
+    """
+    Inicia (ou reaproveita) a geracao da pergunta.
+
+    Perguntas identicas simultaneas no mesmo escopo compartilham uma unica
+    recuperacao e geracao (agente.arun, no proprio event loop); os tokens
+    sao repassados a todas as requisicoes. O escopo e a sessao informada
+    pelo cliente, para que uma sessao com historico nunca receba a rodada
+    de outra; perguntas sem sessao coalescem entre si. A tarefa da geracao
+    herda as metricas de quem a iniciou, entao o retriever medido registra
+    a recuperacao nelas.
+
+    O agente so e criado pela geracao do lider; requisicoes coalescidas
+    nao abrem sessao nem tocam o storage.
+
+    Returns:
+        (tokens da resposta, lista preenchida com o agente quando a
+        requisicao lidera a geracao; vazia se foi coalescida)
+    """
+    rag = estado["rag"]
+    coalescedor: CoalescedorAssincrono = estado["coalescedor"]
+    agentes: List["Agent"] = []
+
+    def gerar() -> AsyncIterator[str]:
+        agente = rag.criar_agente(session_id)
+        agentes.append(agente)
+        return rag.tokens_resposta_async(agente, pergunta)
+
+    with medicao.ativa() as metricas:
+        tokens, metricas.coalescida = coalescedor.transmitir(
+            coalescedor.chave(pergunta, rag.versao_base, escopo), gerar
+        )
+    return tokens, agentes
+
+
+def _sessao_resposta(session_id: str, sessao_cliente: Optional[str], agentes: List["Agent"]) -> Optional[str]:
+    """Sessao devolvida ao cliente: a gerada so existe se esta requisicao liderou a geracao."""
+    return session_id if agentes else sessao_cliente
+
+
+async def _registrar_metricas(medicao: MedicaoResposta, agente=None) -> MetricasResposta:
+    """Fecha as metricas da requisicao e as anexa ao log, fora do event loop."""
+    metricas = medicao.concluir(agente)
+    log = estado["rag"].log_metricas
+    if log:
+        await asyncio.to_thread(log.anexar, metricas)
+    return metricas
+
+
+async def _registrar_cache(medicao: MedicaoResposta, session_id: Optional[str]):
+    """Guarda a resposta gerada no cache semantico (respostas coalescidas ja foram guardadas pelo lider)."""
+    cache = estado["rag"].cache_semantico
+    if cache and not medicao.metricas.coalescida:
+        segundos = time.perf_counter() - medicao.inicio
+        await asyncio.to_thread(cache.registrar, medicao.metricas.pergunta, medicao.resposta, segundos, session_id)
+
+
+@app.post("/perguntar")
+async def perguntar(corpo: Pergunta):
+    """Responde uma pergunta de uma vez (JSON)."""
+    medicao = MedicaoResposta(corpo.pergunta)
+    acerto = await _buscar_cache(corpo.pergunta, corpo.session_id)
+    if acerto:
+        medicao.metricas.cache = True
+        await _registrar_metricas(medicao)
+        return {"resposta": acerto["resposta"], "cache": True}
+
+    session_id = corpo.session_id or f"api-{uuid.uuid4()}"
+    async with estado["carga"].vaga():
+        tokens, agentes = _iniciar_geracao(corpo.pergunta, session_id, corpo.session_id, medicao)
+        async for token in tokens:
+            medicao.token(token)
+
+    await _registrar_cache(medicao, corpo.session_id)
+    metricas = await _registrar_metricas(medicao, agentes[0] if agentes else None)
+    return {
+        "resposta": medicao.resposta,
+        "cache": False,
+        "coalescida": metricas.coalescida,
+        "session_id": _sessao_resposta(session_id, corpo.session_id, agentes),
+        "metricas": metricas.to_dict(),
+    }
+
+
+@app.post("/perguntar/stream")
+async def perguntar_stream(corpo: Pergunta):
+    """Responde uma pergunta transmitindo os tokens via Server-Sent Events."""
+    medicao = MedicaoResposta(corpo.pergunta)
+    acerto = await _buscar_cache(corpo.pergunta, corpo.session_id)
+    session_id = corpo.session_id or f"api-{uuid.uuid4()}"
+    carga = estado["carga"]
+
+    # Reserva o lugar na fila antes de abrir o stream para que o cliente
+    # receba o 429; a vaga reservada e ocupada e liberada pelo gerador
+    if acerto is None:
+        carga.reservar()
+
+    async def eventos() -> AsyncIterator[str]:
+        if acerto:
+            yield f"data: {json.dumps({'token': acerto['resposta'], 'cache': True}, ensure_ascii=False)}\n\n"
+            medicao.metricas.cache = True
+            await _registrar_metricas(medicao)
+            yield "event: fim\ndata: {}\n\n"
+            return
+
+        async with carga.vaga(reservada=True):
+            tokens, agentes = _iniciar_geracao(corpo.pergunta, session_id, corpo.session_id, medicao)
+            async for token in tokens:
+                medicao.token(token)
+                yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+
+        await _registrar_cache(medicao, corpo.session_id)
+        metricas = await _registrar_metricas(medicao, agentes[0] if agentes else None)
+        fim = {"session_id": _sessao_resposta(session_id, corpo.session_id, agentes), "metricas": metricas.to_dict()}
+        yield f"event: fim\ndata: {json.dumps(fim)}\n\n"
+
+    return StreamingResponse(eventos(), media_type="text/event-stream")
+
+
+@app.get("/saude")
+async def saude():
+    """Indica se os componentes estao carregados."""
+    return {
+        "status": "ok" if "rag" in estado else "iniciando",
+        "uptime_s": time.time() - estado.get("inicio", time.time()),
+        "componentes": tempos_carregamento(),
+    }
+
+
+@app.get("/metricas")
+async def metricas():
+    """Contadores de carga, latencias e cache semantico."""
+    carga: ControleCarga = estado["carga"]
+    cache = estado["rag"].cache_semantico
+    return {
+        "em_andamento": carga.em_andamento,
+        "aguardando": carga.aguardando,
+        "atendidas": carga.atendidas,
+        "rejeitadas": carga.rejeitadas,
+        "erros": carga.erros,
+        "latencia_p50_s": carga.percentil(50),
+        "latencia_p95_s": carga.percentil(95),
+        "cache_semantico": cache.estatisticas() if cache else None,
+        "coalescencia": estado["coalescedor"].estatisticas(),
+    }
+
+
+def main():
+    """Sobe o servidor HTTP."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servico HTTP do RAG")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--max-concorrentes", type=int, default=8)
+    parser.add_argument("--max-fila", type=int, default=32)
+    parser.add_argument("--sem-carga", action="store_true", help="Nao sincroniza os PDFs na subida")
+    parser.add_argument("--log-metricas", default="metricas_respostas.jsonl", help="JSONL com as metricas por pergunta")
+    args = parser.parse_args()
+
+    app.state.configuracao = {
+        "max_concorrentes": args.max_concorrentes,
+        "max_fila": args.max_fila,
+        "carregar_documentos": not args.sem_carga,
+        "log_metricas": args.log_metricas,
+    }
+    # Um unico worker: os componentes aquecidos vivem neste processo
+    uvicorn.run(app, host=args.host, port=args.porta, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+ServidorModeloSimulado - Modelo local compativel com a API da OpenAI
+====================================================================
+
+Servidor HTTP (apenas biblioteca padrao) que imita o endpoint
+/chat/completions da Maritaca/OpenAI para medir a vazao do pipeline sem
+custo e sem a variacao da rede. Suporta respostas completas e em
+streaming (SSE), respostas JSON estruturadas (response_format com
+json_object ou json_schema) e chamadas de ferramenta, para que o agente
+execute a busca na base de conhecimento como faria com o modelo real.
+Latencia ate o primeiro token, tokens por segundo e taxa de erros sao
+configuraveis.
+
+Uso (na raiz do projeto):
+    python RAG/servidor_modelo_simulado.py --porta 8001 --latencia-ms 300 --tokens-por-segundo 60
+    MARITACA_BASE_URL=http://127.0.0.1:8001 MARITALK_API_KEY=local python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+
+from metricas_resposta import estimar_tokens
+
+
+PALAVRAS = (
+    "de acordo com os documentos consultados a resposta envolve os conceitos principais "
+    "descritos no material com base nas secoes mais relevantes encontradas na base"
+).split()
+
+
+@dataclass
+class ConfiguracaoSimulacao:
+    """Parametros de comportamento do modelo simulado."""
+
+    latencia_ms: float = 300.0
+    variacao_ms: float = 50.0
+    tokens_por_segundo: float = 60.0
+    tokens_resposta: int = 120
+    taxa_erro: float = 0.0
+    status_erro: int = 500
+    chamar_ferramentas: bool = True
+    semente: Optional[int] = None
+
+
+class EstatisticasSimulacao:
+    """Contadores do servidor, expostos em GET /metricas."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.requisicoes = 0
+        self.streams = 0
+        self.chamadas_ferramenta = 0
+        self.erros = 0
+        self.tokens_gerados = 0
+
+    def somar(self, **valores: int):
+        with self._trava:
+            for campo, valor in valores.items():
+                setattr(self, campo, getattr(self, campo) + valor)
+
+    def to_dict(self) -> Dict[str, int]:
+        with self._trava:
+            return {
+                "requisicoes": self.requisicoes,
+                "streams": self.streams,
+                "chamadas_ferramenta": self.chamadas_ferramenta,
+                "erros": self.erros,
+                "tokens_gerados": self.tokens_gerados,
+            }
+
+
+def _texto_mensagem(mensagem: Dict) -> str:
+    conteudo = mensagem.get("content") or ""
+    if isinstance(conteudo, list):
+        return " ".join(parte.get("text", "") for parte in conteudo if isinstance(parte, dict))
+    return str(conteudo)
+
+
+def valor_por_schema(schema: Dict, nome: str = "valor") -> Any:
+    """Gera um valor que satisfaz um JSON schema simples."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return valor_por_schema(schema["anyOf"][0], nome)
+    tipo = schema.get("type", "string")
+    if isinstance(tipo, list):
+        tipo = next((t for t in tipo if t != "null"), "string")
+    if tipo == "object":
+        return {
+            chave: valor_por_schema(propriedade, chave)
+            for chave, propriedade in schema.get("properties", {}).items()
+        }
+    if tipo == "array":
+        return [valor_por_schema(schema.get("items", {}), nome)]
+    if tipo == "integer":
+        return 0
+    if tipo == "number":
+        return 0.0
+    if tipo == "boolean":
+        return False
+    return f"{nome} simulado"
+
+
+class ModeloSimulado:
+    """Gera as respostas do /chat/completions conforme a configuracao."""
+
+    def __init__(self, configuracao: ConfiguracaoSimulacao):
+        self.configuracao = configuracao
+        self.estatisticas = EstatisticasSimulacao()
+        self._sorteio = random.Random(configuracao.semente)
+        self._trava = threading.Lock()
+
+    def _sortear(self) -> float:
+        with self._trava:
+            return self._sorteio.random()
+
+    def deve_falhar(self) -> bool:
+        return self._sortear() < self.configuracao.taxa_erro
+
+    def aguardar_primeiro_token(self):
+        variacao = (self._sortear() * 2 - 1) * self.configuracao.variacao_ms
+        time.sleep(max(0.0, self.configuracao.latencia_ms + variacao) / 1000)
+
+    def _chamada_ferramenta(self, corpo: Dict) -> Optional[Dict]:
+        """Pede a primeira ferramenta quando o ultimo turno e do usuario."""
+        ferramentas = corpo.get("tools") or []
+        mensagens = corpo.get("messages") or []
+        if not (self.configuracao.chamar_ferramentas and ferramentas and mensagens):
+            return None
+        if mensagens[-1].get("role") != "user":
+            return None
+
+        funcao = ferramentas[0].get("function", {})
+        parametros = funcao.get("parameters", {})
+        argumentos = valor_por_schema(parametros) if parametros.get("properties") else {}
+        texto = _texto_mensagem(mensagens[-1])
+        for chave, propriedade in parametros.get("properties", {}).items():
+            if propriedade.get("type", "string") == "string":
+                argumentos[chave] = texto
+                break
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": funcao.get("name", "ferramenta"), "arguments": json.dumps(argumentos, ensure_ascii=False)},
+        }
+
+    def _conteudo(self, corpo: Dict) -> str:
+        formato = corpo.get("response_format") or {}
+        if formato.get("type") == "json_schema":
+            schema = formato.get("json_schema", {}).get("schema", {})
+            return json.dumps(valor_por_schema(schema), ensure_ascii=False)
+        if formato.get("type") == "json_object":
+            return json.dumps({"resposta": " ".join(PALAVRAS[:12])}, ensure_ascii=False)
+        quantidade = self.configuracao.tokens_resposta
+        return " ".join(PALAVRAS[i % len(PALAVRAS)] for i in range(quantidade))
+
+    @staticmethod
+    def _uso(corpo: Dict, conteudo: str) -> Dict[str, int]:
+        entrada = sum(estimar_tokens(_texto_mensagem(mensagem)) for mensagem in corpo.get("messages") or [])
+        saida = estimar_tokens(conteudo)
+        return {"prompt_tokens": entrada, "completion_tokens": saida, "total_tokens": entrada + saida}
+
+    def completar(self, corpo: Dict) -> Dict:
+        """Resposta completa (stream=false)."""
+        self.aguardar_primeiro_token()
+        chamada = self._chamada_ferramenta(corpo)
+        conteudo = "" if chamada else self._conteudo(corpo)
+        if conteudo:
+            time.sleep(estimar_tokens(conteudo) / self.configuracao.tokens_por_segundo)
+
+        mensagem: Dict[str, Any] = {"role": "assistant", "content": conteudo or None}
+        if chamada:
+            mensagem["tool_calls"] = [chamada]
+            self.estatisticas.somar(chamadas_ferramenta=1)
+        uso = self._uso(corpo, conteudo)
+        self.estatisticas.somar(tokens_gerados=uso["completion_tokens"])
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": corpo.get("model", "simulado"),
+            "choices": [{"index": 0, "message": mensagem, "finish_reason": "tool_calls" if chamada else "stop"}],
+            "usage": uso,
+        }
+
+    def transmitir(self, corpo: Dict) -> Iterator[Dict]:
+        """Chunks do streaming (stream=true), no ritmo configurado."""
+        identificador = f"chatcmpl-{uuid.uuid4().hex}"
+        base = {
+            "id": identificador,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": corpo.get("model", "simulado"),
+        }
+
+        def chunk(delta: Dict, fim: Optional[str] = None) -> Dict:
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": fim}]}
+
+        self.aguardar_primeiro_token()
+        chamada = self._chamada_ferramenta(corpo)
+        if chamada:
+            self.estatisticas.somar(chamadas_ferramenta=1)
+            yield chunk({"role": "assistant", "tool_calls": [{"index": 0, **chamada}]})
+            yield chunk({}, "tool_calls")
+            conteudo = ""
+        else:
+            conteudo = self._conteudo(corpo)
+            yield chunk({"role": "assistant", "content": ""})
+            intervalo = 1.0 / self.configuracao.tokens_por_segundo
+            pedacos = [conteudo[i:i + 4] for i in range(0, len(conteudo), 4)]
+            for pedaco in pedacos:
+                yield chunk({"content": pedaco})
+                time.sleep(intervalo)
+            yield chunk({}, "stop")
+
+        uso = self._uso(corpo, conteudo)
+        self.estatisticas.somar(tokens_gerados=uso["completion_tokens"])
+        if (corpo.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": uso}
+
+
+def criar_manipulador(modelo: ModeloSimulado):
+    """Cria a classe de requisicao HTTP ligada ao modelo simulado."""
+
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _responder_json(self, status: int, dados: Dict):
+            corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._responder_json(200, {"object": "list", "data": [{"id": "simulado", "object": "model"}]})
+            elif self.path.rstrip("/") == "/metricas":
+                self._responder_json(200, modelo.estatisticas.to_dict())
+            else:
+                self._responder_json(404, {"error": {"message": "Rota nao encontrada"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._responder_json(404, {"error": {"message": "Rota nao encontrada"}})
+                return
+
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+            modelo.estatisticas.somar(requisicoes=1)
+
+            if modelo.deve_falhar():
+                modelo.estatisticas.somar(erros=1)
+                status = modelo.configuracao.status_erro
+                self._responder_json(status, {"error": {"message": "Erro simulado", "type": "simulado", "code": status}})
+                return
+
+            if not corpo.get("stream"):
+                self._responder_json(200, modelo.completar(corpo))
+                return
+
+            modelo.estatisticas.somar(streams=1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for chunk in modelo.transmitir(corpo):
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Manipulador
+
+
+def iniciar_servidor(configuracao: ConfiguracaoSimulacao, host: str = "127.0.0.1", porta: int = 8001) -> ThreadingHTTPServer:
+    """Cria o servidor (chame serve_forever() ou rode em uma thread)."""
+    servidor = ThreadingHTTPServer((host, porta), criar_manipulador(ModeloSimulado(configuracao)))
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    """Sobe o modelo simulado pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Modelo local compativel com a API da OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8001)
+    parser.add_argument("--latencia-ms", type=float, default=300.0, help="Tempo ate o primeiro token")
+    parser.add_argument("--variacao-ms", type=float, default=50.0, help="Variacao aleatoria da latencia")
+    parser.add_argument("--tokens-por-segundo", type=float, default=60.0)
+    parser.add_argument("--tokens-resposta", type=int, default=120, help="Palavras por resposta de texto")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fracao de requisicoes que falham (0-1)")
+    parser.add_argument("--status-erro", type=int, default=500, help="Status HTTP das falhas (ex.: 429)")
+    parser.add_argument("--sem-ferramentas", action="store_true", help="Nunca pede chamadas de ferramenta")
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+
+    configuracao = ConfiguracaoSimulacao(
+        latencia_ms=args.latencia_ms,
+        variacao_ms=args.variacao_ms,
+        tokens_por_segundo=args.tokens_por_segundo,
+        tokens_resposta=args.tokens_resposta,
+        taxa_erro=args.taxa_erro,
+        status_erro=args.status_erro,
+        chamar_ferramentas=not args.sem_ferramentas,
+        semente=args.semente,
+    )
+    servidor = iniciar_servidor(configuracao, args.host, args.porta)
+    print(f"Modelo simulado em http://{args.host}:{args.porta} (use MARITACA_BASE_URL)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+StorageSessoes - Storage de sessoes com runs em linhas separadas
+================================================================
+
+No layout padrao do agno, toda a conversa fica em uma unica coluna JSON
+da tabela de sessoes, e cada novo turno regrava o blob inteiro. Este
+storage liga o WAL no SQLite, grava cada run em uma linha propria da
+tabela `<tabela>_runs`, com chave (session_id, indice), e concentra as
+escritas de todas as threads em uma unica thread escritora. Essa thread
+agrupa as escritas em lotes: runs e linhas de sessao do lote vao na mesma
+transacao da conexao escritora (um commit por lote), e so o ultimo estado
+de cada sessao e regravado.
+
+Todos os pontos de entrada obtem este storage por
+`registro_componentes.obter_storage`, de modo que nenhum leitor do projeto
+depende do blob de runs. Turnos gravados por um SqliteStorage comum depois
+da migracao (ex.: outra ferramenta) continuam no blob e sao incorporados na
+leitura, pelo run_id.
+
+Sessoes gravadas no layout antigo sao migradas com:
+    python RAG/storage_sessoes.py --db data.db --tabela agno_sessions
+"""
+
+import argparse
+import copy
+import json
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.storage.sqlite import SqliteStorage
+
+from pares_qa import criado_em, decodificar_json
+
+
+def _conectar(db_file: str) -> sqlite3.Connection:
+    conexao = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+
+def criar_tabela_runs(conexao: sqlite3.Connection, tabela_runs: str):
+    """Cria a tabela de runs (uma linha por run) se ainda nao existir."""
+    conexao.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {tabela_runs} (
+            session_id TEXT NOT NULL,
+            indice INTEGER NOT NULL,
+            run JSON NOT NULL,
+            created_at INTEGER NOT NULL,
+            PRIMARY KEY (session_id, indice)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+@dataclass
+class _Escrita:
+    """Pedido de escrita enviado a thread escritora."""
+
+    sessao: Any
+    runs: List[Tuple[int, str]]
+    concluida: threading.Event = field(default_factory=threading.Event)
+    erro: Optional[BaseException] = None
+
+
+class SqliteStorageIncremental(SqliteStorage):
+    """SqliteStorage do agno com WAL, runs em linhas e escritor unico."""
+
+    def __init__(
+        self,
+        table_name: str = "agno_sessions",
+        db_file: str = "data.db",
+        tamanho_lote: int = 64,
+        espera_lote: float = 0.005,
+        **kwargs,
+    ):
+        """
+        Inicializa o storage.
+
+        Args:
+            table_name: Tabela de sessoes
+            db_file: Arquivo do banco SQLite
+            tamanho_lote: Maximo de escritas por commit
+            espera_lote: Tempo (s) aguardando mais escritas para o mesmo lote
+        """
+        super().__init__(table_name=table_name, db_file=db_file, **kwargs)
+        self.db_file = db_file
+        self.tabela_runs = f"{table_name}_runs"
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.lotes_gravados = 0
+        self.escritas_gravadas = 0
+        self._colunas_sessoes: Optional[List[str]] = None
+
+        self._conexao = _conectar(db_file)
+        criar_tabela_runs(self._conexao, self.tabela_runs)
+        self._conexao.commit()
+        self._trava = threading.Lock()
+
+        self._fila: "queue.Queue[Optional[_Escrita]]" = queue.Queue()
+        self._escritor = threading.Thread(target=self._escrever, name="storage-escritor", daemon=True)
+        self._escritor.start()
+
+    def _runs_gravados(self, session_id: str) -> int:
+        with self._trava:
+            linha = self._conexao.execute(
+                f"SELECT COUNT(*) FROM {self.tabela_runs} WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return linha[0]
+
+    def _ler_runs(self, session_id: str) -> List[Dict]:
+        with self._trava:
+            linhas = self._conexao.execute(
+                f"SELECT run FROM {self.tabela_runs} WHERE session_id = ? ORDER BY indice",
+                (session_id,),
+            ).fetchall()
+        return [json.loads(linha[0]) for linha in linhas]
+
+    def read(self, session_id: str, user_id: Optional[str] = None):
+        """
+        Le a sessao e recompoe a lista de runs a partir da tabela de runs.
+
+        Runs que estao so no blob (gravados por um SqliteStorage comum) sao
+        mantidos depois dos da tabela, e vao para ela no proximo upsert.
+        """
+        sessao = super().read(session_id=session_id, user_id=user_id)
+        if sessao is None:
+            return sessao
+        runs = self._ler_runs(session_id)
+        if runs:
+            memoria = sessao.memory or {}
+            gravados = {run.get("run_id") for run in runs if isinstance(run, dict)}
+            avulsos = [
+                run for run in memoria.get("runs") or []
+                if not isinstance(run, dict) or run.get("run_id") not in gravados
+            ]
+            sessao.memory = {**memoria, "runs": runs + avulsos}
+        return sessao
+
+    def upsert(self, session, create_and_retry: bool = True):
+        """
+        Envia a sessao a thread escritora e aguarda o commit do lote.
+
+        Apenas os runs novos (e o ultimo ja gravado, que pode ter sido
+        atualizado) sao escritos; a linha da sessao e gravada sem os runs.
+        """
+        memoria = dict(session.memory or {})
+        runs = memoria.get("runs") or []
+        inicio = max(0, self._runs_gravados(session.session_id) - 1)
+        novos = [(i, json.dumps(run, ensure_ascii=False, default=str)) for i, run in enumerate(runs) if i >= inicio]
+
+        sessao_sem_runs = copy.copy(session)
+        sessao_sem_runs.memory = {**memoria, "runs": []}
+
+        escrita = _Escrita(sessao=sessao_sem_runs, runs=novos)
+        self._fila.put(escrita)
+        escrita.concluida.wait()
+        if escrita.erro is not None:
+            raise escrita.erro
+        return self.read(session_id=session.session_id)
+
+    def _escrever(self):
+        """Laco da thread escritora: agrupa pedidos e grava um lote por commit."""
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                return
+            lote = [primeiro]
+            limite = time.monotonic() + self.espera_lote
+            while len(lote) < self.tamanho_lote:
+                try:
+                    item = self._fila.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._fila.put(None)
+                    break
+                lote.append(item)
+
+            try:
+                self._gravar_lote(lote)
+                erro = None
+            except BaseException as exc:
+                erro = exc
+            for escrita in lote:
+                escrita.erro = erro
+                escrita.concluida.set()
+
+    def _colunas(self) -> List[str]:
+        """Colunas da tabela de sessoes, criada pelo SqliteStorage (conforme o modo) na primeira escrita."""
+        if self._colunas_sessoes is None:
+            if not self.table_exists():
+                self.create()
+            with self._trava:
+                self._colunas_sessoes = [
+                    linha[1] for linha in self._conexao.execute(f"PRAGMA table_info({self.table_name})")
+                ]
+        return self._colunas_sessoes
+
+    def _upsert_sessao(self, sessao, agora: int):
+        """Grava a linha da sessao na conexao escritora, sem commit (com a trava)."""
+        dados = sessao.to_dict() if hasattr(sessao, "to_dict") else dict(vars(sessao))
+        linha = {}
+        for coluna in self._colunas_sessoes:
+            if coluna in dados:
+                valor = dados[coluna]
+                if isinstance(valor, (dict, list)):
+                    valor = json.dumps(valor, ensure_ascii=False, default=str)
+                linha[coluna] = valor
+        if "created_at" in self._colunas_sessoes:
+            linha["created_at"] = linha.get("created_at") or agora
+        if "updated_at" in self._colunas_sessoes:
+            linha["updated_at"] = agora
+
+        nomes = list(linha)
+        atualizar = ", ".join(f"{nome} = excluded.{nome}" for nome in nomes if nome not in ("session_id", "created_at"))
+        self._conexao.execute(
+            f"INSERT INTO {self.table_name} ({', '.join(nomes)}) VALUES ({', '.join('?' * len(nomes))}) "
+            f"ON CONFLICT(session_id) DO UPDATE SET {atualizar}",
+            [linha[nome] for nome in nomes],
+        )
+
+    def _gravar_lote(self, lote: List[_Escrita]):
+        agora = int(time.time())
+        linhas = [
+            (escrita.sessao.session_id, indice, run, agora)
+            for escrita in lote
+            for indice, run in escrita.runs
+        ]
+        # Varias escritas da mesma sessao no lote: so o estado mais recente importa
+        ultimas = {escrita.sessao.session_id: escrita.sessao for escrita in lote}
+        self._colunas()
+
+        # Runs e sessoes na mesma transacao: um leitor nunca ve runs sem a sessao atualizada
+        with self._trava:
+            try:
+                self._conexao.executemany(
+                    f"INSERT OR REPLACE INTO {self.tabela_runs} (session_id, indice, run, created_at) VALUES (?, ?, ?, ?)",
+                    linhas,
+                )
+                for sessao in ultimas.values():
+                    self._upsert_sessao(sessao, agora)
+                self._conexao.commit()
+            except BaseException:
+                self._conexao.rollback()
+                raise
+
+        self.lotes_gravados += 1
+        self.escritas_gravadas += len(lote)
+
+    def delete_session(self, session_id: Optional[str] = None):
+        """Remove a sessao e os seus runs."""
+        super().delete_session(session_id)
+        with self._trava:
+            self._conexao.execute(f"DELETE FROM {self.tabela_runs} WHERE session_id = ?", (session_id,))
+            self._conexao.commit()
+
+    def fechar(self):
+        """Termina a thread escritora apos gravar os pedidos pendentes."""
+        self._fila.put(None)
+        self._escritor.join()
+        self._conexao.close()
+
+
+def migrar(db_file: str = "data.db", table_name: str = "agno_sessions") -> Dict[str, int]:
+    """
+    Move os runs guardados no blob de cada sessao para a tabela de runs.
+
+    Aceita tanto a coluna `runs` quanto `memory` (com a chave "runs").
+    Sessoes que ja possuem linhas na tabela de runs sao ignoradas, o que
+    torna a migracao segura para ser executada mais de uma vez.
+
+    O blob de runs das sessoes migradas e esvaziado: depois da migracao o
+    historico so e visivel pelo SqliteStorageIncremental (o storage de todos
+    os pontos de entrada do projeto) ou pela tabela de runs.
+
+    Returns:
+        {sessoes, runs, ignoradas}
+    """
+    tabela_runs = f"{table_name}_runs"
+    conexao = _conectar(db_file)
+    colunas = {linha[1] for linha in conexao.execute(f"PRAGMA table_info({table_name})")}
+    coluna = "runs" if "runs" in colunas else "memory"
+    if coluna not in colunas:
+        raise ValueError(f"Tabela {table_name} nao possui coluna runs nem memory")
+
+    criar_tabela_runs(conexao, tabela_runs)
+    migradas = {row[0] for row in conexao.execute(f"SELECT DISTINCT session_id FROM {tabela_runs}")}
+    resultado = {"sessoes": 0, "runs": 0, "ignoradas": 0}
+    sessoes = conexao.execute(f"SELECT session_id, {coluna}, created_at FROM {table_name}").fetchall()
+
+    with conexao:
+        for session_id, valor, criado in sessoes:
+            if session_id in migradas:
+                resultado["ignoradas"] += 1
+                continue
+            dados = decodificar_json(valor)
+            runs = dados.get("runs") if coluna == "memory" and isinstance(dados, dict) else dados
+            if not isinstance(runs, list) or not runs:
+                continue
+
+            conexao.executemany(
+                f"INSERT INTO {tabela_runs} (session_id, indice, run, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, indice, json.dumps(run, ensure_ascii=False), criado_em(run, criado))
+                    for indice, run in enumerate(runs)
+                ],
+            )
+            restante = {**dados, "runs": []} if coluna == "memory" else []
+            conexao.execute(
+                f"UPDATE {table_name} SET {coluna} = ? WHERE session_id = ?",
+                (json.dumps(restante, ensure_ascii=False), session_id),
+            )
+            resultado["sessoes"] += 1
+            resultado["runs"] += len(runs)
+
+    # Sem sessoes migradas nao ha paginas livres a devolver; VACUUM reescreveria o banco inteiro a toa
+    if resultado["sessoes"]:
+        conexao.execute("VACUUM")
+    conexao.close()
+    return resultado
+
+
+def main():
+    """Migra o banco de sessoes pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Migra runs do blob de sessoes para linhas separadas")
+    parser.add_argument("--db", default="data.db")
+    parser.add_argument("--tabela", default="agno_sessions")
+    args = parser.parse_args()
+
+    resultado = migrar(args.db, args.tabela)
+    print(
+        f"{resultado['sessoes']} sessoes migradas ({resultado['runs']} runs), "
+        f"{resultado['ignoradas']} ja estavam no novo layout"
+    )
+
+
+if __name__ == "__main__":
+    main()
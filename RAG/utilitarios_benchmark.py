@@ -0,0 +1,62 @@
+"""
+UtilitariosBenchmark - Consultas rotuladas e medidas dos benchmarks
+===================================================================
+
+Funcoes compartilhadas pelos benchmarks de recuperacao, quantizacao e
+manutencao do LanceDB: percentis de latencia, tamanho em disco e geracao
+de consultas rotuladas a partir dos proprios chunks. Nao depende de numpy
+nem dos modulos de ingestao, para que os indices possam importa-las sem
+carregar o benchmark completo.
+"""
+
+import json
+import os
+import random
+import re
+from typing import Dict, List, Optional, Sequence
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil p (0-100) por vizinho mais proximo."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def tamanho_diretorio(caminho: str) -> int:
+    """Soma o tamanho em bytes de todos os arquivos do diretorio."""
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        total += sum(os.path.getsize(os.path.join(raiz, arquivo)) for arquivo in arquivos)
+    return total
+
+
+def _frase_consulta(conteudo: str, sorteio: random.Random) -> Optional[str]:
+    """Escolhe uma frase do chunk para servir de consulta."""
+    frases = [f.strip() for f in re.split(r"(?<=[.!?])\s+", conteudo) if 6 <= len(f.split()) <= 30]
+    if frases:
+        return sorteio.choice(frases)
+    palavras = conteudo.split()
+    return " ".join(palavras[:20]) if len(palavras) >= 6 else None
+
+
+def gerar_consultas(vector_db, quantidade: int = 200, semente: int = 42, limite_amostra: int = 20_000) -> List[Dict]:
+    """
+    Gera consultas rotuladas a partir dos chunks indexados.
+
+    Returns:
+        Lista de {consulta, ids_relevantes}
+    """
+    linhas = vector_db.table.search().select(["id", "payload"]).limit(limite_amostra).to_list()
+    sorteio = random.Random(semente)
+    sorteio.shuffle(linhas)
+
+    consultas = []
+    for linha in linhas:
+        frase = _frase_consulta(json.loads(linha["payload"]).get("content", ""), sorteio)
+        if frase:
+            consultas.append({"consulta": frase, "ids_relevantes": [linha["id"]]})
+        if len(consultas) >= quantidade:
+            break
+    return consultas
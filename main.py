@@ -3,23 +3,38 @@ Main - Ponto de entrada do sistema RAG
 ======================================
 
 Sistema principal para execucao do RAG com SQLite e Agentes.
+
+Uso:
+    python main.py [--profile-startup]
 """
 
-from agno.agent import Agent
-from agno.models.openai import OpenAILike
-from agno.knowledge.pdf import PDFKnowledgeBase
-from agno.vectordb.lancedb import LanceDb
-from agno.storage.sqlite import SqliteStorage
-from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "RAG"))
+
+# Antes dos demais imports do projeto, para medir o custo de cada um
+from perfil_inicializacao import perfil
+
+from busca_hibrida import RecuperadorHibrido
+from indice_vetorial import GerenciadorIndiceVetorial
+from rerank_contexto import RecuperadorComRerank, ReordenadorContexto
+from ingestao_incremental import IngestorIncremental
+from metricas_resposta import LogMetricas, MedicaoResposta, medir_retriever
+from registro_componentes import obter_storage, obter_vector_db, tempos_carregamento
+
 # Carregar variaveis de ambiente
 load_dotenv(override=True)
 
 
 def criar_agente():
     """Cria e configura o agente RAG."""
+    # Dependencias pesadas importadas apenas quando o agente e criado
+    from agno.agent import Agent
+    from agno.knowledge.pdf import PDFKnowledgeBase
+    from agno.models.openai import OpenAILike
+    
     api_key = os.getenv("MARITALK_API_KEY")
     
     if not api_key:
@@ -30,18 +45,23 @@ def criar_agente():
         id="sabia-3",
         name="Maritaca Sabia 3",
         api_key=api_key,
-        base_url="https://chat.maritaca.ai/api",
+        base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
         temperature=0,
     )
     
-    # Configurar embedder para vetorizacao
-    embedder = SentenceTransformerEmbedder()
+    # Configurar banco vetorial LanceDB (embedder compartilhado no processo)
+    vector_db = obter_vector_db(table_name="recipes", uri="lancedb")
     
-    # Configurar banco vetorial LanceDB
-    vector_db = LanceDb(
-        table_name="recipes",
-        uri="lancedb",
-        embedder=embedder,
+    # Indice ANN: nprobes/refine_factor equilibram recall e latencia
+    indice = GerenciadorIndiceVetorial(vector_db, nprobes=20)
+    
+    # Busca hibrida: BM25 no indice FTS + vetorial, fundidas por RRF
+    recuperador = RecuperadorHibrido(indice, k_textual=20, k_vetorial=20)
+    
+    # Remove chunks quase duplicados e reordena por MMR dentro do orcamento de tokens
+    recuperador_rerank = RecuperadorComRerank(
+        recuperador.buscar,
+        ReordenadorContexto(vector_db.embedder, orcamento_tokens=2000),
     )
     
     # Configurar base de conhecimento com PDFs
@@ -51,10 +71,7 @@ def criar_agente():
     )
     
     # Configurar storage SQLite
-    storage = SqliteStorage(
-        table_name="agno_sessions",
-        db_file="data.db",
-    )
+    storage = obter_storage(db_file="data.db", table_name="agno_sessions")
     
     # Criar agente
     agente = Agent(
@@ -64,12 +81,27 @@ def criar_agente():
         storage=storage,
         session_id="sessao_principal",
         search_knowledge=True,
+        retriever=medir_retriever(recuperador_rerank.retriever),
         instructions="""Voce e um assistente especializado em responder perguntas
 baseado nos documentos carregados. Use o conhecimento disponivel para fornecer
 respostas precisas e uteis. Sempre cite as fontes quando possivel.""",
     )
     
-    return agente, knowledge_base
+    return agente, knowledge_base, indice
+
+
+def responder(agente, pergunta: str, log_metricas: LogMetricas):
+    """Transmite a resposta no terminal registrando as metricas da pergunta."""
+    medicao = MedicaoResposta(pergunta)
+    with medicao.ativa():
+        for chunk in agente.run(pergunta, stream=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                medicao.token(chunk.content)
+                print(chunk.content, end="", flush=True)
+    print()
+    metricas = medicao.concluir(agente)
+    log_metricas.anexar(metricas)
+    print(metricas)
 
 
 def main():
@@ -79,12 +111,21 @@ def main():
     print("=" * 60)
     
     try:
-        agente, knowledge_base = criar_agente()
+        with perfil.medir("criar agente"):
+            agente, knowledge_base, indice = criar_agente()
+        print("\nTempos de carregamento dos componentes:")
+        for componente, segundos in tempos_carregamento().items():
+            print(f"  {componente}: {segundos:.2f}s")
         
         # Carregar documentos
         print("\nCarregando documentos da base de conhecimento...")
-        knowledge_base.load()
+        with perfil.medir("sincronizar documentos"):
+            relatorio = IngestorIncremental(knowledge_base).sincronizar()
+            print(relatorio)
+            indice.atualizar()
         print("Documentos carregados com sucesso!")
+        perfil.imprimir()
+        log_metricas = LogMetricas()
         
         # Loop interativo
         while True:
@@ -92,6 +133,7 @@ def main():
             pergunta = input("Digite sua pergunta (ou 'sair' para encerrar): ").strip()
             
             if pergunta.lower() in ['sair', 'exit', 'quit', 'q']:
+                print(f"Latencia total (p50/p95): {log_metricas.percentis('total_ms')}")
                 print("Encerrando sistema...")
                 break
             
@@ -100,7 +142,7 @@ def main():
                 continue
             
             print("\nBuscando resposta...\n")
-            agente.print_response(pergunta, stream=True)
+            responder(agente, pergunta, log_metricas)
             
     except Exception as e:
         print(f"Erro: {e}")
@@ -6,9 +6,14 @@ Testes para validar o funcionamento do sistema de embeddings
 e da base vetorial LanceDB.
 """
 
-from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
-from agno.vectordb.lancedb import LanceDb
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "RAG"))
+
+from registro_componentes import obter_embedder, obter_vector_db, tempos_carregamento
+from embedding_lote import gerar_embeddings_em_lote
 
 
 def test_embedder_initialization():
@@ -16,7 +21,7 @@ def test_embedder_initialization():
     print("Testando inicializacao do embedder...")
     
     try:
-        embedder = SentenceTransformerEmbedder()
+        embedder = obter_embedder()
         print("  ✅ Embedder inicializado com sucesso")
         return embedder
     except Exception as e:
@@ -34,12 +39,41 @@ def test_embedding_generation(embedder):
         "Machine learning e inteligencia artificial.",
     ]
     
-    for texto in textos:
-        try:
-            embedding = embedder.get_embedding(texto)
+    try:
+        embeddings = gerar_embeddings_em_lote(embedder, textos)
+        for texto, embedding in zip(textos, embeddings):
             print(f"  ✅ Texto: '{texto[:30]}...' -> dim={len(embedding)}")
-        except Exception as e:
-            print(f"  ❌ Erro ao gerar embedding: {e}")
+    except Exception as e:
+        print(f"  ❌ Erro ao gerar embedding: {e}")
+
+
+def test_throughput_lote(embedder, quantidade: int = 256, tamanho_lote: int = 32):
+    """Compara a vazao (textos/s) da geracao individual com a em lote."""
+    print("\nComparando vazao individual x em lote...")
+    
+    textos = [
+        f"Trecho {i} de documento para medir a vazao do embedder. " * (1 + i % 8)
+        for i in range(quantidade)
+    ]
+    
+    try:
+        inicio = time.perf_counter()
+        for texto in textos:
+            embedder.get_embedding(texto)
+        individual = quantidade / (time.perf_counter() - inicio)
+        
+        inicio = time.perf_counter()
+        gerar_embeddings_em_lote(embedder, textos, tamanho_lote=tamanho_lote)
+        lote = quantidade / (time.perf_counter() - inicio)
+        
+        print(f"  Individual: {individual:.1f} textos/s")
+        print(f"  Lote ({tamanho_lote}): {lote:.1f} textos/s ({lote / individual:.1f}x)")
+        if lote > individual:
+            print("  ✅ Geracao em lote mais rapida")
+        else:
+            print("  ⚠️ Geracao em lote nao foi mais rapida")
+    except Exception as e:
+        print(f"  ❌ Erro: {e}")
 
 
 def test_vector_db():
@@ -47,12 +81,7 @@ def test_vector_db():
     print("\nTestando conexao com LanceDB...")
     
     try:
-        embedder = SentenceTransformerEmbedder()
-        vector_db = LanceDb(
-            table_name="test_table",
-            uri="lancedb",
-            embedder=embedder,
-        )
+        vector_db = obter_vector_db(table_name="test_table", uri="lancedb")
         print("  ✅ LanceDB conectado com sucesso")
         return vector_db
     except Exception as e:
@@ -65,7 +94,8 @@ def test_similarity_search():
     print("\nTestando busca por similaridade...")
     
     try:
-        embedder = SentenceTransformerEmbedder()
+        # Reaproveita o embedder ja carregado pelos testes anteriores
+        embedder = obter_embedder()
         
         # Gerar embeddings para comparacao
         texto1 = "O gato dormiu no sofa"
@@ -108,10 +138,15 @@ def main():
     
     if embedder:
         test_embedding_generation(embedder)
+        test_throughput_lote(embedder)
     
     test_vector_db()
     test_similarity_search()
     
+    print("\nTempos de carregamento dos componentes:")
+    for componente, segundos in tempos_carregamento().items():
+        print(f"  {componente}: {segundos:.2f}s")
+    
     print("\n" + "=" * 60)
     print("Testes finalizados")
     print("=" * 60)
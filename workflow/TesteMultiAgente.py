@@ -19,7 +19,7 @@ try:
         id="sabia-3",
         name="Maritaca Sabia 3",
         api_key=maritaca_api_key,
-        base_url="https://chat.maritaca.ai/api",
+        base_url=os.getenv("MARITACA_BASE_URL", "https://chat.maritaca.ai/api"),
         temperature=0,
     )
     print("Modelo Maritaca (Sabia 3) carregado com sucesso!")